@@ -4,23 +4,29 @@
 
 # pylint:disable=invalid-name, line-too-long
 
+import numpy as np
 import scipy.optimize as spopt
 from SABRAlphaCubic import SABRAlphaCubic
 
 import math
 
-def ATMVolToSABRAlpha(F0, ATMVol, tex, Beta, Rho, Nu):
+def ATMVolToSABRAlpha(F0, ATMVol, tex, Beta, Rho, Nu, Shift = 0, VolType = 'Lognormal'):
     """
     #' Returns the ATM SABR Alpha corresponding to the ATM Black market vol, using root solving to get the smallest positive root from SABRALPHACUBIC
     #'
     #' @param F0 Current forward rate
-    #' @param ATMVol Current BLACK ATM vol in the market corresponding to F0
+    #' @param ATMVol Current BLACK ATM vol in the market corresponding to F0 (NORMAL ATM vol if VolType is 'Normal')
     #' @param tex Time to expiry of option, measured in years
     #' @param Beta Shape parameter of SABR schema, EITHER evaluated using historical data OR preset by user
     #' @param Rho Correlation between SABR forward and diffusion processes
     #' @param Nu Vol-of-vol for SABR diffusion process
+    #' @param Shift Shift added to the forward, for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' (Black-76 ATM vol) or 'Normal' (Bachelier ATM vol). Either way the root is
+    #' bracketed between zero and the turning point of the cubic (if it has one), so a positive root is found
     #'
-    #' @return Single numeric value corresponding to the calibrated ATM SABR Alpha
+    #' @return Single numeric value corresponding to the calibrated ATM SABR Alpha. If any input is a VECTOR
+    #' (or array), the same bisection is run element-by-element in one vectorised pass and an array is returned,
+    #' with NaN wherever there is no positive root (the scalar path returns NaN too)
     #' @export
     #' @examples
     #' ### Simple example involving a 3M option on the 10Y swap rate with 50% Beta assumed
@@ -29,6 +35,9 @@ def ATMVolToSABRAlpha(F0, ATMVol, tex, Beta, Rho, Nu):
     #'
     """
 
+    #Shifted model - work with the shifted forward throughout:
+    F0 = np.asarray(F0, dtype=float) + Shift if np.ndim(F0) > 0 else F0 + Shift
+
     def opt_func(
             x,
             F0 = F0,
@@ -37,12 +46,56 @@ def ATMVolToSABRAlpha(F0, ATMVol, tex, Beta, Rho, Nu):
             Beta = Beta,
             Rho = Rho,
             Nu = Nu):
-      return SABRAlphaCubic(x, F0, ATMVol, tex, Beta, Rho, Nu)
+      return SABRAlphaCubic(x, F0, ATMVol, tex, Beta, Rho, Nu, VolType)
+
+    #The cubic is -ATMVol * F0^(1 - Beta) (or -ATMVol / F0^Beta) < 0 at zero, so bracket from zero. The
+    #lognormal cubic rises to +inf for Beta < 1, but at Beta = 1 it is a quadratic, which only has a positive
+    #root below its turning point if it opens downwards. The normal cubic falls to -inf, so bracket up to its
+    #turning point (or the usual upper end if it has none):
+    A3 = (((1 - Beta) ** 2) * tex) / (24 * F0 ** (2 - 2 * Beta))
+    A2 = (Rho * Nu * Beta * tex) / (4 * F0 ** (1 - Beta))
+    A1 = 1 + (2 - 3 * Rho ** 2) / 24 * Nu ** 2 * tex
+    if VolType == 'Normal':
+        A3 = -(Beta * (2 - Beta) * tex) / (24 * F0 ** (2 - 2 * Beta))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            turn = (-2 * A2 - np.sqrt(4 * A2 ** 2 - 12 * A3 * A1)) / (6 * A3)
+        lo, hi = 0., np.where(A3 < 0, turn, 10000.)
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            turn = -A1 / (2 * A2)
+        lo, hi = 0., np.where((A3 == 0) & (A2 < 0), turn, 10000.)
+
+    # Array inputs: run the same bisection as spopt.bisect on every element at once
+    if any(np.ndim(x) > 0 for x in (F0, ATMVol, tex, Beta, Rho, Nu)):
+        xa = np.full(np.broadcast(F0, ATMVol, tex, Beta, Rho, Nu).shape, lo)
+        fa = opt_func(xa)
+        dm = np.broadcast_to(hi - lo, xa.shape).astype(float)
+
+        #Elements without a sign change have no positive root in the bracket - return NaN for them:
+        with np.errstate(invalid='ignore'):
+            Bracketed = np.sign(fa) != np.sign(opt_func(xa + dm))
+        xm = xa.copy()
+        done = ~Bracketed
+        for _ in range(100):
+            dm *= .5
+            xm = np.where(done, xm, xa + dm)
+            fm = opt_func(xm)
+            xa = np.where(~done & (fm * fa >= 0), xm, xa)
+            done |= (fm == 0) | (np.abs(dm) < 2e-12 + 4 * np.finfo(float).eps * np.abs(xm))
+            if done.all():
+                break
+        return np.where(Bracketed & (xm > 0), xm, np.nan)
 
     # Brentq may not return the smallest root
     # roots = spopt.brentq(opt_func, -10000, 10000)
 
+    #No sign change over the bracket means no positive root - return NaN, as the array path does:
+    hi = float(hi)
+    with np.errstate(invalid='ignore'):
+        if not opt_func(lo) * opt_func(hi) <= 0:
+            return np.nan
+
     # Bisect shall return the smallest root
-    roots = spopt.bisect(opt_func, -10000, 10000)
+    roots = spopt.bisect(opt_func, lo, hi)
     # alpha = roots[roots>0].min()
     return roots
@@ -0,0 +1,37 @@
+"""
+#' Bachelier (Normal Model) Closed-Form Delta
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+import scipy.stats as ss
+
+def BachelierDelta(F0, K, Vol, tex, rfr, CallOrPut):
+    """
+    #' Closed-form solution for the Delta of a European call or put on a forward contract or rate,
+    #' using the Bachelier (normal) model.
+    #'
+    #' @param F0 Current forward rate
+    #' @param K Strike of the option
+    #' @param Vol Implied volatility, MUST BE IN NORMAL TERMS, can be taken from SABRTOBACHELIER
+    #' @param tex Time to expiry, in years, of the option
+    #' @param rfr Riskless rate, best taken as either the 10y or 30y government zero rate
+    #' @param CallOrPut Takes values of 'c' or 'p', and nothing else - determines whether you are pricing a call or put
+    #'
+    #' @return Bachelier Delta of a European option on a forward contract
+    #' @export
+    #'
+    #' @examples BachelierDelta(F0 = -0.0020, K = 0.0000, Vol = 0.0060, tex = 1, rfr = -0.005, CallOrPut = 'c')
+    """
+
+    if CallOrPut in ['c', 'p']:
+        a = 0 if CallOrPut == 'c' else -1
+    else:
+        raise ValueError('CallOrPut flag can only take values c or p!')
+
+    d = (F0 - K) / (Vol * np.sqrt(tex))
+
+    Delta = np.exp(-rfr * tex) * (ss.norm.cdf(d) + a)
+
+    return Delta
@@ -0,0 +1,30 @@
+"""
+#' Bachelier (Normal Model) Closed-Form Gamma
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+import scipy.stats as ss
+
+def BachelierGamma(F0, K, Vol, tex, rfr):
+    """
+    #' Closed-form solution for the Gamma of a European call or put on a forward contract or rate,
+    #' using the Bachelier (normal) model. Gamma is the same for calls and puts.
+    #'
+    #' @param F0 Current forward rate
+    #' @param K Strike of the option
+    #' @param Vol Implied volatility, MUST BE IN NORMAL TERMS, can be taken from SABRTOBACHELIER
+    #' @param tex Time to expiry, in years, of the option
+    #' @param rfr Riskless rate, best taken as either the 10y or 30y government zero rate
+    #'
+    #' @return Bachelier Gamma of a European option on a forward contract
+    #' @export
+    #'
+    #' @examples BachelierGamma(F0 = -0.0020, K = 0.0000, Vol = 0.0060, tex = 1, rfr = -0.005)
+    """
+
+    d = (F0 - K) / (Vol * np.sqrt(tex))
+    Gamma = np.exp(-rfr * tex) / (Vol * np.sqrt(tex)) * ss.norm.pdf(d)
+
+    return Gamma
@@ -0,0 +1,38 @@
+"""
+#' Bachelier (Normal Model) Closed-Form Option Price
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+import scipy.stats as ss
+
+def BachelierOptionPrice(F0, K, Vol, tex, rfr, CallOrPut):
+    """
+    #' Closed-form solution for the price of a European call or put on a forward contract or rate,
+    #' using the Bachelier (normal) model. Works for zero and negative forwards and strikes, so it is
+    #' the pricing formula for normal-vol quoted, negative-rate swaptions.
+    #'
+    #' @param F0 Current forward rate
+    #' @param K Strike of the option
+    #' @param Vol Implied volatility, MUST BE IN NORMAL TERMS, can be taken from SABRTOBACHELIER
+    #' @param tex Time to expiry, in years, of the option
+    #' @param rfr Riskless rate, best taken as either the 10y or 30y government zero rate
+    #' @param CallOrPut Takes values of 'c' or 'p', and nothing else - determines whether you are pricing a call or put
+    #'
+    #' @return Bachelier price of a European option on a forward contract
+    #' @export
+    #'
+    #' @examples BachelierOptionPrice(F0 = -0.0020, K = 0.0000, Vol = 0.0060, tex = 1, rfr = -0.005, CallOrPut = 'c')
+    """
+
+    if CallOrPut in ['c', 'p']:
+        a = 1 if CallOrPut == 'c' else -1
+    else:
+        raise ValueError('CallOrPut flag can only take values c or p!')
+
+    d = (F0 - K) / (Vol * np.sqrt(tex))
+
+    Price = np.exp(-rfr * tex) * (a * (F0 - K) * ss.norm.cdf(a * d) + Vol * np.sqrt(tex) * ss.norm.pdf(d))
+
+    return Price
@@ -0,0 +1,30 @@
+"""
+#' Bachelier (Normal Model) Closed-Form Vega
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+import scipy.stats as ss
+
+def BachelierVega(F0, K, Vol, tex, rfr):
+    """
+    #' Closed-form solution for the Vega, with respect to the NORMAL vol, of a European call or put on a
+    #' forward contract or rate, using the Bachelier (normal) model. Vega is the same for calls and puts.
+    #'
+    #' @param F0 Current forward rate
+    #' @param K Strike of the option
+    #' @param Vol Implied volatility, MUST BE IN NORMAL TERMS, can be taken from SABRTOBACHELIER
+    #' @param tex Time to expiry, in years, of the option
+    #' @param rfr Riskless rate, best taken as either the 10y or 30y government zero rate
+    #'
+    #' @return Bachelier Vega of a European option on a forward contract
+    #' @export
+    #'
+    #' @examples BachelierVega(F0 = -0.0020, K = 0.0000, Vol = 0.0060, tex = 1, rfr = -0.005)
+    """
+
+    d = (F0 - K) / (Vol * np.sqrt(tex))
+    Vega = np.exp(-rfr * tex) * np.sqrt(tex) * ss.norm.pdf(d)
+
+    return Vega
@@ -7,7 +7,7 @@
 import numpy as np
 import scipy.stats as ss
 
-def Black76Gamma(F0, K, Vol, tex, rfr):
+def Black76Gamma(F0, K, Vol, tex, rfr, Shift = 0):
     """
     #'
     #' Closed-form solution for the Gamma of a European option on a forward contract or rate, using
@@ -19,6 +19,7 @@ def Black76Gamma(F0, K, Vol, tex, rfr):
     #' @param Vol Implied volatility, MUST BE IN LOGNORMAL TERMS, can be taken from SABRTOBLACK76
     #' @param tex Time to expiry, in years, of the option
     #' @param rfr Riskless rate, best taken as either the 10y or 30y government zero rate
+    #' @param Shift Shift added to the forward and strike(s), for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
     #'
     #' @return Standard Black-76 Gamma of a European option on a forward contract
     #' @export
@@ -26,6 +27,9 @@ def Black76Gamma(F0, K, Vol, tex, rfr):
     #' @examples Black76Gamma(F0 = 0.0266, K = 0.0250, Vol = 0.4084, tex = 0.25, rfr = 0.02)
     """
 
+    #Shifted model - work with the shifted forward and strike throughout:
+    F0, K = F0 + Shift, K + Shift
+
     d1 = (np.log(F0 / K) + 0.5 * Vol ** 2  * tex) / (Vol * np.sqrt(tex))
     Gamma = np.exp(-rfr * tex) / (F0 * Vol * np.sqrt(tex)) * ss.norm.pdf(d1)
 
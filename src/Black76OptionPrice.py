@@ -6,7 +6,7 @@
 import numpy as np
 import scipy.stats as ss
 
-def Black76OptionPrice(F0, K, Vol, tex, rfr, CallOrPut):
+def Black76OptionPrice(F0, K, Vol, tex, rfr, CallOrPut, Shift = 0):
     """
     #' Closed-form solution for the price of a European call or put on a forward contract or rate,
     #' using the Black-76 formulation. For swaptions, provides the simple Price for a European-style
@@ -18,6 +18,7 @@ def Black76OptionPrice(F0, K, Vol, tex, rfr, CallOrPut):
     #' @param tex Time to expiry, in years, of the option
     #' @param rfr Riskless rate, best taken as either the 10y or 30y government zero rate
     #' @param CallOrPut Takes values of 'c' or 'p', and nothing else - determines whether you are pricing a call or put
+    #' @param Shift Shift added to the forward and strike(s), for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
     #'
     #' @return Standard Black-76 Delta of a European option on a forward contract
     #'
@@ -27,6 +28,9 @@ def Black76OptionPrice(F0, K, Vol, tex, rfr, CallOrPut):
 
     """
 
+    #Shifted model - work with the shifted forward and strike throughout:
+    F0, K = F0 + Shift, K + Shift
+
     if CallOrPut in ['c', 'p']:
         a = 1 if CallOrPut == 'c' else -1
     else:
@@ -5,11 +5,14 @@
 # pylint:disable=invalid-name, line-too-long, pointless-string-statement
 
 import numpy as np
-import scipy.optimize as spopt
 from ATMVolToSABRAlpha import ATMVolToSABRAlpha
 from SABRtoBlack76 import SABRtoBlack76
+from SABRtoBachelier import SABRtoBachelier
+from SABRBudgetMinimize import SABRBudgetMinimize
+from SABRRobustLoss import SABRRobustLoss
 
-def SABRATMCalib(F0, ATMVol, Strikes, MarketVols, tex, Beta, guess_Rho, guess_Nu):
+def SABRATMCalib(F0, ATMVol, Strikes, MarketVols, tex, Beta, guess_Rho, guess_Nu, deadline = None, max_evals = None, fallback_params = None,
+                 Shift = 0, VolType = 'Lognormal', Weights = None, Loss = 'linear', LossScale = 0.01):
     """
     #' Calibrates Rho and Nu such that sum of square errors between Black-76-equivalent SABR vols and market observed vols are minimized.
     #' For a given Rho and Nu, calculates ATM SABR Alpha from this, then calculates the resulting Black-76 vol, then takes SSE.
@@ -23,6 +26,14 @@ def SABRATMCalib(F0, ATMVol, Strikes, MarketVols, tex, Beta, guess_Rho, guess_Nu
     #' @param Beta Shape parameter of SABR schema, EITHER evaluated using historical data OR preset by user
     #' @param guess_Rho Initial user-defined guess of Rho value, MUST be bounded between -1 and 1
     #' @param guess_Nu Initial user-defined guess of Nu value, MUST be non-zero
+    #' @param deadline Optional absolute time.monotonic() time by which to stop with the best parameters so far
+    #' @param max_evals Optional maximum number of SSE evaluations
+    #' @param fallback_params Optional previously published Rho/Nu to fall back to if the calibration stops early
+    #' @param Shift Shift added to the forward and strikes, for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' if the market vols (ATMVol included) are Black-76 vols, or 'Normal' if they are normal (Bachelier) vols, fitted with SABRTOBACHELIER
+    #' @param Weights Optional VECTOR of non-negative quote weights, e.g. a row of SABR_Weights from SABRQUOTEFILTER
+    #' @param Loss One of RobustLosses ('linear', 'huber' or 'soft_l1'), defaults to the plain sum of squares
+    #' @param LossScale Vol error at which the robust losses start to down-weight, in the units of the market vols
     #'
     #' @return List of outputs from the constrOptim function that includes the parameters for calibrated Rho/Nu
     #' @export
@@ -36,6 +47,9 @@ def SABRATMCalib(F0, ATMVol, Strikes, MarketVols, tex, Beta, guess_Rho, guess_Nu
     """
 
     # Some basic error-checking:
+    if VolType not in ['Lognormal', 'Normal']:
+        raise ValueError("Vol type MUST be 'Lognormal' or 'Normal'!")
+
     if len(Strikes) != len(MarketVols):
         raise ValueError('Strikes vector must be same length as market data!')
 
@@ -50,7 +64,15 @@ def SABRATMCalib(F0, ATMVol, Strikes, MarketVols, tex, Beta, guess_Rho, guess_Nu
 
     CalibVols = np.zeros(n)
 
-    #Define the internal sum of square errors (SSE) function:
+    #Black-76 or normal equivalent SABR vols, to match the market quotes
+    #(normal vols are measured in bp, so the SSE stays on the optimiser's tolerance scale):
+    Kernel = SABRtoBlack76 if VolType == 'Lognormal' else SABRtoBachelier
+    Units = 1 if VolType == 'Lognormal' else 1e4
+    RootWeights = np.sqrt(np.ones(n) if Weights is None else np.asarray(Weights, dtype=float))
+    #Zero-weighted (e.g. dropped by SABRQUOTEFILTER) or missing quotes take no part in the fit:
+    Used = (RootWeights > 0) & np.isfinite(np.asarray(MarketVols, dtype=float))
+
+    #Define the internal sum of square errors (SSE) function, weighted and with the chosen loss:
     def SSE(calibparams,
             F0 = F0,
             ATMVol = ATMVol,
@@ -63,12 +85,16 @@ def SABRATMCalib(F0, ATMVol, Strikes, MarketVols, tex, Beta, guess_Rho, guess_Nu
         v2 = calibparams[1]
 
         # Calculate ATM SABR Alpha from initial values:
-        ATMAlpha = ATMVolToSABRAlpha(F0, ATMVol, tex, Beta, v1, v2)
+        ATMAlpha = ATMVolToSABRAlpha(F0, ATMVol, tex, Beta, v1, v2, Shift, VolType)
+
+        #No positive Alpha reproduces the ATM vol at this Rho/Nu - keep the optimiser away from it:
+        if not np.isfinite(ATMAlpha):
+            return np.inf
 
-        for i in range(n):
-            CalibVols[i] = SABRtoBlack76(F0, Strikes[i], tex, ATMAlpha, Beta, v1, v2)
+        for i in np.flatnonzero(Used):
+            CalibVols[i] = Kernel(F0, Strikes[i], tex, ATMAlpha, Beta, v1, v2, Shift)
 
-        y = ((CalibVols - MarketVols) ** 2).sum()
+        y = SABRRobustLoss(np.where(Used, (CalibVols - MarketVols) * Units * RootWeights, 0), Loss, LossScale * Units)[0].sum()
         return y
 
     #Define matrix and vector of constraints
@@ -91,6 +117,6 @@ def SABRATMCalib(F0, ATMVol, Strikes, MarketVols, tex, Beta, guess_Rho, guess_Nu
     #Pass in the vector of initial parameter guesses:
     init_params = (guess_Rho, guess_Nu)
     bnds = ((-1, 1), (0, None))
-    CalibSet = spopt.minimize(SSE, init_params,bounds=bnds)
+    CalibSet = SABRBudgetMinimize(SSE, init_params, bnds, deadline, max_evals, fallback_params)
 
     return CalibSet
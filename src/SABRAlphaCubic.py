@@ -4,7 +4,7 @@
 
 # pylint:disable=invalid-name, line-too-long
 
-def SABRAlphaCubic(x, F0, ATMVol, tex, Beta, Rho, Nu):
+def SABRAlphaCubic(x, F0, ATMVol, tex, Beta, Rho, Nu, VolType = 'Lognormal'):
     """
     #' Anonymous function to calculate the SABR Alpha given market inputs, used in calibration processes
     #'
@@ -15,8 +15,9 @@ def SABRAlphaCubic(x, F0, ATMVol, tex, Beta, Rho, Nu):
     #' @param Beta Calibrated (or user-selected) Beta parameter defining shape of the forward curve
     #' @param Rho Calibrated correlation coefficient between forward and volatility Wiener processes
     #' @param Nu Calibrated vol-of-vol for stochastic volatility process
+    #' @param VolType 'Lognormal' if ATMVol is a Black-76 vol, or 'Normal' if it is a normal (Bachelier) vol
     #'
-    #' @return Single numeric value corresponding to the ATM Black-76-equivalent volatility for the given Alpha
+    #' @return Single numeric value of the cubic in Alpha, which is zero when Alpha reproduces the ATM vol
     #'
     #' @export
     #'
@@ -26,8 +27,17 @@ def SABRAlphaCubic(x, F0, ATMVol, tex, Beta, Rho, Nu):
     #'  Nu = 1.0504)
     """
 
-    A3 = (((1 - Beta) ** 2 ) * tex) / (24 * F0 ** (2 - 2 * Beta))
+    if VolType not in ['Lognormal', 'Normal']:
+        raise ValueError("Vol type MUST be 'Lognormal' or 'Normal'!")
+
     A2 = (Rho * Nu * Beta * tex) / (4 * F0 ** (1 - Beta))
     A1 = 1 + (2 - 3 * Rho ** 2) / 24 * Nu ** 2 * tex
-    A0 = -ATMVol * F0 ** (1 - Beta)
+
+    if VolType == 'Lognormal':
+        A3 = (((1 - Beta) ** 2 ) * tex) / (24 * F0 ** (2 - 2 * Beta))
+        A0 = -ATMVol * F0 ** (1 - Beta)
+    else:
+        #Hagan's normal-vol expansion, divided through by F0^Beta:
+        A3 = -(Beta * (2 - Beta) * tex) / (24 * F0 ** (2 - 2 * Beta))
+        A0 = -ATMVol / F0 ** Beta
     return A3 * x ** 3 + A2 * x ** 2 + A1 * x + A0
@@ -0,0 +1,89 @@
+"""
+#' Batched Full Calibration of SABR Parameters for Many Smiles at Once
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+
+from SABRBatchLM import SABRBatchLM
+from SABRVolJacobian import SABRVolJacobian
+
+def SABRBatchFullCalib(F0, Strikes, MarketVols, tex, Beta, guess_Alpha, guess_Rho, guess_Nu, max_iter = 100, Shift = 0, VolType = 'Lognormal',
+                       Weights = None, Loss = 'linear', LossScale = 0.01):
+    """
+    #' Calibrates Alpha, Rho and Nu for N independent smiles at the same time, such that the sum of square
+    #' errors between Black-76-equivalent SABR vols and market observed vols is minimised for every smile.
+    #' Same objective as SABRFULLCALIB, but solved with the lockstep Levenberg-Marquardt scheme of
+    #' SABRBATCHLM, so residuals and Jacobians of all smiles are evaluated in one vectorised pass.
+    #'
+    #' @param F0 VECTOR of N current forward rates
+    #' @param Strikes (N, m) MATRIX of strike prices, ragged smiles padded with NaN
+    #' @param MarketVols (N, m) MATRIX of LOGNORMAL (i.e. Black-76) market-quoted implied volatilities, padded with NaN
+    #' @param tex VECTOR (or single value) of times to expiry, measured in years
+    #' @param Beta VECTOR (or single value) of SABR Beta, EITHER evaluated using historical data OR preset by user
+    #' @param guess_Alpha VECTOR (or single value) of initial guesses of Alpha, MUST be non-zero
+    #' @param guess_Rho VECTOR (or single value) of initial guesses of Rho, MUST be bounded between -1 and 1
+    #' @param guess_Nu VECTOR (or single value) of initial guesses of Nu, MUST be non-zero
+    #' @param max_iter Maximum number of Levenberg-Marquardt iterations per smile
+    #' @param Shift VECTOR (or single value) of per-smile shifts added to the forward and strikes, for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' if the market vols are Black-76 vols, or 'Normal' if they are normal (Bachelier) vols, fitted with SABRTOBACHELIER
+    #' @param Weights Optional (N, m) MATRIX of non-negative quote weights, e.g. SABR_Weights from SABRQUOTEFILTER
+    #' @param Loss One of RobustLosses ('linear', 'huber' or 'soft_l1'), defaults to the plain sum of squares
+    #' @param LossScale Vol error at which the robust losses start to down-weight, in the units of the market vols
+    #'
+    #' @return OptimizeResult from SABRBATCHLM, with x an (N, 3) array of calibrated Alpha/Rho/Nu. Smiles without
+    #' a single valid quote are not fitted and get status -1
+    #' @export
+    #'
+    #' @examples
+    #' SABRBatchFullCalib(F0 = np.array([0.0266, 0.0266]), Strikes = np.array([calibrun$Strike, calibrun$Strike]),
+    #' MarketVols = np.array([calibrun$BlackVol, calibrun$BlackVol * 1.1]), tex = 0.25, Beta = 0.5,
+    #' guess_Alpha = 0.05, guess_Rho = 0.05, guess_Nu = 0.7)
+    """
+
+    Strikes = np.atleast_2d(np.asarray(Strikes, dtype=float))
+    MarketVols = np.atleast_2d(np.asarray(MarketVols, dtype=float))
+    N = Strikes.shape[0]
+
+    # Some basic error-checking:
+    if VolType not in ['Lognormal', 'Normal']:
+        raise ValueError("Vol type MUST be 'Lognormal' or 'Normal'!")
+
+    if Strikes.shape != MarketVols.shape:
+        raise ValueError('Strikes matrix must be same shape as market data!')
+
+    if np.any(np.asarray(guess_Alpha) <= 0):
+        raise ValueError('Diffusion parameter must be non-zero!')
+
+    if np.any(np.abs(guess_Rho) > 1):
+        raise ValueError('Correlation parameter Rho must be between -1 and 1!')
+
+    if np.any(np.asarray(guess_Nu) <= 0):
+        raise ValueError('Vol-of-vol parameter must be non-zero!')
+
+    F0, tex, Beta, Shift = [np.broadcast_to(np.asarray(x, dtype=float), (N,)) for x in (F0, tex, Beta, Shift)]
+    Valid = np.isfinite(Strikes) & np.isfinite(MarketVols)
+    #Smiles without a single valid quote cannot be fitted - fail them at the initial guess:
+    Empty = ~Valid.any(axis=1)
+    RootWeights = np.sqrt(np.broadcast_to(np.asarray(1 if Weights is None else Weights, dtype=float), Strikes.shape))
+
+    #Residuals and Jacobians for the requested rows of the batch:
+    def Resid(x, rows):
+        with np.errstate(all='ignore'):
+            Calib = SABRVolJacobian(F0[rows, None], Strikes[rows], tex[rows, None], x[:, 0, None], Beta[rows, None], x[:, 1, None], x[:, 2, None],
+                                    Shift = Shift[rows, None], VolType = VolType)
+        v = Valid[rows]
+        w = RootWeights[rows]
+        r = np.where(v, w * (Calib['SABR_Vols'] - MarketVols[rows]), 0)
+        r[Empty[rows]] = np.nan
+        J = np.where(v[:, :, None], w[:, :, None] * Calib['SABR_Jacobian'], 0)
+        return r, J
+
+    #Bounds: alpha > 0, -1 < rho < 1, nu > 0
+    x0 = np.column_stack(np.broadcast_arrays(guess_Alpha, guess_Rho, guess_Nu, np.zeros(N))[:3]).astype(float)
+    CalibSet = SABRBatchLM(Resid, x0, lower=[1e-9, -0.9999, 1e-8], upper=[np.inf, 0.9999, np.inf], max_iter=max_iter, Loss=Loss, LossScale=LossScale)
+    CalibSet.message = CalibSet.message.astype(object)
+    CalibSet.message[Empty] = 'No valid quotes'
+
+    return CalibSet
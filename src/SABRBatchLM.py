@@ -0,0 +1,108 @@
+"""
+#' Lockstep Batched Levenberg-Marquardt Solver
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+import scipy.optimize as spopt
+
+from SABRRobustLoss import SABRRobustLoss
+
+def SABRBatchLM(ResidFunc, x0, lower, upper, max_iter = 100, ftol = 1e-12, xtol = 1e-10, Loss = 'linear', LossScale = 1):
+    """
+    #' Minimises the sum of square residuals of N independent small least-squares problems in lockstep.
+    #' Parameters are held as an (N, p) array, residuals and Jacobians of all active problems are
+    #' evaluated in one call, the N damped normal-equation systems are solved with batched linear algebra,
+    #' and problems are dropped from the active set as soon as they converge. Parameters are projected
+    #' back onto the box [lower, upper] after every step. With a robust Loss (see SABRROBUSTLOSS) the robust
+    #' cost is minimised instead of the sum of squares, by reweighting each residual with rho' in the
+    #' normal equations (iteratively reweighted least squares).
+    #'
+    #' @param ResidFunc Function of (x, rows) returning residuals (n, m) and Jacobian (n, m, p) for the
+    #' parameter rows x (n, p), where rows are the indices of those problems in the batch. Unused
+    #' residual slots (e.g. padding of ragged smiles) should be returned as zero
+    #' @param x0 (N, p) array of initial guesses
+    #' @param lower VECTOR of p lower bounds
+    #' @param upper VECTOR of p upper bounds
+    #' @param max_iter Maximum number of iterations per problem
+    #' @param ftol Relative reduction in the sum of squares below which a problem has converged
+    #' @param xtol Relative step size below which a problem has converged
+    #' @param Loss One of RobustLosses, defaults to the plain sum of squares
+    #' @param LossScale Residual size at which the robust losses start to down-weight
+    #'
+    #' @return OptimizeResult with x (N, p), fun (N, sum of squares, or robust cost), nit (N), success (N) and status (N),
+    #' where status is 1 for converged, 0 for iteration limit reached, -1 for non-finite residuals or Jacobian
+    #' at the initial guess, and -2 for damping grown past its limit without a single accepted step
+    #' @export
+    #'
+    #' @examples SABRBatchLM(lambda x, rows: (x - 1, np.ones((len(x), 1, 1))), np.zeros((4, 1)), [-10], [10])
+    """
+
+    x = np.clip(np.array(x0, dtype=float), lower, upper)
+    N, p = x.shape
+
+    r, J = ResidFunc(x, np.arange(N))
+    Cost, W = SABRRobustLoss(r, Loss, LossScale)
+    SSE = Cost.sum(axis=1)
+
+    nit = np.zeros(N, dtype=int)
+    status = np.zeros(N, dtype=int)
+    Lambda = np.full(N, 1e-3)
+    Accepted = np.zeros(N, dtype=bool)
+
+    #Problems that start from a non-finite point cannot be fitted:
+    status[~np.isfinite(SSE) | ~np.isfinite(J).all(axis=(1, 2))] = -1
+    active = np.flatnonzero(status == 0)
+
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+
+        ra, Ja, Wa = r[active], J[active], W[active]
+
+        #Batched damped normal equations: (J'WJ + lambda * diag(J'WJ)) dx = -J'Wr
+        JTJ = np.einsum('nmp,nm,nmq->npq', Ja, Wa, Ja)
+        g = np.einsum('nmp,nm,nm->np', Ja, Wa, ra)
+        D = np.einsum('npp->np', JTJ) + 1e-30
+        A = JTJ + (Lambda[active, None] * D)[:, :, None] * np.eye(p)
+        dx = np.linalg.solve(A, -g[:, :, None])[:, :, 0]
+
+        xa = x[active]
+        xnew = np.clip(xa + dx, lower, upper)
+
+        with np.errstate(all='ignore'):
+            rnew, Jnew = ResidFunc(xnew, active)
+            Costnew, Wnew = SABRRobustLoss(rnew, Loss, LossScale)
+            SSEnew = Costnew.sum(axis=1)
+        SSEnew = np.where(np.isfinite(SSEnew), SSEnew, np.inf)
+
+        accept = SSEnew < SSE[active]
+        nit[active] += 1
+
+        #Converged if the accepted step barely improved the fit or barely moved the parameters:
+        stepnorm = np.linalg.norm(xnew - xa, axis=1)
+        converged = accept & ((SSE[active] - SSEnew <= ftol * SSE[active]) | (stepnorm <= xtol * (xtol + np.linalg.norm(xa, axis=1))))
+        #...or if damping has grown so large that no further progress is possible - a failure if no step was ever accepted:
+        stalled = ~accept & (Lambda[active] > 1e12)
+        converged |= stalled
+
+        acc = active[accept]
+        x[acc] = xnew[accept]
+        r[acc] = rnew[accept]
+        J[acc] = Jnew[accept]
+        W[acc] = Wnew[accept]
+        SSE[acc] = SSEnew[accept]
+        Accepted[acc] = True
+        Lambda[acc] = np.maximum(Lambda[acc] / 10, 1e-12)
+        Lambda[active[~accept]] *= 10
+
+        status[active[converged]] = 1
+        status[active[stalled & ~Accepted[active]]] = -2
+        active = active[~converged]
+
+    messages = {1: 'Converged', 0: 'Maximum number of iterations reached', -1: 'Non-finite residuals or Jacobian at initial guess',
+                -2: 'No step accepted before the damping limit'}
+
+    return spopt.OptimizeResult(x=x, fun=SSE, nit=nit, status=status, success=status == 1,
+                                message=np.array([messages[s] for s in status]))
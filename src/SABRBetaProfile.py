@@ -0,0 +1,92 @@
+"""
+#' Beta-Profile Calibration of SABR Smiles over Many Candidate Betas
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+
+from SABRBatchFullCalib import SABRBatchFullCalib
+from SABRBatchATMCalib import SABRBatchATMCalib
+
+def SABRBetaProfile(F0, Strikes, MarketVols, tex, Betas, guess_Alpha = None, guess_Rho = 0.0, guess_Nu = 0.5, ATMVol = None, max_iter = 100,
+                    Shift = 0, VolType = 'Lognormal'):
+    """
+    #' Calibrates every smile of a surface for every candidate Beta at once, to choose Beta from the
+    #' fit-error profile. The N smiles are repeated for each of the B Betas into one (N x B) batch that
+    #' shares the strike grid, and the batch is solved in a single run of SABRBATCHFULLCALIB (or
+    #' SABRBATCHATMCALIB if ATMVol is supplied). Because Alpha scales roughly like ATMVol * F0^(1 - Beta)
+    #' (or like the normal ATMVol / F0^Beta), the Alpha guess is by default taken from the quote nearest the
+    #' money for each Beta.
+    #'
+    #' @param F0 VECTOR of N current forward rates
+    #' @param Strikes (N, m) MATRIX of strike prices, ragged smiles padded with NaN
+    #' @param MarketVols (N, m) MATRIX of LOGNORMAL (i.e. Black-76) market-quoted implied volatilities, or normal vols if VolType = 'Normal', padded with NaN
+    #' @param tex VECTOR (or single value) of times to expiry, measured in years
+    #' @param Betas VECTOR of B candidate Betas
+    #' @param guess_Alpha Initial guess of Alpha, defaults to the near-the-money vol times F0^(1 - Beta) (or F0^-Beta for normal vols)
+    #' @param guess_Rho Initial guess of Rho, MUST be bounded between -1 and 1
+    #' @param guess_Nu Initial guess of Nu, MUST be non-zero
+    #' @param ATMVol Optional VECTOR of N ATM market vols (of the same VolType as MarketVols), switches to the ATM calibration method
+    #' @param max_iter Maximum number of Levenberg-Marquardt iterations per smile and Beta
+    #' @param Shift VECTOR (or single value) of per-smile shifts added to the forward and strikes, for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' if the market vols are Black-76 vols, or 'Normal' if they are normal (Bachelier) vols
+    #'
+    #' @return A list object containing the Betas, the (N, B) sums of square errors and calibrated
+    #' Alpha/Rho/Nu, the (N, B) solver status (-1 for Betas without a positive Alpha, which are never chosen),
+    #' and the best Beta (and its index) per smile
+    #' @export
+    #'
+    #' @examples
+    #' SABRBetaProfile(F0 = np.array([0.0266]), Strikes = np.array([calibrun$Strike]),
+    #' MarketVols = np.array([calibrun$BlackVol]), tex = 0.25, Betas = np.linspace(0, 1, 11))
+    """
+
+    Strikes = np.atleast_2d(np.asarray(Strikes, dtype=float))
+    MarketVols = np.atleast_2d(np.asarray(MarketVols, dtype=float))
+    Betas = np.atleast_1d(np.asarray(Betas, dtype=float))
+    N, B = Strikes.shape[0], len(Betas)
+
+    F0, tex, Shift = [np.broadcast_to(np.asarray(x, dtype=float), (N,)) for x in (F0, tex, Shift)]
+
+    #Repeat every smile once per Beta - row i * B + j is smile i with Beta j:
+    F0B = np.repeat(F0, B)
+    texB = np.repeat(tex, B)
+    ShiftB = np.repeat(Shift, B)
+    BetaB = np.tile(Betas, N)
+    StrikesB = np.repeat(Strikes, B, axis=0)
+    MarketVolsB = np.repeat(MarketVols, B, axis=0)
+
+    if ATMVol is None:
+        if guess_Alpha is None:
+            Nearest = np.nanargmin(np.abs(Strikes - F0[:, None]), axis=1)
+            NearVol = np.repeat(MarketVols[np.arange(N), Nearest], B)
+            guess_Alpha = NearVol * (F0B + ShiftB) ** ((1 if VolType == 'Lognormal' else 0) - BetaB)
+        CalibSet = SABRBatchFullCalib(F0B, StrikesB, MarketVolsB, texB, BetaB, guess_Alpha, guess_Rho, guess_Nu, max_iter=max_iter,
+                                      Shift=ShiftB, VolType=VolType)
+        Alpha, Rho, Nu = CalibSet.x.T
+    else:
+        ATMVolB = np.repeat(np.broadcast_to(np.asarray(ATMVol, dtype=float), (N,)), B)
+        CalibSet = SABRBatchATMCalib(F0B, ATMVolB, StrikesB, MarketVolsB, texB, BetaB, guess_Rho, guess_Nu, max_iter=max_iter,
+                                     Shift=ShiftB, VolType=VolType)
+        Rho, Nu = CalibSet.x.T
+        Alpha = CalibSet.alpha
+
+    #Rows without a usable (finite, positive) Alpha have failed, whatever the solver reported:
+    Status = np.where(np.isfinite(Alpha) & (Alpha > 0), CalibSet.status, -1)
+    SSE = np.where(Status >= 0, CalibSet.fun, np.nan).reshape(N, B)
+
+    #Best Beta per smile, ignoring Betas that could not be fitted at all:
+    Fitted = np.isfinite(SSE).any(axis=1)
+    BestIndex = np.where(Fitted, np.argmin(np.where(np.isfinite(SSE), SSE, np.inf), axis=1), -1)
+
+    ResultsList = {'SABR_Betas': Betas,
+                   'SABR_SSE': SSE,
+                   'SABR_Alpha': Alpha.reshape(N, B),
+                   'SABR_Rho': Rho.reshape(N, B),
+                   'SABR_Nu': Nu.reshape(N, B),
+                   'SABR_Status': Status.reshape(N, B),
+                   'SABR_BestIndex': BestIndex,
+                   'SABR_BestBeta': np.where(Fitted, Betas[BestIndex], np.nan)}
+
+    return ResultsList
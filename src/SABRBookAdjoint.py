@@ -0,0 +1,99 @@
+"""
+#' Adjoint Book Sensitivities to SABR Parameters and Discount Curve Nodes
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+import scipy.stats as ss
+
+from SABRtoBlack76Adjoint import SABRtoBlack76Adjoint
+
+def SABRBookAdjoint(PointIndex, K, tex, CallOrPut, Notional, F0, Alpha, Beta, Rho, Nu, CurveTerms, CurveRates):
+    """
+    #' Prices a book of European options through the chain SABRTOBLACK76 -> Black-76 -> discounting, and
+    #' returns the sensitivities of the book PV to every Point's F0, Alpha, Beta, Rho, and Nu and to every
+    #' node of the discount curve from ONE forward and ONE reverse (adjoint) sweep, instead of one full
+    #' revaluation per bumped input. Discount factors are exp(-r(tex) * tex), with the continuously
+    #' compounded zero rate r linearly interpolated between curve nodes (flat beyond the end nodes), so
+    #' each option's rate adjoint lands on its two neighbouring nodes.
+    #'
+    #' @param PointIndex VECTOR of integer indices into the per-Point parameter vectors, one per option
+    #' @param K VECTOR of option strikes
+    #' @param tex VECTOR of option times to expiry, measured in years
+    #' @param CallOrPut VECTOR (or single value) of 'c' or 'p' flags
+    #' @param Notional VECTOR (or single value) of option notionals
+    #' @param F0 VECTOR of current forward rates, one per Point
+    #' @param Alpha VECTOR of calibrated SABR Alpha, one per Point
+    #' @param Beta VECTOR (or single value) of SABR Beta, one per Point
+    #' @param Rho VECTOR of calibrated SABR Rho, one per Point
+    #' @param Nu VECTOR of calibrated SABR Nu, one per Point
+    #' @param CurveTerms VECTOR of increasing curve node terms, in years
+    #' @param CurveRates VECTOR of continuously compounded zero rates at the nodes, in decimals (curves.csv values / 100)
+    #'
+    #' @return A list object containing the book PV, the PV of each option, the PV sensitivities to F0,
+    #' Alpha, Beta, Rho and Nu per Point, and the PV sensitivities to each curve node rate
+    #' @export
+    #'
+    #' @examples
+    #' curve = curves[curves$Type == 'ZERO',]
+    #' SABRBookAdjoint(PointIndex = np.array([0, 0, 1]), K = np.array([0.025, 0.030, 0.030]), tex = np.array([0.25, 0.25, 5]),
+    #' CallOrPut = np.array(['c', 'p', 'c']), Notional = 1e6, F0 = np.array([0.0266, 0.0310]), Alpha = np.array([0.0654, 0.0535]),
+    #' Beta = 0.5, Rho = np.array([-0.0341, -0.3287]), Nu = np.array([1.0451, 0.3951]),
+    #' CurveTerms = curve$Term, CurveRates = curve$Value / 100)
+    """
+
+    PointIndex = np.asarray(PointIndex, dtype=int)
+    K = np.asarray(K, dtype=float)
+    tex = np.asarray(tex, dtype=float)
+    CallOrPut = np.broadcast_to(np.asarray(CallOrPut), K.shape)
+    Notional = np.broadcast_to(np.asarray(Notional, dtype=float), K.shape)
+
+    if not np.all(np.isin(CallOrPut, ['c', 'p'])):
+        raise ValueError('CallOrPut flag can only take values c or p!')
+
+    nP = len(F0)
+    F0, Alpha, Beta, Rho, Nu = [np.broadcast_to(np.asarray(x, dtype=float), (nP,)) for x in (F0, Alpha, Beta, Rho, Nu)]
+    CurveTerms = np.asarray(CurveTerms, dtype=float)
+    CurveRates = np.asarray(CurveRates, dtype=float)
+
+    #Forward sweep - discount factors from the interpolated zero curve:
+    j = np.clip(np.searchsorted(CurveTerms, tex, side='right') - 1, 0, len(CurveTerms) - 2)
+    w = np.clip((tex - CurveTerms[j]) / (CurveTerms[j + 1] - CurveTerms[j]), 0, 1)
+    r = (1 - w) * CurveRates[j] + w * CurveRates[j + 1]
+    DF = np.exp(-r * tex)
+
+    #SABR vols and undiscounted Black-76 prices:
+    F = F0[PointIndex]
+    Sabr = SABRtoBlack76Adjoint(F, K, tex, Alpha[PointIndex], Beta[PointIndex], Rho[PointIndex], Nu[PointIndex])
+    Vol = Sabr['SABR_Vols']
+    a = np.where(CallOrPut == 'c', 1, -1)
+    d1 = (np.log(F / K) + 0.5 * Vol ** 2 * tex) / (Vol * np.sqrt(tex))
+    d2 = d1 - Vol * np.sqrt(tex)
+    U = a * (F * ss.norm.cdf(a * d1) - K * ss.norm.cdf(a * d2))
+
+    Prices = Notional * DF * U
+    PV = Prices.sum()
+
+    #Reverse sweep, seeded with dPV/dPrice = 1:
+    Ubar = Notional * DF
+    DFbar = Notional * U
+    rbar = -DFbar * tex * DF
+
+    #Black-76: dU/dF = a N(a d1), dU/dVol = F n(d1) sqrt(tex):
+    Fbar = Ubar * a * ss.norm.cdf(a * d1)
+    Volbar = Ubar * F * ss.norm.pdf(d1) * np.sqrt(tex)
+
+    #SABR vols - the adjoint pass is linear in Volbar, so scale the unit partial derivatives:
+    Fbar = Fbar + Volbar * Sabr['dF0']
+
+    ResultsList = {'PV': PV,
+                   'PV_Options': Prices,
+                   'dPV_dF0': np.bincount(PointIndex, weights=Fbar, minlength=nP),
+                   'dPV_dAlpha': np.bincount(PointIndex, weights=Volbar * Sabr['dAlpha'], minlength=nP),
+                   'dPV_dBeta': np.bincount(PointIndex, weights=Volbar * Sabr['dBeta'], minlength=nP),
+                   'dPV_dRho': np.bincount(PointIndex, weights=Volbar * Sabr['dRho'], minlength=nP),
+                   'dPV_dNu': np.bincount(PointIndex, weights=Volbar * Sabr['dNu'], minlength=nP),
+                   'dPV_dCurve': np.bincount(j, weights=rbar * (1 - w), minlength=len(CurveTerms)) + np.bincount(j + 1, weights=rbar * w, minlength=len(CurveTerms))}
+
+    return ResultsList
@@ -0,0 +1,76 @@
+"""
+#' Non-Linear Minimisation under a Time and Evaluation Budget
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import time
+
+import numpy as np
+import scipy.optimize as spopt
+
+
+class SABRBudgetExceeded(Exception):
+    """
+    #' Raised inside the objective function to stop the optimiser once the budget is used up
+    """
+
+
+def SABRBudgetMinimize(SSE, init_params, bnds, deadline = None, max_evals = None, fallback_params = None):
+    """
+    #' Runs spopt.minimize on a calibration objective, but stops cleanly once the deadline has passed or
+    #' max_evals objective evaluations have been made, returning the best parameters seen so far flagged
+    #' as partial. If previous parameters are supplied, a partial result falls back to them whenever they
+    #' give a lower (or equal) sum of square errors. With no budget this is exactly spopt.minimize.
+    #'
+    #' @param SSE Objective function of the calibration parameters
+    #' @param init_params VECTOR of initial parameter guesses
+    #' @param bnds Bounds on the parameters, as for spopt.minimize
+    #' @param deadline Absolute time.monotonic() time by which the calibration must stop, or None
+    #' @param max_evals Maximum number of objective evaluations, or None
+    #' @param fallback_params Optional VECTOR of previously published parameters to fall back to
+    #'
+    #' @return OptimizeResult as from spopt.minimize, plus 'partial' (stopped by the budget) and 'fallback'
+    #' (parameters replaced by fallback_params) flags
+    #' @export
+    #'
+    #' @examples SABRBudgetMinimize(lambda x: ((x - 1) ** 2).sum(), (0.5, 0.5), ((0, 2), (0, 2)), max_evals = 5)
+    """
+
+    Best = {'x': np.array(init_params, dtype=float), 'fun': np.inf, 'nfev': 0}
+
+    def Objective(x):
+        #Always allow the first evaluation, so there is a best point to return:
+        if Best['nfev'] > 0:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise SABRBudgetExceeded('Time budget exhausted')
+            if max_evals is not None and Best['nfev'] >= max_evals:
+                raise SABRBudgetExceeded('Evaluation budget exhausted')
+
+        Best['nfev'] += 1
+        y = SSE(x)
+        if y < Best['fun']:
+            Best['x'], Best['fun'] = np.array(x, dtype=float), y
+        return y
+
+    if deadline is None and max_evals is None:
+        CalibSet = spopt.minimize(SSE, init_params, bounds=bnds)
+        CalibSet.partial = False
+    else:
+        try:
+            CalibSet = spopt.minimize(Objective, init_params, bounds=bnds)
+            CalibSet.partial = False
+        except SABRBudgetExceeded as e:
+            CalibSet = spopt.OptimizeResult(x=Best['x'], fun=Best['fun'], success=False, status=-1,
+                                            message=str(e), nfev=Best['nfev'], partial=True)
+
+    CalibSet.fallback = False
+
+    if CalibSet.partial and fallback_params is not None:
+        FallbackSSE = SSE(np.asarray(fallback_params, dtype=float))
+        if FallbackSSE <= CalibSet.fun:
+            CalibSet.x = np.array(fallback_params, dtype=float)
+            CalibSet.fun = FallbackSSE
+            CalibSet.fallback = True
+
+    return CalibSet
@@ -0,0 +1,155 @@
+"""
+#' Arrow/Parquet Columnar I/O for Quotes, Curves, Historical Data and Fitted Results
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+#Column schemas of the data sets, and the row order they are written in (keeps row groups narrow for filtering):
+DataSchemas = {'sabrcalibdata': [('Point', 'string'), ('Strike', 'float64'), ('BlackVol', 'float64')],
+               'sabrfitteddata': [('Point', 'string'), ('Method', 'string'), ('Strike', 'float64'), ('Value', 'float64')],
+               'histratevoldata': [('Rate', 'string'), ('Forward', 'float64'), ('Date', 'date32'), ('BlackVol', 'float64')],
+               'curves': [('Term', 'float64'), ('Type', 'string'), ('Value', 'float64')]}
+
+DataSortKeys = {'sabrcalibdata': ['Point'],
+                'sabrfitteddata': ['Point', 'Method'],
+                'histratevoldata': ['Rate', 'Date'],
+                'curves': ['Type', 'Term']}
+
+
+def _Schema(Name):
+    """
+    #' Builds the Arrow schema of one of the DataSchemas, raising an ImportError if pyarrow is missing.
+    """
+
+    if pa is None:
+        raise ImportError('Arrow/Parquet I/O needs the pyarrow package - pip install pyarrow')
+
+    if Name not in DataSchemas:
+        raise ValueError('Data set MUST be one of ' + ', '.join(DataSchemas) + '!')
+
+    return pa.schema([(col, getattr(pa, dtype)()) for col, dtype in DataSchemas[Name]])
+
+
+def SABRDataCSVToParquet(CSVPath, ParquetPath, Name, RowGroupSize = 65536):
+    """
+    #' Converts one of the quoted CSV files in data/ to Parquet. The pandas index column is dropped,
+    #' the columns are cast to the data set's schema (see DataSchemas), and the rows are sorted by Point
+    #' (and Date), so each row group covers a narrow range of keys and filters can skip whole row groups.
+    #'
+    #' @param CSVPath Path of the CSV file, e.g. 'data/histratevoldata.csv'
+    #' @param ParquetPath Path of the Parquet file to write
+    #' @param Name Data set name, one of 'sabrcalibdata', 'sabrfitteddata', 'histratevoldata' or 'curves'
+    #' @param RowGroupSize Number of rows per Parquet row group
+    #'
+    #' @return Number of rows written
+    #' @export
+    #'
+    #' @examples SABRDataCSVToParquet('data/histratevoldata.csv', 'data/histratevoldata.parquet', 'histratevoldata')
+    """
+
+    schema = _Schema(Name)
+
+    table = pacsv.read_csv(CSVPath, convert_options=pacsv.ConvertOptions(column_types=schema, include_columns=schema.names))
+    table = table.select(schema.names).cast(schema)
+    table = table.sort_by([(col, 'ascending') for col in DataSortKeys[Name]])
+
+    pq.write_table(table, ParquetPath, row_group_size=RowGroupSize)
+
+    return table.num_rows
+
+
+def SABRDataWrite(Columns, ParquetPath, Name, RowGroupSize = 65536):
+    """
+    #' Writes columns of results (e.g. fitted vols in the sabrfitteddata layout) straight from NumPy
+    #' arrays to Parquet, in the data set's schema.
+    #'
+    #' @param Columns Dictionary of column name -> VECTOR, with every column of the data set's schema
+    #' @param ParquetPath Path of the Parquet file to write
+    #' @param Name Data set name, one of 'sabrcalibdata', 'sabrfitteddata', 'histratevoldata' or 'curves'
+    #' @param RowGroupSize Number of rows per Parquet row group
+    #'
+    #' @return Number of rows written
+    #' @export
+    #'
+    #' @examples SABRDataWrite({'Point': Points, 'Method': Methods, 'Strike': K, 'Value': Vols}, 'fitted.parquet', 'sabrfitteddata')
+    """
+
+    schema = _Schema(Name)
+
+    table = pa.Table.from_arrays([pa.array(np.asarray(Columns[col]), type=schema.field(col).type) for col in schema.names], schema=schema)
+    table = table.sort_by([(col, 'ascending') for col in DataSortKeys[Name]])
+
+    pq.write_table(table, ParquetPath, row_group_size=RowGroupSize)
+
+    return table.num_rows
+
+
+def SABRDataRead(ParquetPath, Name, Points = None, Methods = None, Types = None, DateFrom = None, DateTo = None, Columns = None):
+    """
+    #' Loads a Parquet data set as a dictionary of NumPy arrays. Point, Method, Type and Date filters are
+    #' pushed down to the Parquet reader, so row groups outside them are never read or decoded. Numeric
+    #' columns are handed over as zero-copy (read-only) views of the Arrow buffers; string and date
+    #' columns are converted to NumPy object and datetime64[D] arrays.
+    #'
+    #' @param ParquetPath Path of the Parquet file
+    #' @param Name Data set name, one of 'sabrcalibdata', 'sabrfitteddata', 'histratevoldata' or 'curves'
+    #' @param Points Optional LIST of Points (the Rate column of histratevoldata) to load
+    #' @param Methods Optional LIST of calibration methods to load, sabrfitteddata only
+    #' @param Types Optional LIST of curve types to load, e.g. ['ZERO'], curves only
+    #' @param DateFrom Optional first date to load (inclusive), histratevoldata only
+    #' @param DateTo Optional last date to load (inclusive), histratevoldata only
+    #' @param Columns Optional LIST of columns to load, defaults to all of them
+    #'
+    #' @return Dictionary of column name -> VECTOR
+    #' @export
+    #'
+    #' @examples
+    #' hist = SABRDataRead('data/histratevoldata.parquet', 'histratevoldata', Points = ['5Y10Y'], DateFrom = '2022-01-01')
+    #' quotes = SABRDataRead('data/sabrcalibdata.parquet', 'sabrcalibdata', Points = ['3M10Y'])
+    #' SABRFullCalib(F0 = 0.0266, Strikes = quotes['Strike'], MarketVols = quotes['BlackVol'], tex = 0.25, Beta = 0.5,
+    #' guess_Alpha = 0.05, guess_Rho = 0.05, guess_Nu = 0.7)
+    """
+
+    schema = _Schema(Name)
+
+    #Build the pushdown predicates:
+    filters = []
+    PointCol = 'Rate' if Name == 'histratevoldata' else 'Point'
+    for col, values in [(PointCol, Points), ('Method', Methods), ('Type', Types)]:
+        if values is None:
+            continue
+        if col not in schema.names:
+            raise ValueError('Data set ' + Name + ' has no ' + col + ' column to filter on!')
+        filters.append((col, 'in', list(np.atleast_1d(values))))
+
+    if DateFrom is not None or DateTo is not None:
+        if 'Date' not in schema.names:
+            raise ValueError('Data set ' + Name + ' has no Date column to filter on!')
+        if DateFrom is not None:
+            filters.append(('Date', '>=', np.datetime64(DateFrom, 'D').item()))
+        if DateTo is not None:
+            filters.append(('Date', '<=', np.datetime64(DateTo, 'D').item()))
+
+    table = pq.read_table(ParquetPath, columns=Columns, filters=filters or None, schema=schema)
+
+    Data = {}
+    for col in table.column_names:
+        chunked = table.column(col)
+        arr = chunked.combine_chunks() if chunked.num_chunks != 1 else chunked.chunk(0)
+        if pa.types.is_floating(arr.type) and arr.null_count == 0:
+            Data[col] = arr.to_numpy(zero_copy_only=True)
+        elif pa.types.is_date32(arr.type):
+            Data[col] = arr.to_numpy(zero_copy_only=False).astype('datetime64[D]')
+        else:
+            Data[col] = arr.to_numpy(zero_copy_only=False)
+
+    return Data
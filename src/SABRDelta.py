@@ -5,18 +5,22 @@
 # pylint:disable=invalid-name, line-too-long
 
 from SABRtoBlack76 import SABRtoBlack76
+from SABRtoBachelier import SABRtoBachelier
 from Black76Delta import Black76Delta
 from Black76Vega import Black76Vega
+from BachelierDelta import BachelierDelta
+from BachelierVega import BachelierVega
 from SABRParamLinearBump import SABRParamLinearBump
 
-def SABRDelta(F0, K, tex, rfr, CallOrPut, Alpha, Beta, Rho, Nu):
+def SABRDelta(F0, K, tex, rfr, CallOrPut, Alpha, Beta, Rho, Nu, Shift = 0, VolType = 'Lognormal'):
     """
     #' Calculates the risk due to changes in the value of the underlying forward rate using a mixture
     #' of analytical and numerical estimation methods, as outlined in 'Managing Smile Risk', p12.
     #' Assumes that all parameters provided are ALREADY CALIBRATED, i.e. does not attempt to run any
     #' calibrations first. Using the calibrated parameters, first calculates the Black-76-equivalent
     #' volatility, then calculates the Delta risk of the option given the input parameters using
-    #' the analytical forms for Black-76 Delta and Vega.
+    #' the analytical forms for Black-76 Delta and Vega. With VolType = 'Normal' the same is done with the
+    #' normal (Bachelier) equivalent volatility and the Bachelier Delta and Vega.
     #'
     #' @param F0 Current forward price
     #' @param K Strike of the option
@@ -27,19 +31,33 @@ def SABRDelta(F0, K, tex, rfr, CallOrPut, Alpha, Beta, Rho, Nu):
     #' @param Beta Shape parameter of SABR schema, EITHER evaluated using historical data OR preset by user
     #' @param Rho Correlation between SABR forward and diffusion processes
     #' @param Nu Vol-of-vol for SABR diffusion process
+    #' @param Shift Shift added to the forward and strike(s), for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' for the Black-76-equivalent Delta, or 'Normal' for the Bachelier-equivalent Delta
     #'
-    #' @return Black-76-equivalent Delta of the option
+    #' @return Black-76-equivalent (or Bachelier-equivalent) Delta of the option
     #' @export
     #'
     #' @examples SABRDelta(F0 = 0.0266, K = 0.0250, tex = 0.25, rfr = 0.02, CallOrPut = 'c',
     #' Alpha = 0.0651, Beta = 0.5, Rho = -0.0356, Nu = 1.0504)
     """
 
+    #Shifted model - work with the shifted forward and strike throughout:
+    F0, K = F0 + Shift, K + Shift
+
     if CallOrPut in ['c', 'p']:
         a = 0 if CallOrPut == 'c' else -1
     else:
         raise ValueError('CallOrPut flag can only take values c or p!')
 
+    if VolType not in ['Lognormal', 'Normal']:
+        raise ValueError("Vol type MUST be 'Lognormal' or 'Normal'!")
+
+    if VolType == 'Normal':
+        #Bachelier Delta plus Bachelier Vega times the CENTRAL DIFFERENCE of the normal vol over a 1bp bump:
+        SABRNormVol = SABRtoBachelier(F0, K, tex, Alpha, Beta, Rho, Nu)
+        SABRCorrectionFactor = (SABRtoBachelier(F0 + 0.00005, K, tex, Alpha, Beta, Rho, Nu) - SABRtoBachelier(F0 - 0.00005, K, tex, Alpha, Beta, Rho, Nu)) / 0.0001
+        return BachelierDelta(F0, K, SABRNormVol, tex, rfr, CallOrPut) + BachelierVega(F0, K, SABRNormVol, tex, rfr) * SABRCorrectionFactor
+
     #Calculate Black-76-equivalent volatility for provided inputs:
     SABRImpVol = SABRtoBlack76(F0, K, tex, Alpha, Beta, Rho, Nu)
 
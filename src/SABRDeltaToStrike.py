@@ -0,0 +1,143 @@
+"""
+#' Vectorised Delta-to-Strike Solver on the SABR Smile
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+import scipy.stats as ss
+
+from SABRtoBlack76 import SABRtoBlack76
+from SABRtoBlack76Adjoint import SABRtoBlack76Adjoint
+
+#Delta conventions the strikes can be solved for:
+DeltaModels = ['SABR', 'Black76']
+
+def SABRDeltaToStrike(F0, Delta, tex, rfr, CallOrPut, Alpha, Beta, Rho, Nu, Model = 'SABR', Shift = 0, tol = 1e-10, xtol = 1e-12, max_iter = 50):
+    """
+    #' Inverts delta to strike for whole arrays of delta-quoted options (e.g. 25D and 10D broker quotes) at
+    #' once. With Model = 'SABR' the delta is that of SABRDELTA, i.e. Black-76 Delta at the smile vol plus the
+    #' Vega times the backbone slope dVol/dF0 over a 1bp central bump; with Model = 'Black76' it is the plain
+    #' BLACK76DELTA at the smile vol. Each element runs a safeguarded Newton iteration in log-strike: the
+    #' step uses the analytic dDelta/dK (with the smile and backbone slopes in K from SABRTOBLACK76ADJOINT), and falls
+    #' back to bisection of a bracket around the forward whenever it would leave the bracket. Only the
+    #' elements still iterating are re-evaluated. An element has converged once its delta is within tol,
+    #' or its log-strike step is below xtol (near the money the bumped backbone is only good to ~1e-9).
+    #' Elements whose target delta is not bracketed (e.g. a call delta above the discount factor) return NaN.
+    #'
+    #' @param F0 Current forward rate, or a VECTOR of forwards (all inputs broadcast against each other)
+    #' @param Delta Target delta(s), positive for calls and negative for puts
+    #' @param tex Time to expiry, expressed in years, of the option(s)
+    #' @param rfr Riskless rate, best taken as either the 10y or 30y government zero rate
+    #' @param CallOrPut VECTOR (or single value) of 'c' or 'p' flags
+    #' @param Alpha Diffusion parameter in SABR scheme, calibrated as a result of using one of two methods
+    #' @param Beta Shape parameter of SABR schema, EITHER evaluated using historical data OR preset by user
+    #' @param Rho Correlation between SABR forward and diffusion processes
+    #' @param Nu Vol-of-vol for SABR diffusion process
+    #' @param Model Delta convention, one of DeltaModels
+    #' @param Shift Shift added to the forward and strikes, for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param tol Absolute tolerance on the delta
+    #' @param xtol Absolute tolerance on the step in log-strike
+    #' @param max_iter Maximum number of iterations
+    #'
+    #' @return A list object containing the solved strikes, their smile vols, the deltas achieved, a flag of
+    #' which elements converged, and the number of iterations taken by each element
+    #' @export
+    #'
+    #' @examples SABRDeltaToStrike(F0 = 0.0266, Delta = np.array([0.25, 0.10, -0.25, -0.10]), tex = 0.25, rfr = 0.02,
+    #' CallOrPut = np.array(['c', 'c', 'p', 'p']), Alpha = 0.0651, Beta = 0.5, Rho = -0.0356, Nu = 1.0504)
+    """
+
+    if Model not in DeltaModels:
+        raise ValueError('Delta model MUST be one of ' + ', '.join(DeltaModels) + '!')
+
+    CallOrPut = np.asarray(CallOrPut)
+    if not np.all(np.isin(CallOrPut, ['c', 'p'])):
+        raise ValueError('CallOrPut flag can only take values c or p!')
+
+    F0, Delta, tex, rfr, Alpha, Beta, Rho, Nu, Shift = np.broadcast_arrays(*[np.asarray(x, dtype=float) for x in (F0, Delta, tex, rfr, Alpha, Beta, Rho, Nu, Shift)],
+                                                                            np.empty(CallOrPut.shape))[:-1]
+    a = np.where(CallOrPut == 'c', 0, -1) + np.zeros(F0.shape)
+    Shape = F0.shape
+    F0, Delta, tex, rfr, Alpha, Beta, Rho, Nu, Shift, a = [np.ravel(x) for x in (F0, Delta, tex, rfr, Alpha, Beta, Rho, Nu, Shift, a)]
+
+    #Shifted model - solve for the shifted strike, x = log(K + Shift):
+    F = F0 + Shift
+    DF = np.exp(-rfr * tex)
+    sqt = np.sqrt(tex)
+
+    #Residual and its slope in x for the delta convention, for the elements i:
+    def Resid(x, i):
+        Fi, texi, DFi, sqti = F[i], tex[i], DF[i], sqt[i]
+        Params = (texi, Alpha[i], Beta[i], Rho[i], Nu[i])
+        with np.errstate(all='ignore'):
+            K = np.exp(x)
+            Smile = SABRtoBlack76Adjoint(Fi, K, *Params)
+            Vol = Smile['SABR_Vols']
+            d1 = (np.log(Fi / K) + 0.5 * Vol ** 2 * texi) / (Vol * sqti)
+            d2 = d1 - Vol * sqti
+            dd1 = -1 / (Vol * sqti) - d2 / Vol * K * Smile['dK']
+            g = DFi * (ss.norm.cdf(d1) + a[i]) - Delta[i]
+            dg = DFi * ss.norm.pdf(d1) * dd1
+            if Model == 'SABR':
+                Vega = Fi * DFi * ss.norm.pdf(d1) * sqti
+                Up = SABRtoBlack76Adjoint(Fi + 0.00005, K, *Params)
+                Dn = SABRtoBlack76Adjoint(Fi - 0.00005, K, *Params)
+                Backbone = (Up['SABR_Vols'] - Dn['SABR_Vols']) / 0.0001
+                g = g + Vega * Backbone
+                dg = dg - Vega * Backbone * d1 * dd1 + Vega * K * (Up['dK'] - Dn['dK']) / 0.0001
+        return g, dg, Vol
+
+    All = np.arange(F.size)
+
+    #Bracket the strike well into both wings, using the ATM vol as the scale:
+    with np.errstate(all='ignore'):
+        ATMVol = SABRtoBlack76(F, F, tex, Alpha, Beta, Rho, Nu)
+        Width = 10 * ATMVol * sqt
+        lo, hi = np.log(F) - Width, np.log(F) + Width
+
+    #Delta falls as the strike rises, for calls and puts alike:
+    Bracketed = (Resid(lo, All)[0] > 0) & (Resid(hi, All)[0] < 0)
+
+    #Start from the closed-form Black-76 strike at the ATM vol:
+    with np.errstate(all='ignore'):
+        x = np.log(F) + 0.5 * ATMVol ** 2 * tex - ss.norm.ppf(np.clip(Delta / DF - a, 1e-12, 1 - 1e-12)) * ATMVol * sqt
+    x = np.where(Bracketed, np.clip(x, lo, hi), np.nan)
+
+    Converged = np.zeros(F.size, dtype=bool)
+    Iterations = np.zeros(F.size, dtype=int)
+    i = All[Bracketed]
+
+    for _ in range(max_iter):
+        if i.size == 0:
+            break
+
+        g, dg, _ = Resid(x[i], i)
+        Done = np.abs(g) < tol
+        Converged[i[Done]] = True
+        i, g, dg = i[~Done], g[~Done], dg[~Done]
+        Iterations[i] += 1
+
+        #Shrink the bracket, then take the Newton step unless it leaves the bracket:
+        lo[i] = np.where(g > 0, x[i], lo[i])
+        hi[i] = np.where(g <= 0, x[i], hi[i])
+        with np.errstate(all='ignore'):
+            xn = x[i] - g / dg
+        Safe = np.isfinite(xn) & (xn > lo[i]) & (xn < hi[i])
+        xn = np.where(Safe, xn, 0.5 * (lo[i] + hi[i]))
+
+        #A step below xtol has pinned the strike down to the precision of the delta itself:
+        Done = np.abs(xn - x[i]) < xtol
+        x[i] = xn
+        Converged[i[Done]] = True
+        i = i[~Done]
+
+    g, _, Vol = Resid(x, All)
+
+    ResultsList = {'SABR_Strikes': (np.exp(x) - Shift).reshape(Shape)[()],
+                   'SABR_Vols': Vol.reshape(Shape)[()],
+                   'SABR_Deltas': (g + Delta).reshape(Shape)[()],
+                   'SABR_Converged': Converged.reshape(Shape)[()],
+                   'SABR_Iterations': Iterations.reshape(Shape)[()]}
+
+    return ResultsList
@@ -0,0 +1,96 @@
+"""
+#' No-Arbitrage Density Check for Calibrated SABR Smiles
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+
+from SABRtoBlack76 import SABRtoBlack76
+from SABRtoBachelier import SABRtoBachelier
+from Black76OptionPrice import Black76OptionPrice
+from BachelierOptionPrice import BachelierOptionPrice
+
+def SABRDensityCheck(F0, tex, Alpha, Beta, Rho, Nu, Group = None, LogMoneyness = (-2, 2), GridSize = 201, tol = 1e-8, Shift = 0, VolType = 'Lognormal'):
+    """
+    #' Checks every calibrated smile of a surface for static arbitrage in one vectorised pass. For each
+    #' smile the Black-76-equivalent SABR vols are evaluated on a dense strike grid K + Shift = (F0 + Shift) * exp(x),
+    #' with x spanning the same log-moneyness range for all smiles, and the implied risk-neutral density is taken
+    #' as the second strike derivative of the undiscounted Black-76 call price (or Bachelier call price at the
+    #' normal vols, if VolType = 'Normal'). Negative densities flag
+    #' butterfly arbitrage. Smiles sharing a Group label (e.g. the same underlying tenor) are ordered by
+    #' expiry, and a fall in total implied variance Vol^2 * tex at the same log-moneyness flags calendar
+    #' arbitrage.
+    #'
+    #' @param F0 VECTOR of N current forward rates
+    #' @param tex VECTOR of N times to expiry, measured in years
+    #' @param Alpha VECTOR of N calibrated SABR Alpha, e.g. SABR_Alpha from SABRVOLSFROMFULLCALIB or SABRVOLSFROMATMCALIB
+    #' @param Beta VECTOR (or single value) of SABR Beta
+    #' @param Rho VECTOR of N calibrated SABR Rho
+    #' @param Nu VECTOR of N calibrated SABR Nu
+    #' @param Group Optional VECTOR of N labels, smiles with equal labels are checked against each other for calendar arbitrage
+    #' @param LogMoneyness Lower and upper bounds of log((K + Shift) / (F0 + Shift)) for the strike grid
+    #' @param GridSize Number of strikes in the grid
+    #' @param tol Tolerance for the checks, relative to 1 / (F0 + Shift) for densities and absolute for total variance
+    #' @param Shift VECTOR (or single value) of per-smile shifts added to the forward and strikes, for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' to check Black-76-equivalent vols, or 'Normal' to check normal (Bachelier) vols
+    #'
+    #' @return A list object containing the (N, GridSize) strike grid, SABR vols (of the given VolType), densities (NaN at the
+    #' end points), butterfly and calendar violation masks, plus one butterfly and one calendar flag per smile
+    #' @export
+    #'
+    #' @examples
+    #' SABRDensityCheck(F0 = np.array([0.0266, 0.0266]), tex = np.array([0.25, 5]), Alpha = np.array([0.0654, 0.0535]),
+    #' Beta = 0.5, Rho = np.array([-0.0341, -0.3287]), Nu = np.array([1.0451, 0.3951]), Group = np.array(['10Y', '10Y']))
+    """
+
+    if VolType not in ['Lognormal', 'Normal']:
+        raise ValueError("Vol type MUST be 'Lognormal' or 'Normal'!")
+
+    N = np.broadcast(F0, tex, Alpha, Beta, Rho, Nu, Shift).shape
+    N = N[0] if len(N) > 0 else 1
+    F0, tex, Alpha, Beta, Rho, Nu, Shift = [np.broadcast_to(np.asarray(x, dtype=float), (N,))[:, None] for x in (F0, tex, Alpha, Beta, Rho, Nu, Shift)]
+
+    #Common log-moneyness grid in the shifted strike, so smiles of different expiries can be compared point by point:
+    x = np.linspace(LogMoneyness[0], LogMoneyness[1], GridSize)
+    Strikes = (F0 + Shift) * np.exp(x) - Shift
+
+    #Vols and undiscounted call prices for the whole surface in one kernel call each:
+    with np.errstate(all='ignore'):
+        if VolType == 'Lognormal':
+            Vols = SABRtoBlack76(F0, Strikes, tex, Alpha, Beta, Rho, Nu, Shift)
+            Calls = Black76OptionPrice(F0, Strikes, Vols, tex, 0, 'c', Shift)
+        else:
+            Vols = SABRtoBachelier(F0, Strikes, tex, Alpha, Beta, Rho, Nu, Shift)
+            Calls = BachelierOptionPrice(F0, Strikes, Vols, tex, 0, 'c')
+
+        #Second derivative on the non-uniform strike grid:
+        h = np.diff(Strikes, axis=1)
+        Slopes = np.diff(Calls, axis=1) / h
+        Density = np.full(Strikes.shape, np.nan)
+        Density[:, 1:-1] = 2 * np.diff(Slopes, axis=1) / (h[:, 1:] + h[:, :-1])
+
+    #Butterfly arbitrage - negative (or undefined) density anywhere inside the grid:
+    Butterfly = np.zeros(Strikes.shape, dtype=bool)
+    Butterfly[:, 1:-1] = ~(Density[:, 1:-1] * (F0 + Shift) >= -tol)
+
+    #Calendar arbitrage - total variance must not fall with expiry within a group:
+    Calendar = np.zeros(Strikes.shape, dtype=bool)
+    if Group is not None:
+        Group = np.broadcast_to(np.asarray(Group), (N,))
+        TotalVar = Vols ** 2 * tex
+        order = np.lexsort((tex[:, 0], Group))
+        same = Group[order][1:] == Group[order][:-1]
+        later = tex[order, 0][1:] > tex[order, 0][:-1]
+        drop = ~(TotalVar[order][1:] >= TotalVar[order][:-1] - tol) & (same & later)[:, None]
+        Calendar[order[1:]] = drop
+
+    ResultsList = {'SABR_Strikes': Strikes,
+                   'SABR_Vols': Vols,
+                   'SABR_Density': Density,
+                   'SABR_ButterflyViolation': Butterfly,
+                   'SABR_CalendarViolation': Calendar,
+                   'SABR_ButterflyArbitrage': Butterfly.any(axis=1),
+                   'SABR_CalendarArbitrage': Calendar.any(axis=1)}
+
+    return ResultsList
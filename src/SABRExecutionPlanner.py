@@ -0,0 +1,276 @@
+"""
+#' Size-Aware Execution Planner Choosing Scalar, Vectorised or Process-Pool Evaluation
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from SABRtoBlack76 import SABRtoBlack76
+from SABRDelta import SABRDelta
+from SABRGamma import SABRGamma
+from SABRVega import SABRVega
+from SABRVanna import SABRVanna
+from SABRVolga import SABRVolga
+from SABRBatchFullCalib import SABRBatchFullCalib
+
+#Work the planner can run - kernel, its inputs in order, and the largest chunk evaluated in one vectorised call:
+PlannerTasks = {'Vols': (SABRtoBlack76, ['F0', 'K', 'tex', 'Alpha', 'Beta', 'Rho', 'Nu'], 65536),
+                'Delta': (SABRDelta, ['F0', 'K', 'tex', 'rfr', 'CallOrPut', 'Alpha', 'Beta', 'Rho', 'Nu'], 65536),
+                'Gamma': (SABRGamma, ['F0', 'K', 'tex', 'rfr', 'Alpha', 'Beta', 'Rho', 'Nu'], 65536),
+                'Vega': (SABRVega, ['F0', 'K', 'tex', 'rfr', 'Alpha', 'Beta', 'Rho', 'Nu'], 65536),
+                'Vanna': (SABRVanna, ['F0', 'K', 'tex', 'rfr', 'Alpha', 'Beta', 'Rho', 'Nu'], 65536),
+                'Volga': (SABRVolga, ['F0', 'K', 'tex', 'rfr', 'Alpha', 'Beta', 'Rho', 'Nu'], 65536),
+                'Calib': (SABRBatchFullCalib, ['F0', 'Strikes', 'MarketVols', 'tex', 'Beta', 'guess_Alpha', 'guess_Rho', 'guess_Nu'], 1024)}
+
+PlannerStrategies = ['scalar', 'vectorised', 'pool']
+
+#Machine profile measured on first use:
+DefaultProfile = None
+
+#3M10Y smile used by the micro-benchmarks:
+BenchStrikes = np.array([0.0266, 0.0100, 0.0150, 0.0200, 0.0250, 0.0300, 0.0350, 0.0400, 0.0500, 0.0600, 0.0700, 0.0800, 0.0900, 0.1000])
+BenchVols = np.array([0.4084, 0.7376, 0.5685, 0.4668, 0.4154, 0.4048, 0.4161, 0.4347, 0.4734, 0.5072, 0.5358, 0.5602, 0.5813, 0.5998])
+
+
+def _PlanInputs(Task, Inputs, n):
+    """
+    #' Broadcasts the task inputs to n rows (Strikes and MarketVols of a calibration to n smiles).
+    """
+
+    Args = {}
+    for name in PlannerTasks[Task][1]:
+        x = np.asarray(Inputs[name], dtype=object if name == 'CallOrPut' else float)
+        Args[name] = np.broadcast_to(np.atleast_2d(x), (n, x.shape[-1])) if name in ['Strikes', 'MarketVols'] else np.broadcast_to(x, (n,))
+
+    return Args
+
+
+def _RunScalar(Task, Args):
+    """
+    #' Evaluates the task one row at a time with the original scalar function (for 'Calib', the batch
+    #' Levenberg-Marquardt solver on one smile at a time, so every strategy runs the same solver).
+    """
+
+    Func, names, _ = PlannerTasks[Task]
+    n = len(Args[names[0]])
+
+    if Task == 'Calib':
+        with np.errstate(all='ignore'):
+            return np.concatenate([Func(*[Args[name][i:i + 1] for name in names]).x for i in range(n)])
+
+    return np.array([Func(*[Args[name][i] for name in names]) for i in range(n)], dtype=float)
+
+
+def _RunVectorised(Task, Args):
+    """
+    #' Evaluates the task for all rows of Args in one vectorised call (one per CallOrPut flag for Delta).
+    """
+
+    Func, names, _ = PlannerTasks[Task]
+
+    if Task == 'Calib':
+        with np.errstate(all='ignore'):
+            return Func(*[Args[name] for name in names]).x
+
+    if 'CallOrPut' not in names:
+        return np.broadcast_to(Func(*[Args[name] for name in names]), Args[names[0]].shape).astype(float)
+
+    Out = np.zeros(len(Args['CallOrPut']))
+    for cp in np.unique(Args['CallOrPut']):
+        rows = Args['CallOrPut'] == cp
+        Out[rows] = Func(*[cp if name == 'CallOrPut' else Args[name][rows] for name in names])
+
+    return Out
+
+
+def _Chunks(Args, n, ChunkSize):
+    """
+    #' Splits the task inputs into row chunks of at most ChunkSize.
+    """
+
+    return [{k: v[s:s + ChunkSize] for k, v in Args.items()} for s in range(0, n, ChunkSize)]
+
+
+def _Nothing(x):
+    """
+    #' Trivial task used to time a round trip to every pool worker.
+    """
+
+    return x
+
+
+def SABRPlannerProfile(Workers = None):
+    """
+    #' Runs a quick micro-benchmark of this machine: for every task in PlannerTasks, the cost of one scalar
+    #' call, and the fixed overhead and per-row cost of a vectorised call; and the cost of starting a
+    #' process pool. The planner turns these into run-time estimates for each strategy.
+    #'
+    #' @param Workers Number of pool processes, defaults to the number of CPUs
+    #'
+    #' @return Machine profile, to be passed to SABRPLANCHOOSE and SABRPLANRUN
+    #' @export
+    #'
+    #' @examples profile = SABRPlannerProfile()
+    """
+
+    Workers = Workers or os.cpu_count() or 1
+
+    def Timed(f, repeats):
+        best = np.inf
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            f()
+            best = min(best, time.perf_counter() - t0)
+        return best
+
+    Profile = {'Workers': Workers, 'Tasks': {}}
+
+    for Task in PlannerTasks:
+        if Task == 'Calib':
+            Inputs = {'F0': 0.0266, 'Strikes': BenchStrikes, 'MarketVols': BenchVols, 'tex': 0.25, 'Beta': 0.5,
+                      'guess_Alpha': 0.05, 'guess_Rho': 0.1, 'guess_Nu': 0.7}
+            nScalar, nBig, repeats = 1, 64, 2
+        else:
+            Inputs = {'F0': 0.0266, 'K': 0.0250, 'tex': 0.25, 'rfr': 0.02, 'CallOrPut': 'c', 'Alpha': 0.0651, 'Beta': 0.5, 'Rho': -0.0356, 'Nu': 1.0504}
+            nScalar, nBig, repeats = 20, 4096, 3
+
+        Small = _PlanInputs(Task, Inputs, 1)
+        Big = _PlanInputs(Task, Inputs, nBig)
+        if Task == 'Calib':
+            #Identical smiles would converge in lockstep - spread them out:
+            Big['MarketVols'] = BenchVols * np.linspace(0.8, 1.2, nBig)[:, None]
+
+        Scalar = Timed(lambda: _RunScalar(Task, _PlanInputs(Task, Inputs, nScalar)), repeats) / nScalar
+        t1 = Timed(lambda: _RunVectorised(Task, Small), repeats)
+        t2 = Timed(lambda: _RunVectorised(Task, Big), repeats)
+        PerItem = max(t2 - t1, 0) / (nBig - 1)
+
+        Profile['Tasks'][Task] = {'Scalar': Scalar, 'VectorOverhead': max(t1 - PerItem, 0), 'VectorPerItem': PerItem}
+
+    #Pool start-up, including one round trip to every worker:
+    if Workers > 1:
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(Workers) as pool:
+            list(pool.map(_Nothing, range(Workers)))
+        Profile['PoolStartup'] = time.perf_counter() - t0
+    else:
+        Profile['PoolStartup'] = np.inf
+
+    return Profile
+
+
+def SABRPlanChoose(Task, n, Profile = None, Strategy = None, ChunkSize = None):
+    """
+    #' Chooses how to run n rows of a task (options to price, or smiles to calibrate), from the run-time
+    #' estimates of the machine profile:
+    #'   scalar      n x (one scalar call)
+    #'   vectorised  (number of chunks) x (vectorised overhead) + n x (vectorised cost per row)
+    #'   pool        pool start-up + the vectorised time shared between the workers
+    #' The strategy and the chunk size can each be forced, in which case only the other is chosen. A forced
+    #' strategy without a Profile skips the machine profile altogether, and has no run-time estimates.
+    #'
+    #' @param Task Name of the task, one of PlannerTasks
+    #' @param n Number of rows
+    #' @param Profile Machine profile from SABRPLANNERPROFILE, measured once and reused if not supplied
+    #' @param Strategy Optional strategy to force, one of PlannerStrategies
+    #' @param ChunkSize Optional number of rows per vectorised call to force
+    #'
+    #' @return A list object containing the strategy, chunk size, number of workers, and the estimated run
+    #' time of every strategy in seconds (None if the strategy was forced without a Profile)
+    #' @export
+    #'
+    #' @examples SABRPlanChoose('Calib', 10000)
+    """
+
+    global DefaultProfile # pylint:disable=global-statement
+
+    if Task not in PlannerTasks:
+        raise ValueError('Task MUST be one of ' + ', '.join(PlannerTasks) + '!')
+
+    if Strategy is not None and Strategy not in PlannerStrategies:
+        raise ValueError('Strategy MUST be one of ' + ', '.join(PlannerStrategies) + '!')
+
+    MaxChunk = PlannerTasks[Task][2]
+
+    #A forced strategy needs no timings, so only profile the machine if there is a choice to make:
+    if Profile is None and Strategy is None:
+        if DefaultProfile is None:
+            DefaultProfile = SABRPlannerProfile()
+        Profile = DefaultProfile
+
+    Workers = (os.cpu_count() or 1) if Profile is None else Profile['Workers']
+
+    #Chunk sizes - as large as memory allows, or enough chunks to keep every worker busy:
+    VecChunk = ChunkSize or max(min(n, MaxChunk), 1)
+    PoolChunk = ChunkSize or max(min(-(-n // (4 * Workers)), MaxChunk), 1)
+
+    Estimates = None
+    if Profile is not None:
+        Cost = Profile['Tasks'][Task]
+        Estimates = {'scalar': n * Cost['Scalar'],
+                     'vectorised': -(-n // VecChunk) * Cost['VectorOverhead'] + n * Cost['VectorPerItem'],
+                     'pool': Profile['PoolStartup'] + (-(-n // PoolChunk) * Cost['VectorOverhead'] + n * Cost['VectorPerItem']) / Workers}
+
+    if Strategy is None:
+        Strategy = min(Estimates, key=Estimates.get)
+
+    Plan = {'Strategy': Strategy,
+            'ChunkSize': PoolChunk if Strategy == 'pool' else VecChunk if Strategy == 'vectorised' else 1,
+            'Workers': Workers if Strategy == 'pool' else 1,
+            'Estimates': Estimates}
+
+    return Plan
+
+
+def SABRPlanRun(Task, Inputs, Profile = None, Strategy = None, ChunkSize = None):
+    """
+    #' Runs a batch of pricing or calibration work with the strategy chosen by SABRPLANCHOOSE. Pricing tasks
+    #' return one value per option; 'Calib' returns the (n, 3) calibrated Alpha/Rho/Nu per smile, using the
+    #' Levenberg-Marquardt solver of SABRBATCHFULLCALIB whatever the strategy, so the strategies agree.
+    #'
+    #' @param Task Name of the task, one of PlannerTasks
+    #' @param Inputs Dictionary of the task's inputs (see PlannerTasks), as VECTORS or single values; for 'Calib',
+    #' Strikes and MarketVols are (n, m) MATRICES padded with NaN
+    #' @param Profile Machine profile from SABRPLANNERPROFILE, measured once and reused if not supplied
+    #' @param Strategy Optional strategy to force, one of PlannerStrategies
+    #' @param ChunkSize Optional number of rows per vectorised call to force
+    #'
+    #' @return A list object containing the plan from SABRPLANCHOOSE and the results
+    #' @export
+    #'
+    #' @examples
+    #' SABRPlanRun('Delta', {'F0': 0.0266, 'K': np.linspace(0.01, 0.05, 100000), 'tex': 0.25, 'rfr': 0.02,
+    #' 'CallOrPut': 'c', 'Alpha': 0.0651, 'Beta': 0.5, 'Rho': -0.0356, 'Nu': 1.0504})
+    """
+
+    if Task not in PlannerTasks:
+        raise ValueError('Task MUST be one of ' + ', '.join(PlannerTasks) + '!')
+
+    if Task == 'Calib':
+        n = np.atleast_2d(np.asarray(Inputs['Strikes'])).shape[0]
+    else:
+        n = np.broadcast(*[np.asarray(Inputs[name], dtype=object if name == 'CallOrPut' else float) for name in PlannerTasks[Task][1]]).size
+
+    Plan = SABRPlanChoose(Task, n, Profile, Strategy, ChunkSize)
+    Args = _PlanInputs(Task, Inputs, n)
+
+    if Plan['Strategy'] == 'scalar':
+        Result = _RunScalar(Task, Args)
+    else:
+        Chunks = _Chunks(Args, n, Plan['ChunkSize'])
+        if Plan['Strategy'] == 'vectorised' or Plan['Workers'] == 1:
+            Parts = [_RunVectorised(Task, c) for c in Chunks]
+        else:
+            with ProcessPoolExecutor(Plan['Workers']) as pool:
+                Parts = list(pool.map(_RunVectorised, [Task] * len(Chunks), Chunks))
+        Result = np.concatenate(Parts)
+
+    ResultsList = {'Plan': Plan,
+                   'Result': Result}
+
+    return ResultsList
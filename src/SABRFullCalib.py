@@ -5,10 +5,13 @@
 # pylint:disable=invalid-name, line-too-long
 
 import numpy as np
-import scipy.optimize as spopt
 from SABRtoBlack76 import SABRtoBlack76
+from SABRtoBachelier import SABRtoBachelier
+from SABRBudgetMinimize import SABRBudgetMinimize
+from SABRRobustLoss import SABRRobustLoss
 
-def SABRFullCalib(F0, Strikes, MarketVols, tex, Beta, guess_Alpha, guess_Rho, guess_Nu):
+def SABRFullCalib(F0, Strikes, MarketVols, tex, Beta, guess_Alpha, guess_Rho, guess_Nu, deadline = None, max_evals = None, fallback_params = None,
+                  Shift = 0, VolType = 'Lognormal', Weights = None, Loss = 'linear', LossScale = 0.01):
     """
     #' Calibrates Alpha Rho and Nu such that sum of square errors between Black-76-equivalent SABR vols
     #' and market observed vols are minimised. For a given Alpha, Rho, and Nu, calculates the resulting
@@ -22,6 +25,14 @@ def SABRFullCalib(F0, Strikes, MarketVols, tex, Beta, guess_Alpha, guess_Rho, gu
     #' @param guess_Alpha Initial user-defined guess of Alpha value, MUST be non-zero
     #' @param guess_Rho Initial user-defined guess of Rho value, MUST be bounded between -1 and 1
     #' @param guess_Nu Initial user-defined guess of Nu value, MUST be non-zero
+    #' @param deadline Optional absolute time.monotonic() time by which to stop with the best parameters so far
+    #' @param max_evals Optional maximum number of SSE evaluations
+    #' @param fallback_params Optional previously published Alpha/Rho/Nu to fall back to if the calibration stops early
+    #' @param Shift Shift added to the forward and strikes, for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' if the market vols are Black-76 vols, or 'Normal' if they are normal (Bachelier) vols, fitted with SABRTOBACHELIER
+    #' @param Weights Optional VECTOR of non-negative quote weights, e.g. a row of SABR_Weights from SABRQUOTEFILTER
+    #' @param Loss One of RobustLosses ('linear', 'huber' or 'soft_l1'), defaults to the plain sum of squares
+    #' @param LossScale Vol error at which the robust losses start to down-weight, in the units of the market vols
     #'
     #' @return List of outputs from the constrOptim function that includes the parameters for calibrated
     #' Alpha/Rho/Nu
@@ -35,6 +46,9 @@ def SABRFullCalib(F0, Strikes, MarketVols, tex, Beta, guess_Alpha, guess_Rho, gu
     """
 
     # Some basic error-checking:
+    if VolType not in ['Lognormal', 'Normal']:
+        raise ValueError("Vol type MUST be 'Lognormal' or 'Normal'!")
+
     if len(Strikes) != len(MarketVols):
         raise ValueError('Strikes vector must be same length as market data!')
 
@@ -51,8 +65,16 @@ def SABRFullCalib(F0, Strikes, MarketVols, tex, Beta, guess_Alpha, guess_Rho, gu
     n = len(Strikes)
     CalibVols = np.zeros(n)
 
+    #Black-76 or normal equivalent SABR vols, to match the market quotes
+    #(normal vols are measured in bp, so the SSE stays on the optimiser's tolerance scale):
+    Kernel = SABRtoBlack76 if VolType == 'Lognormal' else SABRtoBachelier
+    Units = 1 if VolType == 'Lognormal' else 1e4
+    RootWeights = np.sqrt(np.ones(n) if Weights is None else np.asarray(Weights, dtype=float))
+    #Zero-weighted (e.g. dropped by SABRQUOTEFILTER) or missing quotes take no part in the fit:
+    Used = (RootWeights > 0) & np.isfinite(np.asarray(MarketVols, dtype=float))
+
     #Pass in the vector of initial parameter guesses:
-    #Define the internal sum of square errors (SSE) function:
+    #Define the internal sum of square errors (SSE) function, weighted and with the chosen loss:
     def SSE(calibparams,
             F0 = F0,
             Strikes = Strikes,
@@ -63,10 +85,10 @@ def SABRFullCalib(F0, Strikes, MarketVols, tex, Beta, guess_Alpha, guess_Rho, gu
         v2 = calibparams[1]
         v3 = calibparams[2]
 
-        for i in range(n):
-          CalibVols[i] = SABRtoBlack76(F0, Strikes[i], tex, v1, Beta, v2, v3)
+        for i in np.flatnonzero(Used):
+          CalibVols[i] = Kernel(F0, Strikes[i], tex, v1, Beta, v2, v3, Shift)
 
-        y = ((CalibVols - MarketVols) ** 2).sum()
+        y = SABRRobustLoss(np.where(Used, (CalibVols - MarketVols) * Units * RootWeights, 0), Loss, LossScale * Units)[0].sum()
         return y
 
     #Define matrix and vector of constraints
@@ -81,6 +103,6 @@ def SABRFullCalib(F0, Strikes, MarketVols, tex, Beta, guess_Alpha, guess_Rho, gu
 
     # TODO: Tweaked bounds for alpha to avoid failure in SABRtoBlack76
     bnds = ((1e-9, None), (-1, 1-1e-12), (0, None))
-    CalibSet = spopt.minimize(SSE, init_params, bounds=bnds)
+    CalibSet = SABRBudgetMinimize(SSE, init_params, bnds, deadline, max_evals, fallback_params)
 
     return CalibSet
@@ -5,22 +5,26 @@
 # pylint:disable=invalid-name, line-too-long
 
 from SABRtoBlack76 import SABRtoBlack76
+from SABRtoBachelier import SABRtoBachelier
 from Black76Gamma import Black76Gamma
 from Black76Vega import Black76Vega
+from BachelierGamma import BachelierGamma
+from BachelierVega import BachelierVega
 from SABRParamLinearBump import SABRParamLinearBump
 
 import numpy as np
 import scipy.stats as ss
 
 
-def SABRGamma(F0, K, tex, rfr, Alpha, Beta, Rho, Nu):
+def SABRGamma(F0, K, tex, rfr, Alpha, Beta, Rho, Nu, Shift = 0, VolType = 'Lognormal'):
     """
     #' Calculates the second-order risk due to changes in the value of the underlying forward rate
     #' using a mixture of analytical and numerical estimation methods. Assumes that all parameters
     #' provided are ALREADY CALIBRATED, i.e. does not attempt to run any calibrations first. Using
     #' the calibrated parameters, first calculates the Black-76-equivalent volatility, then calculates
     #' the Delta risk of the option given the input parameters using the analytical forms for Black-76
-    #' Delta and Vega.
+    #' Delta and Vega. With VolType = 'Normal' the normal (Bachelier) equivalent volatility is used, and the
+    #' Bachelier Gamma is corrected for the smile's first and second slopes in the forward.
     #'
     #' @param F0 Current forward price
     #' @param K Strike of the option
@@ -30,6 +34,8 @@ def SABRGamma(F0, K, tex, rfr, Alpha, Beta, Rho, Nu):
     #' @param Beta Shape parameter of SABR schema, EITHER evaluated using historical data OR preset by user
     #' @param Rho Correlation between SABR forward and diffusion processes
     #' @param Nu Vol-of-vol for SABR diffusion process
+    #' @param Shift Shift added to the forward and strike(s), for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' for the Black-76-equivalent risk, or 'Normal' for the Bachelier-equivalent risk
     #'
     #' @return Corrected second-order risk against changes in the underlying forward rate
     #' @export
@@ -38,6 +44,26 @@ def SABRGamma(F0, K, tex, rfr, Alpha, Beta, Rho, Nu):
     #' Rho = -0.0356, Nu = 1.0504)
     """
 
+    if VolType not in ['Lognormal', 'Normal']:
+        raise ValueError("Vol type MUST be 'Lognormal' or 'Normal'!")
+
+    #Shifted model - work with the shifted forward and strike throughout:
+    F0, K = F0 + Shift, K + Shift
+
+    if VolType == 'Normal':
+        #Normal vol and its first and second CENTRAL DIFFERENCES over a 1bp bump of the forward:
+        SABRNormVol = SABRtoBachelier(F0, K, tex, Alpha, Beta, Rho, Nu)
+        SABRBumpForwardUp = SABRtoBachelier(F0 + 0.00005, K, tex, Alpha, Beta, Rho, Nu)
+        SABRBumpForwardDn = SABRtoBachelier(F0 - 0.00005, K, tex, Alpha, Beta, Rho, Nu)
+        NormalFirstOrderChange = (SABRBumpForwardUp - SABRBumpForwardDn) / 0.0001
+        NormalSecondOrderChange = (SABRBumpForwardUp - 2 * SABRNormVol + SABRBumpForwardDn) / (0.00005) ** 2
+
+        #Chain rule on the Bachelier price, with its cross (dVega/dF0) and second vol (dVega/dVol) derivatives:
+        d = (F0 - K) / (SABRNormVol * np.sqrt(tex))
+        BachelierVegaPart = BachelierVega(F0, K, SABRNormVol, tex, rfr)
+        return (BachelierGamma(F0, K, SABRNormVol, tex, rfr) - 2 * BachelierVegaPart * d / (SABRNormVol * np.sqrt(tex)) * NormalFirstOrderChange
+                + BachelierVegaPart * d ** 2 / SABRNormVol * NormalFirstOrderChange ** 2 + BachelierVegaPart * NormalSecondOrderChange)
+
     #Calculate Black-76-equivalent volatility for provided inputs:
     SABRImpVol = SABRtoBlack76(F0, K, tex, Alpha, Beta, Rho, Nu)
 
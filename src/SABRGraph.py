@@ -0,0 +1,236 @@
+"""
+#' Dependency-Tracking Lazy Evaluation Graph from Market Quotes to SABR Prices and Greeks
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+
+from SABRFullCalib import SABRFullCalib
+from SABRATMCalib import SABRATMCalib
+from ATMVolToSABRAlpha import ATMVolToSABRAlpha
+from SABRtoBlack76 import SABRtoBlack76
+from Black76OptionPrice import Black76OptionPrice
+from SABRDelta import SABRDelta
+from SABRGamma import SABRGamma
+from SABRVega import SABRVega
+from SABRVanna import SABRVanna
+from SABRVolga import SABRVolga
+
+
+def SABRGraphCreate():
+    """
+    #' Creates an empty evaluation graph. Every node holds a value, a validity flag, the names of the
+    #' nodes it is computed from, and the names of the nodes computed from it.
+    #'
+    #' @return Empty graph, to be filled with SABRGRAPHINPUT and SABRGRAPHNODE
+    #' @export
+    #'
+    #' @examples graph = SABRGraphCreate()
+    """
+
+    return {'Nodes': {}, 'Recomputed': []}
+
+
+def _Invalidate(Graph, Name):
+    """
+    #' Marks every node downstream of Name as stale, stopping at nodes that are already stale.
+    """
+
+    stack = list(Graph['Nodes'][Name]['Dependents'])
+    while stack:
+        node = Graph['Nodes'][stack.pop()]
+        if node['Valid']:
+            node['Valid'] = False
+            stack.extend(node['Dependents'])
+
+
+def SABRGraphInput(Graph, Name, Value):
+    """
+    #' Creates or updates an input (leaf) node, e.g. one Point's market quotes or one curve node rate.
+    #' Updating an input only marks the nodes that depend on it, directly or indirectly, as stale; nothing
+    #' is recomputed until a value is requested with SABRGRAPHGET.
+    #'
+    #' @param Graph Graph from SABRGRAPHCREATE
+    #' @param Name Name of the input node
+    #' @param Value New value of the input
+    #'
+    #' @return None
+    #' @export
+    #'
+    #' @examples SABRGraphInput(graph, 'F0/3M10Y', 0.0266)
+    """
+
+    if Name in Graph['Nodes']:
+        node = Graph['Nodes'][Name]
+        if node['Func'] is not None:
+            raise ValueError('Node ' + Name + ' is computed and cannot be set as an input!')
+        node['Value'] = Value
+        _Invalidate(Graph, Name)
+    else:
+        Graph['Nodes'][Name] = {'Func': None, 'Inputs': [], 'Value': Value, 'Valid': True, 'Dependents': set()}
+
+
+def SABRGraphNode(Graph, Name, Func, Inputs):
+    """
+    #' Adds a computed node, whose value is Func applied to the values of its input nodes, in order.
+    #' The node is evaluated lazily, on the first SABRGRAPHGET that needs it.
+    #'
+    #' @param Graph Graph from SABRGRAPHCREATE
+    #' @param Name Name of the computed node
+    #' @param Func Function of the input node values
+    #' @param Inputs LIST of names of the nodes Func is computed from, which must already exist
+    #'
+    #' @return None
+    #' @export
+    #'
+    #' @examples SABRGraphNode(graph, 'Vol/0', lambda F0, p: SABRtoBlack76(F0, 0.025, 0.25, *p), ['F0/3M10Y', 'Params/3M10Y'])
+    """
+
+    if Name in Graph['Nodes']:
+        raise ValueError('Node ' + Name + ' already exists!')
+
+    for inp in Inputs:
+        if inp not in Graph['Nodes']:
+            raise ValueError('Input node ' + inp + ' does not exist!')
+        Graph['Nodes'][inp]['Dependents'].add(Name)
+
+    Graph['Nodes'][Name] = {'Func': Func, 'Inputs': list(Inputs), 'Value': None, 'Valid': False, 'Dependents': set()}
+
+
+def SABRGraphGet(Graph, Name):
+    """
+    #' Returns the value of a node (or of a LIST of nodes), first recomputing it and any stale nodes upstream
+    #' of it. Nodes that are still valid are reused as they are. The names of the nodes recomputed by this
+    #' call are left in Graph['Recomputed'].
+    #'
+    #' @param Graph Graph from SABRGRAPHCREATE
+    #' @param Name Name of the node, or LIST of names
+    #'
+    #' @return Value of the node, or LIST of values
+    #' @export
+    #'
+    #' @examples SABRGraphGet(graph, 'Price/0')
+    """
+
+    Graph['Recomputed'] = []
+
+    #Depth-first walk: a node is computed once all of its inputs are valid:
+    Names = [Name] if isinstance(Name, str) else list(Name)
+    stack = Names[::-1]
+    while stack:
+        node = Graph['Nodes'][stack[-1]]
+        if node['Valid']:
+            stack.pop()
+            continue
+        stale = [inp for inp in node['Inputs'] if not Graph['Nodes'][inp]['Valid']]
+        if stale:
+            stack.extend(stale)
+            continue
+        node['Value'] = node['Func'](*[Graph['Nodes'][inp]['Value'] for inp in node['Inputs']])
+        node['Valid'] = True
+        Graph['Recomputed'].append(stack.pop())
+
+    Values = [Graph['Nodes'][n]['Value'] for n in Names]
+
+    return Values[0] if isinstance(Name, str) else Values
+
+
+def SABRGraphBuild(Points, F0, Strikes, MarketVols, tex, Beta, guess_Alpha, guess_Rho, guess_Nu,
+                   OptionPoints, OptionStrikes, OptionCallOrPut, CurveTerms, CurveRates, Method = 'FULL', ATMVol = None):
+    """
+    #' Wires the SABR pricing chain into an evaluation graph:
+    #'   'Quotes/<Point>', 'F0/<Point>' and 'Curve/<i>' inputs
+    #'   -> 'Params/<Point>' (Alpha, Rho, Nu) from SABRFULLCALIB or SABRATMCALIB
+    #'   -> 'Rate/<o>' and 'Vol/<o>' for every option o, from its Point and its two neighbouring curve nodes
+    #'   -> 'Price/<o>' (Black-76) and 'Greeks/<o>' (SABRDELTA, SABRGAMMA, SABRVEGA, SABRVANNA, SABRVOLGA).
+    #' After e.g. SABRGraphInput(graph, 'Quotes/3M10Y', (Strikes, MarketVols)) only that Point's
+    #' calibration and the options referencing it are recomputed on the next SABRGRAPHGET.
+    #' The option rates are linearly interpolated between curve nodes (flat beyond the end nodes).
+    #'
+    #' @param Points VECTOR of names of the forward rates, e.g. '3M10Y'
+    #' @param F0 VECTOR of current forward rates
+    #' @param Strikes LIST of VECTORS of quoted strikes, one per Point
+    #' @param MarketVols LIST of VECTORS of LOGNORMAL (i.e. Black-76) market-quoted implied volatilities
+    #' @param tex VECTOR of times to expiry, measured in years
+    #' @param Beta VECTOR (or single value) of SABR Beta
+    #' @param guess_Alpha VECTOR (or single value) of initial guesses of Alpha, ignored by the ATM method
+    #' @param guess_Rho VECTOR (or single value) of initial guesses of Rho
+    #' @param guess_Nu VECTOR (or single value) of initial guesses of Nu
+    #' @param OptionPoints VECTOR of the Point of each option
+    #' @param OptionStrikes VECTOR of option strikes
+    #' @param OptionCallOrPut VECTOR (or single value) of 'c' or 'p' flags
+    #' @param CurveTerms VECTOR of increasing curve node terms, in years
+    #' @param CurveRates VECTOR of zero rates at the nodes, in decimals (curves.csv values / 100)
+    #' @param Method Either 'FULL' or 'ATM'
+    #' @param ATMVol VECTOR of lognormal ATM market vols, required by the ATM method; the 'Quotes/<Point>'
+    #' inputs are then (Strikes, MarketVols, ATMVol)
+    #'
+    #' @return Graph from SABRGRAPHCREATE holding the whole chain
+    #' @export
+    #'
+    #' @examples
+    #' graph = SABRGraphBuild(['3M10Y'], [0.0266], [calibrun$Strike], [calibrun$BlackVol], [0.25], 0.5, 0.05, 0.1, 0.7,
+    #' ['3M10Y', '3M10Y'], [0.025, 0.030], ['c', 'p'], curve$Term, curve$Value / 100)
+    #' SABRGraphGet(graph, 'Greeks/1')
+    """
+
+    if Method not in ['FULL', 'ATM']:
+        raise ValueError("Calibration method MUST be 'FULL' or 'ATM'!")
+
+    if Method == 'ATM' and ATMVol is None:
+        raise ValueError('ATM calibration method needs the ATM market vols!')
+
+    N = len(Points)
+    F0, tex, Beta, guess_Alpha, guess_Rho, guess_Nu = [np.broadcast_to(np.asarray(x, dtype=float), (N,)) for x in (F0, tex, Beta, guess_Alpha, guess_Rho, guess_Nu)]
+    Index = {p: i for i, p in enumerate(Points)}
+
+    CurveTerms = np.asarray(CurveTerms, dtype=float)
+    OptionCallOrPut = np.broadcast_to(np.asarray(OptionCallOrPut), (len(OptionStrikes),))
+
+    Graph = SABRGraphCreate()
+
+    #Inputs:
+    for j, rate in enumerate(CurveRates):
+        SABRGraphInput(Graph, 'Curve/' + str(j), float(rate))
+
+    for i, p in enumerate(Points):
+        SABRGraphInput(Graph, 'F0/' + p, float(F0[i]))
+        if Method == 'FULL':
+            SABRGraphInput(Graph, 'Quotes/' + p, (Strikes[i], MarketVols[i]))
+        else:
+            SABRGraphInput(Graph, 'Quotes/' + p, (Strikes[i], MarketVols[i], float(ATMVol[i])))
+
+    #Calibrated parameters per Point:
+    def Calib(i):
+        if Method == 'FULL':
+            def Func(F, Quotes):
+                return tuple(SABRFullCalib(F, Quotes[0], Quotes[1], tex[i], Beta[i], guess_Alpha[i], guess_Rho[i], guess_Nu[i]).x)
+        else:
+            def Func(F, Quotes):
+                Rho, Nu = SABRATMCalib(F, Quotes[2], Quotes[0], Quotes[1], tex[i], Beta[i], guess_Rho[i], guess_Nu[i]).x
+                return (ATMVolToSABRAlpha(F, Quotes[2], tex[i], Beta[i], Rho, Nu), Rho, Nu)
+        return Func
+
+    for i, p in enumerate(Points):
+        SABRGraphNode(Graph, 'Params/' + p, Calib(i), ['F0/' + p, 'Quotes/' + p])
+
+    #Options - each one depends on its Point and on the two curve nodes bracketing its expiry:
+    for o, (p, K, cp) in enumerate(zip(OptionPoints, OptionStrikes, OptionCallOrPut)):
+        i = Index[p]
+        t, b, K, cp = tex[i], Beta[i], float(K), str(cp)
+        j = int(np.clip(np.searchsorted(CurveTerms, t, side='right') - 1, 0, len(CurveTerms) - 2))
+        w = float(np.clip((t - CurveTerms[j]) / (CurveTerms[j + 1] - CurveTerms[j]), 0, 1))
+        o = str(o)
+
+        SABRGraphNode(Graph, 'Rate/' + o, lambda r1, r2, w=w: (1 - w) * r1 + w * r2, ['Curve/' + str(j), 'Curve/' + str(j + 1)])
+        SABRGraphNode(Graph, 'Vol/' + o, lambda F, P, K=K, t=t, b=b: SABRtoBlack76(F, K, t, P[0], b, P[1], P[2]), ['F0/' + p, 'Params/' + p])
+        SABRGraphNode(Graph, 'Price/' + o, lambda F, v, r, K=K, t=t, cp=cp: Black76OptionPrice(F, K, v, t, r, cp), ['F0/' + p, 'Vol/' + o, 'Rate/' + o])
+        SABRGraphNode(Graph, 'Greeks/' + o, lambda F, P, r, K=K, t=t, b=b, cp=cp: {'Delta': SABRDelta(F, K, t, r, cp, P[0], b, P[1], P[2]),
+                                                                              'Gamma': SABRGamma(F, K, t, r, P[0], b, P[1], P[2]),
+                                                                              'Vega': SABRVega(F, K, t, r, P[0], b, P[1], P[2]),
+                                                                              'Vanna': SABRVanna(F, K, t, r, P[0], b, P[1], P[2]),
+                                                                              'Volga': SABRVolga(F, K, t, r, P[0], b, P[1], P[2])},
+                      ['F0/' + p, 'Params/' + p, 'Rate/' + o])
+
+    return Graph
@@ -0,0 +1,155 @@
+"""
+#' Vectorised Historical Delta-Hedging Backtest of SABR and Black-76 Deltas
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+import scipy.stats as ss
+
+from ATMVolToSABRAlpha import ATMVolToSABRAlpha
+from SABRtoBlack76 import SABRtoBlack76
+
+#Hedge models that can be backtested:
+HedgeModels = ['SABR', 'Black76']
+
+def SABRHedgeBacktest(Dates, Forwards, ATMVols, PointTex, Beta, Rho, Nu, Strikes, tex0, CallOrPut = 'c', StartIndex = 0,
+                      Notionals = 1, rfr = 0.0, Models = ('SABR', 'Black76'), RecalibEvery = 1, ChunkSize = 256):
+    """
+    #' Replays the delta-hedged P&L of a book of options over a history of forwards and ATM vols, as in
+    #' histratevoldata (Forward and BlackVol divided by 100), for every date x option x hedge model at once.
+    #' On every date the options are marked at their SABR smile vol, with Alpha re-solved from that date's
+    #' ATM vol (held for RecalibEvery dates, i.e. rolling recalibration) and Rho / Nu held fixed. Each
+    #' option is hedged in the forward with either the SABR Delta of SABRDELTA (Black-76 Delta plus the
+    #' Vega times the smile's backbone slope dVol/dF0 over a 1bp central bump) or the plain BLACK76DELTA at
+    #' the same smile vol, and the hedged P&L from date t to t + 1 is dV - Delta(t) * dF. An option is
+    #' settled at its intrinsic value on the first date on or after its expiry. On a date whose ATM vol has
+    #' no positive Alpha the option is not marked, and its last marked value and hedge are carried over the
+    #' gap, so the combined step is booked on the next marked (or settlement) date. Dates are processed in
+    #' chunks of ChunkSize, carrying each option's last value and hedge across chunk boundaries, so the
+    #' working memory does not grow with the length of the history.
+    #'
+    #' @param Dates VECTOR of T increasing dates (datetime64 or strings), e.g. histratevoldata$Date
+    #' @param Forwards VECTOR of T forward rates on each date
+    #' @param ATMVols VECTOR of T lognormal ATM vols on each date
+    #' @param PointTex Constant time to expiry, in years, of the Point the ATM vols are quoted for (e.g. 0.25 for 3M10Y)
+    #' @param Beta Shape parameter of SABR schema, EITHER evaluated using historical data OR preset by user
+    #' @param Rho Calibrated SABR Rho, held fixed through the backtest
+    #' @param Nu Calibrated SABR Nu, held fixed through the backtest
+    #' @param Strikes VECTOR of n option strikes
+    #' @param tex0 VECTOR (or single value) of option times to expiry, in years, on their start dates
+    #' @param CallOrPut VECTOR (or single value) of 'c' or 'p' flags
+    #' @param StartIndex VECTOR (or single value) of the indices into Dates on which the options are bought
+    #' @param Notionals VECTOR (or single value) of option notionals
+    #' @param rfr Riskless rate used for discounting
+    #' @param Models LIST of hedge models, any of HedgeModels
+    #' @param RecalibEvery Number of dates between Alpha recalibrations
+    #' @param ChunkSize Number of dates evaluated per vectorised block
+    #'
+    #' @return A list object containing the Models, the (T,) recalibrated Alpha (NaN on dates without a
+    #' positive root, on which no option is marked or hedged), the (T, n) option values (NaN when unmarked),
+    #' the (M, T, n) hedge ratios and hedged P&L per date, and the (M, n) total hedged P&L per option
+    #' @export
+    #'
+    #' @examples
+    #' hist = histratevoldata[histratevoldata$Rate == '3M10Y',]
+    #' SABRHedgeBacktest(Dates = hist$Date, Forwards = hist$Forward / 100, ATMVols = hist$BlackVol / 100, PointTex = 0.25,
+    #' Beta = 0.5, Rho = -0.0341, Nu = 1.0451, Strikes = np.array([0.015, 0.020, 0.025]), tex0 = 0.5)
+    """
+
+    for m in Models:
+        if m not in HedgeModels:
+            raise ValueError('Hedge model MUST be one of ' + ', '.join(HedgeModels) + '!')
+
+    Dates = np.asarray(Dates, dtype='datetime64[D]')
+    Forwards = np.asarray(Forwards, dtype=float)
+    ATMVols = np.asarray(ATMVols, dtype=float)
+    Strikes = np.atleast_1d(np.asarray(Strikes, dtype=float))
+    T, n, M = len(Dates), len(Strikes), len(Models)
+
+    tex0, StartIndex, Notionals = [np.broadcast_to(np.asarray(x), (n,)) for x in (tex0, StartIndex, Notionals)]
+    CallOrPut = np.broadcast_to(np.asarray(CallOrPut), (n,))
+
+    if not np.all(np.isin(CallOrPut, ['c', 'p'])):
+        raise ValueError('CallOrPut flag can only take values c or p!')
+
+    a = np.where(CallOrPut == 'c', 1, -1)
+    Years = (Dates - Dates[0]).astype(float) / 365
+
+    #Rolling recalibration of Alpha from the ATM vol, all dates in one vectorised solve:
+    Recalib = np.arange(T) // RecalibEvery * RecalibEvery
+    Alpha = ATMVolToSABRAlpha(Forwards[Recalib], ATMVols[Recalib], PointTex, Beta, Rho, Nu)
+
+    #First date on or after each option's expiry, on which it is settled at intrinsic value:
+    ExpiryIndex = np.searchsorted(Years, Years[StartIndex] + tex0 - 1e-10)
+
+    Values = np.full((T, n), np.nan)
+    Deltas = np.zeros((M, T, n))
+    PnL = np.zeros((M, T, n))
+
+    #State carried between chunks - value, hedge and forward on each option's last marked date:
+    PrevValue = np.full(n, np.nan)
+    PrevDelta = np.full((M, n), np.nan)
+    PrevF = np.full(n, np.nan)
+
+    for c0 in range(0, T, ChunkSize):
+        idx = np.arange(c0, min(c0 + ChunkSize, T))
+        F = Forwards[idx, None]
+        Al = Alpha[idx, None]
+        tex = tex0 - (Years[idx, None] - Years[StartIndex])
+        #An option is not hedged on dates whose ATM vol has no positive Alpha (NaN from ATMVOLTOSABRALPHA):
+        Alive = (idx[:, None] >= StartIndex) & (idx[:, None] < ExpiryIndex) & np.isfinite(Al)
+        Settled = idx[:, None] == ExpiryIndex
+
+        with np.errstate(all='ignore'):
+            t = np.where(Alive, tex, 1)
+            Vol = SABRtoBlack76(F, Strikes, t, Al, Beta, Rho, Nu)
+            sqt = np.sqrt(t)
+            d1 = (np.log(F / Strikes) + 0.5 * Vol ** 2 * t) / (Vol * sqt)
+            d2 = d1 - Vol * sqt
+            DF = np.exp(-rfr * t)
+            Price = DF * a * (F * ss.norm.cdf(a * d1) - Strikes * ss.norm.cdf(a * d2))
+            BlackDelta = DF * a * ss.norm.cdf(a * d1)
+
+            ChunkDeltas = []
+            for m in Models:
+                if m == 'Black76':
+                    ChunkDeltas.append(BlackDelta)
+                else:
+                    Vega = F * DF * ss.norm.pdf(d1) * sqt
+                    Backbone = (SABRtoBlack76(F + 0.00005, Strikes, t, Al, Beta, Rho, Nu) - SABRtoBlack76(F - 0.00005, Strikes, t, Al, Beta, Rho, Nu)) / 0.0001
+                    ChunkDeltas.append(BlackDelta + Vega * Backbone)
+
+            Intrinsic = np.maximum(a * (F - Strikes), 0)
+            V = Notionals * np.where(Alive, Price, np.where(Settled, Intrinsic, np.nan))
+            D = Notionals * np.where(Alive, np.stack(ChunkDeltas), np.nan)
+
+            #Carry each option's last marked row (or the state carried into the chunk) forward over unmarked dates:
+            VAll = np.vstack([PrevValue, V])
+            DAll = np.concatenate([PrevDelta[:, None], D], axis=1)
+            FAll = np.vstack([PrevF, np.broadcast_to(F, V.shape)])
+            Rows = np.arange(len(idx) + 1)[:, None]
+            Last = np.maximum.accumulate(np.where(np.isfinite(VAll) | (Rows == 0), Rows, 0), axis=0)
+            Cols = np.arange(n)
+            VCarry, DCarry, FCarry = VAll[Last, Cols], DAll[:, Last, Cols], FAll[Last, Cols]
+
+            #Step P&L from the last marked date, so a gap's move is booked on the date after it:
+            VPrev, DPrev, FPrev = VCarry[:-1], DCarry[:, :-1], FCarry[:-1]
+            Step = (V - VPrev)[None] - DPrev * (F - FPrev)
+
+        #Only hedged steps count, i.e. steps out of a date on which the option was alive:
+        Values[idx] = V
+        Deltas[:, idx] = D
+        PnL[:, idx] = np.where(np.isfinite(DPrev) & np.isfinite(V), Step, 0)
+
+        PrevValue, PrevDelta, PrevF = VCarry[-1], DCarry[:, -1], FCarry[-1]
+
+    ResultsList = {'BT_Dates': Dates,
+                   'BT_Models': list(Models),
+                   'BT_Alpha': Alpha,
+                   'BT_Values': Values,
+                   'BT_Deltas': Deltas,
+                   'BT_PnL': PnL,
+                   'BT_TotalPnL': PnL.sum(axis=1)}
+
+    return ResultsList
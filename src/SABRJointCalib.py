@@ -0,0 +1,173 @@
+"""
+#' Joint Calibration of a Surface of SABR Smiles with Cross-Expiry Smoothness
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+import scipy.optimize as spopt
+import scipy.sparse as sps
+
+from ATMVolToSABRAlpha import ATMVolToSABRAlpha
+from SABRtoBlack76 import SABRtoBlack76
+from SABRtoBachelier import SABRtoBachelier
+from SABRVolJacobian import SABRVolJacobian
+
+def SABRJointCalib(F0, Strikes, MarketVols, tex, Beta, guess_Alpha, guess_Rho, guess_Nu, Group = None, Smoothness = 1e-3, ATMVol = None, max_nfev = None,
+                   Shift = 0, VolType = 'Lognormal'):
+    """
+    #' Calibrates all N smiles of a surface in ONE least-squares problem, adding smoothness penalties that
+    #' tie the parameters of consecutive expiries together. Smiles sharing a Group label (e.g. the same
+    #' underlying tenor) are ordered by tex and every neighbouring pair adds the penalty residuals
+    #' sqrt(Smoothness) * (log Alpha, Rho, log Nu) differences. Each smile's vols depend only on its own
+    #' parameters, so the Jacobian is block-sparse: it is assembled from the per-smile SABRVOLJACOBIAN blocks
+    #' plus the two-entry penalty rows, and the problem is solved by spopt.least_squares with a sparse
+    #' trust-region (LSMR) solver, whose cost grows roughly linearly with the number of smiles.
+    #' With Smoothness = 0 the result is the same as calibrating every smile on its own. With the ATM method,
+    #' a smile whose ATM vol has no positive Alpha is priced at zero vol, so its residuals stay finite, and is
+    #' reported as not fitted if it still has no Alpha at the solution.
+    #'
+    #' @param F0 VECTOR of N current forward rates
+    #' @param Strikes (N, m) MATRIX of strike prices, ragged smiles padded with NaN
+    #' @param MarketVols (N, m) MATRIX of LOGNORMAL (i.e. Black-76) market-quoted implied volatilities, or normal vols if VolType = 'Normal', padded with NaN
+    #' @param tex VECTOR of N times to expiry, measured in years
+    #' @param Beta VECTOR (or single value) of SABR Beta, EITHER evaluated using historical data OR preset by user
+    #' @param guess_Alpha VECTOR (or single value) of initial guesses of Alpha, MUST be non-zero, ignored by the ATM method
+    #' @param guess_Rho VECTOR (or single value) of initial guesses of Rho, MUST be bounded between -1 and 1
+    #' @param guess_Nu VECTOR (or single value) of initial guesses of Nu, MUST be non-zero
+    #' @param Group VECTOR of N labels, e.g. the underlying tenor of each smile, only smiles with equal labels are
+    #' smoothed against each other. MUST be given whenever Smoothness is non-zero
+    #' @param Smoothness Penalty weight, single value or one per free parameter (Alpha/Rho/Nu, or Rho/Nu for the ATM method)
+    #' @param ATMVol Optional VECTOR of N ATM market vols (of the same VolType as MarketVols), switches to the ATM calibration method
+    #' @param max_nfev Maximum number of residual evaluations, as for spopt.least_squares
+    #' @param Shift VECTOR (or single value) of per-smile shifts added to the forward and strikes, for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' if the market vols are Black-76 vols, or 'Normal' if they are normal (Bachelier) vols, fitted with SABRTOBACHELIER
+    #'
+    #' @return A list object containing the N calibrated Alpha/Beta/Rho/Nu, each smile's sum of square vol errors,
+    #' whether each smile was fitted (NaN Alpha and SSE otherwise), the total smoothness penalty, and the solver
+    #' status, message and number of evaluations
+    #' @export
+    #'
+    #' @examples
+    #' SABRJointCalib(F0 = np.array([0.0266, 0.0310]), Strikes = np.array([K3M10Y, K5Y10Y]), MarketVols = np.array([V3M10Y, V5Y10Y]),
+    #' tex = np.array([0.25, 5]), Beta = 0.5, guess_Alpha = 0.05, guess_Rho = 0.1, guess_Nu = 0.7, Group = np.array(['10Y', '10Y']))
+    """
+
+    Strikes = np.atleast_2d(np.asarray(Strikes, dtype=float))
+    MarketVols = np.atleast_2d(np.asarray(MarketVols, dtype=float))
+    N, m = Strikes.shape
+
+    # Some basic error-checking:
+    if VolType not in ['Lognormal', 'Normal']:
+        raise ValueError("Vol type MUST be 'Lognormal' or 'Normal'!")
+
+    if Strikes.shape != MarketVols.shape:
+        raise ValueError('Strikes matrix must be same shape as market data!')
+
+    if ATMVol is None and np.any(np.asarray(guess_Alpha) <= 0):
+        raise ValueError('Diffusion parameter must be non-zero!')
+
+    if np.any(np.abs(guess_Rho) > 1):
+        raise ValueError('Correlation parameter Rho must be between -1 and 1!')
+
+    if np.any(np.asarray(guess_Nu) <= 0):
+        raise ValueError('Vol-of-vol parameter must be non-zero!')
+
+    if Group is None and np.any(np.asarray(Smoothness) != 0):
+        raise ValueError('Group labels (e.g. the underlying tenor of each smile) MUST be given to smooth across expiries!')
+
+    F0, tex, Beta, Shift = [np.broadcast_to(np.asarray(x, dtype=float), (N,)) for x in (F0, tex, Beta, Shift)]
+    Kernel = SABRtoBlack76 if VolType == 'Lognormal' else SABRtoBachelier
+    Valid = np.isfinite(Strikes) & np.isfinite(MarketVols)
+    KFill = np.where(Valid, Strikes, F0[:, None])
+
+    #Free parameters per smile, and which of them are smoothed in logs:
+    if ATMVol is None:
+        nparams = 3
+        x0 = np.column_stack(np.broadcast_arrays(guess_Alpha, guess_Rho, guess_Nu, np.zeros(N))[:3]).astype(float)
+        lower, upper = [1e-9, -0.9999, 1e-8], [np.inf, 0.9999, np.inf]
+        LogParam = np.array([True, False, True])
+    else:
+        nparams = 2
+        ATMVol = np.broadcast_to(np.asarray(ATMVol, dtype=float), (N,))
+        x0 = np.column_stack(np.broadcast_arrays(guess_Rho, guess_Nu, np.zeros(N))[:2]).astype(float)
+        lower, upper = [-0.9999, 1e-8], [0.9999, np.inf]
+        LogParam = np.array([False, True])
+
+    Weight = np.sqrt(np.broadcast_to(np.asarray(Smoothness, dtype=float), (nparams,)))
+
+    #Neighbouring expiries within each group (without smoothing, every smile is a group of its own):
+    Group = np.arange(N) if Group is None else np.broadcast_to(np.asarray(Group), (N,))
+    order = np.lexsort((tex, Group))
+    same = Group[order][1:] == Group[order][:-1]
+    Left, Right = order[:-1][same], order[1:][same]
+    nPairs = len(Left)
+
+    #Sparsity pattern, fixed for the whole run - vol rows first, then penalty rows:
+    VolRows = np.broadcast_to((np.arange(N)[:, None] * m + np.arange(m))[:, :, None], (N, m, nparams))
+    VolCols = np.broadcast_to((np.arange(N)[:, None] * nparams + np.arange(nparams))[:, None, :], (N, m, nparams))
+    PenRows = N * m + np.arange(nPairs)[:, None] * nparams + np.arange(nparams)
+    PenCols = np.arange(nparams)
+    Rows = np.concatenate([VolRows[Valid].ravel(), PenRows.ravel(), PenRows.ravel()])
+    Cols = np.concatenate([VolCols[Valid].ravel(), (Right[:, None] * nparams + PenCols).ravel(), (Left[:, None] * nparams + PenCols).ravel()])
+
+    def Transform(x):
+        return np.where(LogParam, np.log(np.maximum(x, 1e-300)), x)
+
+    def Vols(x):
+        if ATMVol is None:
+            Alpha, Rho, Nu = x.T
+        else:
+            Rho, Nu = x.T
+            Alpha = ATMVolToSABRAlpha(F0, ATMVol, tex, Beta, Rho, Nu, Shift, VolType)
+        Calib = Kernel(F0[:, None], KFill, tex[:, None], Alpha[:, None], Beta[:, None], Rho[:, None], Nu[:, None], Shift[:, None])
+        #No positive ATM Alpha - price the smile at zero vol, so its residuals stay finite:
+        return np.where(np.isfinite(Alpha)[:, None], Calib, 0)
+
+    def Resid(xflat):
+        x = xflat.reshape(N, nparams)
+        with np.errstate(all='ignore'):
+            r = np.where(Valid, Vols(x) - MarketVols, 0)
+        T = Transform(x)
+        return np.concatenate([r.ravel(), (Weight * (T[Right] - T[Left])).ravel()])
+
+    def Jac(xflat):
+        x = xflat.reshape(N, nparams)
+        with np.errstate(all='ignore'):
+            if ATMVol is None:
+                Calib = SABRVolJacobian(F0[:, None], KFill, tex[:, None], x[:, 0, None], Beta[:, None], x[:, 1, None], x[:, 2, None],
+                                        Shift=Shift[:, None], VolType=VolType)
+            else:
+                Calib = SABRVolJacobian(F0[:, None], KFill, tex[:, None], None, Beta[:, None], x[:, 0, None], x[:, 1, None], ATMVol=ATMVol[:, None],
+                                        Shift=Shift[:, None], VolType=VolType)
+        dT = np.where(LogParam, 1 / np.where(LogParam, x, 1), 1)
+        VolJac = np.where(np.isfinite(Calib['SABR_Jacobian']), Calib['SABR_Jacobian'], 0)
+        Values = np.concatenate([VolJac[Valid].ravel(), (Weight * dT[Right]).ravel(), (-Weight * dT[Left]).ravel()])
+        return sps.csr_matrix((Values, (Rows, Cols)), shape=(N * m + nPairs * nparams, N * nparams))
+
+    CalibSet = spopt.least_squares(Resid, x0.ravel(), jac=Jac, bounds=(np.tile(lower, N), np.tile(upper, N)),
+                                   method='trf', tr_solver='lsmr', x_scale='jac', max_nfev=max_nfev)
+
+    x = CalibSet.x.reshape(N, nparams)
+    r = CalibSet.fun[:N * m].reshape(N, m)
+
+    if ATMVol is None:
+        Alpha, Rho, Nu = x.T
+    else:
+        Rho, Nu = x.T
+        with np.errstate(all='ignore'):
+            Alpha = ATMVolToSABRAlpha(F0, ATMVol, tex, Beta, Rho, Nu, Shift, VolType)
+    Fitted = np.isfinite(Alpha)
+
+    ResultsList = {'SABR_Alpha': Alpha,
+                   'SABR_Beta': Beta,
+                   'SABR_Rho': Rho,
+                   'SABR_Nu': Nu,
+                   'SABR_SSE': np.where(Fitted, (r ** 2).sum(axis=1), np.nan),
+                   'SABR_Fitted': Fitted,
+                   'SABR_Penalty': (CalibSet.fun[N * m:] ** 2).sum(),
+                   'SABR_Status': CalibSet.status,
+                   'SABR_Message': CalibSet.message,
+                   'SABR_nfev': CalibSet.nfev}
+
+    return ResultsList
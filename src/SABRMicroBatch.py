@@ -0,0 +1,194 @@
+"""
+#' Micro-Batching Dispatcher for Concurrent Scalar Pricing Calls
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+def _Dispatch(Dispatcher):
+    """
+    #' Worker loop: waits for a first request, collects further requests until the window has passed or
+    #' the batch is full, then evaluates every group of compatible requests in one vectorised call.
+    """
+
+    Queue, Func = Dispatcher['Queue'], Dispatcher['Func']
+
+    while True:
+        first = Queue.get()
+        if first is None:
+            return
+
+        batch = [first]
+        deadline = first[2] + Dispatcher['Window']
+        stop = False
+        while len(batch) < Dispatcher['MaxBatch']:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = Queue.get(timeout=remaining) if remaining > 0 else Queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+
+        #Claim every Future, dropping the requests their callers have already cancelled (e.g. by a timed-out
+        #asyncio.wait_for on asyncio.wrap_future) - a cancelled Future cannot take a result:
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+
+        #Group by the non-numeric arguments, e.g. the CallOrPut flag, and price each group with one call.
+        #Any failure is passed to the group's callers, so it can never kill the dispatcher thread:
+        Groups = {}
+        for args, fut, submitted in batch:
+            key = tuple((i, a) for i, a in enumerate(args) if isinstance(a, (str, bytes)))
+            Groups.setdefault(key, []).append((args, fut, submitted))
+
+        start = time.perf_counter()
+        for key, items in Groups.items():
+            try:
+                fixed = dict(key)
+                nargs = len(items[0][0])
+                stacked = [fixed[i] if i in fixed else np.array([args[i] for args, _, _ in items], dtype=float) for i in range(nargs)]
+                Result = np.broadcast_to(np.asarray(Func(*stacked)), (len(items),))
+                for j, (_, fut, _) in enumerate(items):
+                    fut.set_result(Result[j])
+            except Exception as e: # pylint:disable=broad-except
+                for _, fut, _ in items:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+        #Metrics:
+        with Dispatcher['Lock']:
+            m = Dispatcher['Metrics']
+            m['Batches'] += 1 if batch else 0
+            m['Requests'] += len(batch)
+            m['MaxBatchSize'] = max(m['MaxBatchSize'], len(batch))
+            waits = [start - submitted for _, _, submitted in batch]
+            m['TotalAddedLatency'] += sum(waits)
+            m['MaxAddedLatency'] = max([m['MaxAddedLatency']] + waits)
+
+        if stop:
+            return
+
+
+def SABRMicroBatchStart(Func, Window = 200e-6, MaxBatch = 1024):
+    """
+    #' Starts a micro-batching dispatcher in front of a vectorised pricing function such as SABRTOBLACK76,
+    #' SABRDELTA or BLACK76OPTIONPRICE. Scalar requests submitted concurrently (from threads, or from asyncio
+    #' tasks via asyncio.wrap_future) are collected for up to Window seconds after the first one, or until
+    #' MaxBatch requests are waiting. Requests with the same non-numeric arguments (e.g. CallOrPut) are then
+    #' stacked into arrays and priced with ONE call to Func, and each caller's Future receives its own result.
+    #'
+    #' @param Func Pricing function taking its numeric arguments as arrays and returning one value per element
+    #' @param Window Maximum time, in seconds, a request waits for others to join its batch
+    #' @param MaxBatch Maximum number of requests per batch
+    #'
+    #' @return Dispatcher handle, to be passed to SABRMICROBATCHSUBMIT and SABRMICROBATCHSTOP
+    #' @export
+    #'
+    #' @examples
+    #' disp = SABRMicroBatchStart(SABRtoBlack76, Window = 200e-6)
+    #' SABRMicroBatchSubmit(disp, 0.0266, 0.0250, 0.25, 0.0651, 0.5, -0.0356, 1.0504).result()
+    """
+
+    Dispatcher = {'Func': Func,
+                  'Window': Window,
+                  'MaxBatch': MaxBatch,
+                  'Queue': queue.Queue(),
+                  'Lock': threading.Lock(),
+                  'Stopped': False,
+                  'Metrics': {'Batches': 0, 'Requests': 0, 'MaxBatchSize': 0, 'TotalAddedLatency': 0.0, 'MaxAddedLatency': 0.0}}
+
+    Dispatcher['Thread'] = threading.Thread(target=_Dispatch, args=(Dispatcher,), daemon=True)
+    Dispatcher['Thread'].start()
+
+    return Dispatcher
+
+
+def SABRMicroBatchSubmit(Dispatcher, *args):
+    """
+    #' Submits ONE scalar pricing request, with the same positional arguments as the dispatcher's function.
+    #'
+    #' @param Dispatcher Dispatcher handle from SABRMICROBATCHSTART
+    #' @param args Scalar arguments of the pricing function
+    #'
+    #' @return concurrent.futures.Future holding the request's result
+    #' @export
+    #'
+    #' @examples SABRMicroBatchSubmit(disp, 0.0266, 0.0250, 0.4084, 0.25, 0.02, 'c')
+    """
+
+    fut = Future()
+
+    #Checked and queued under the lock, so no request can land behind the stop sentinel:
+    with Dispatcher['Lock']:
+        if Dispatcher['Stopped'] or not Dispatcher['Thread'].is_alive():
+            raise ValueError('Micro-batching dispatcher has been stopped!')
+        Dispatcher['Queue'].put((args, fut, time.perf_counter()))
+
+    return fut
+
+
+def SABRMicroBatchMetrics(Dispatcher):
+    """
+    #' Reports how the dispatcher has batched the requests so far.
+    #'
+    #' @param Dispatcher Dispatcher handle from SABRMICROBATCHSTART
+    #'
+    #' @return A list object containing the number of batches and requests, the mean and maximum batch size,
+    #' and the mean and maximum latency, in seconds, added by waiting for a batch to fill
+    #' @export
+    #'
+    #' @examples SABRMicroBatchMetrics(disp)
+    """
+
+    with Dispatcher['Lock']:
+        m = dict(Dispatcher['Metrics'])
+
+    ResultsList = {'Batches': m['Batches'],
+                   'Requests': m['Requests'],
+                   'MeanBatchSize': m['Requests'] / m['Batches'] if m['Batches'] else np.nan,
+                   'MaxBatchSize': m['MaxBatchSize'],
+                   'MeanAddedLatency': m['TotalAddedLatency'] / m['Requests'] if m['Requests'] else np.nan,
+                   'MaxAddedLatency': m['MaxAddedLatency']}
+
+    return ResultsList
+
+
+def SABRMicroBatchStop(Dispatcher):
+    """
+    #' Stops the dispatcher once every request already submitted has been priced. Requests it could not
+    #' price (e.g. if the dispatcher thread died) are drained from the queue and their Futures fail with
+    #' a ValueError, so no caller waits forever. Stopping twice is harmless.
+    #'
+    #' @param Dispatcher Dispatcher handle from SABRMICROBATCHSTART
+    #'
+    #' @return Final metrics, as from SABRMICROBATCHMETRICS
+    #' @export
+    #'
+    #' @examples SABRMicroBatchStop(disp)
+    """
+
+    with Dispatcher['Lock']:
+        if not Dispatcher['Stopped']:
+            Dispatcher['Stopped'] = True
+            Dispatcher['Queue'].put(None)
+    Dispatcher['Thread'].join()
+
+    #Fail whatever is left behind:
+    while True:
+        try:
+            item = Dispatcher['Queue'].get_nowait()
+        except queue.Empty:
+            break
+        if item is not None and item[1].set_running_or_notify_cancel():
+            item[1].set_exception(ValueError('Micro-batching dispatcher stopped before the request was priced!'))
+
+    return SABRMicroBatchMetrics(Dispatcher)
@@ -0,0 +1,137 @@
+"""
+#' Monte Carlo SABR Prices for Validating the Hagan Approximation
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import concurrent.futures
+
+import numpy as np
+
+from SABRtoBlack76 import SABRtoBlack76
+from Black76OptionPrice import Black76OptionPrice
+
+
+def SABRMonteCarloChunk(SeedSeq, NumPaths, NumSteps, F0, Strikes, tex, Alpha, Beta, Rho, Nu, CallOrPut, Antithetic):
+    """
+    #' Simulates one chunk of SABR paths and returns the payoff sums needed by SABRMONTECARLO. The
+    #' forward follows an Euler scheme absorbed at zero, Alpha is stepped exactly as a lognormal process,
+    #' and only the current time slice is kept in memory. With antithetic variates each pair of mirrored
+    #' paths contributes a single averaged sample.
+    #'
+    #' @param SeedSeq numpy SeedSequence for this chunk
+    #' @param NumPaths Number of samples in the chunk (pairs of paths if Antithetic)
+    #' @param NumSteps Number of time steps to expiry
+    #' @param F0 Current forward rate
+    #' @param Strikes VECTOR of strikes
+    #' @param tex Time to expiry of the options, measured in years
+    #' @param Alpha Diffusion parameter in the SABR scheme
+    #' @param Beta Shape parameter of SABR schema
+    #' @param Rho Correlation between SABR forward and diffusion processes
+    #' @param Nu Vol-of-vol for SABR diffusion process
+    #' @param CallOrPut Takes values of 'c' or 'p'
+    #' @param Antithetic Whether to use antithetic variates
+    #'
+    #' @return Tuple of the per-strike sums and sums of squares of the undiscounted payoffs, the sum of
+    #' terminal forwards, and the number of samples
+    #' @export
+    """
+
+    rng = np.random.default_rng(SeedSeq)
+    dt = tex / NumSteps
+    sign = np.array([1.0, -1.0]) if Antithetic else np.array([1.0])
+
+    F = np.full((len(sign), NumPaths), float(F0))
+    a = np.full((len(sign), NumPaths), float(Alpha))
+
+    for _ in range(NumSteps):
+        Z2 = rng.standard_normal(NumPaths)
+        Z1 = Rho * Z2 + np.sqrt(1 - Rho ** 2) * rng.standard_normal(NumPaths)
+        F = np.maximum(F + a * F ** Beta * np.sqrt(dt) * sign[:, None] * Z1, 0)
+        a = a * np.exp(Nu * np.sqrt(dt) * sign[:, None] * Z2 - 0.5 * Nu ** 2 * dt)
+
+    w = 1 if CallOrPut == 'c' else -1
+    Payoff = np.maximum(w * (F[:, :, None] - Strikes), 0).mean(axis=0)
+
+    return Payoff.sum(axis=0), (Payoff ** 2).sum(axis=0), F.mean(axis=0).sum(), NumPaths
+
+
+def SABRMonteCarlo(F0, Strikes, tex, rfr, Alpha, Beta, Rho, Nu, CallOrPut = 'c', NumPaths = 100000, NumSteps = None, ChunkSize = 10000, Antithetic = True, Seed = None, Workers = None):
+    """
+    #' Prices a whole strike ladder of European options by Monte Carlo simulation of the SABR dynamics
+    #' dF = Alpha F^Beta dW1, dAlpha = Nu Alpha dW2, d<W1, W2> = Rho dt, and compares the results with
+    #' Black-76 prices on the Hagan vols from SABRTOBLACK76. Paths are simulated in chunks of ChunkSize to
+    #' bound memory, every chunk has its own child seed spawned from Seed (so results are reproducible
+    #' whatever the number of Workers), and chunks can optionally be farmed out to a process pool.
+    #'
+    #' @param F0 Current forward rate
+    #' @param Strikes VECTOR of strikes
+    #' @param tex Time to expiry of the options, measured in years
+    #' @param rfr Riskless rate, best taken as either the 10y or 30y government zero rate
+    #' @param Alpha Calibrated SABR Alpha
+    #' @param Beta Shape parameter of SABR schema, EITHER evaluated using historical data OR preset by user
+    #' @param Rho Correlation between SABR forward and diffusion processes
+    #' @param Nu Vol-of-vol for SABR diffusion process
+    #' @param CallOrPut Takes values of 'c' or 'p', and nothing else - determines whether you are pricing calls or puts
+    #' @param NumPaths Total number of Monte Carlo samples (antithetic pairs count as one sample)
+    #' @param NumSteps Number of time steps to expiry, defaults to 100 per year (at least 10)
+    #' @param ChunkSize Maximum number of samples simulated at once
+    #' @param Antithetic Whether to use antithetic variates
+    #' @param Seed Seed for the random number generator, for reproducible runs
+    #' @param Workers Number of worker processes, defaults to running all chunks in this process
+    #'
+    #' @return A list object containing the Monte Carlo prices and standard errors, the Hagan vols and
+    #' their Black-76 prices, the difference between the two in price terms and in standard errors, and
+    #' the Monte Carlo mean of the terminal forward as a martingale check
+    #' @export
+    #'
+    #' @examples
+    #' ### 10Y expiry smile from test_pysabr.py
+    #' SABRMonteCarlo(F0 = 0.025271, Strikes = strikes, tex = 10, rfr = 0.02, Alpha = 0.0254, Beta = 0.5,
+    #' Rho = -0.2, Nu = 0.3, Seed = 42)
+    """
+
+    if CallOrPut not in ['c', 'p']:
+        raise ValueError('CallOrPut flag can only take values c or p!')
+
+    Strikes = np.atleast_1d(np.asarray(Strikes, dtype=float))
+
+    if NumSteps is None:
+        NumSteps = max(int(np.ceil(tex * 100)), 10)
+
+    #Split the samples into chunks, each with its own reproducible child seed:
+    nchunks = int(np.ceil(NumPaths / ChunkSize))
+    sizes = [min(ChunkSize, NumPaths - i * ChunkSize) for i in range(nchunks)]
+    seeds = np.random.SeedSequence(Seed).spawn(nchunks)
+    args = [(seeds[i], sizes[i], NumSteps, F0, Strikes, tex, Alpha, Beta, Rho, Nu, CallOrPut, Antithetic) for i in range(nchunks)]
+
+    if Workers is None or Workers <= 1:
+        chunks = [SABRMonteCarloChunk(*a) for a in args]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=Workers) as pool:
+            chunks = list(pool.map(SABRMonteCarloChunk, *zip(*args)))
+
+    #Combine the chunks:
+    n = sum(c[3] for c in chunks)
+    s1 = sum(c[0] for c in chunks)
+    s2 = sum(c[1] for c in chunks)
+    Mean = s1 / n
+    StdErr = np.sqrt(np.maximum(s2 / n - Mean ** 2, 0) / (n - 1))
+
+    DF = np.exp(-rfr * tex)
+    MCPrices = DF * Mean
+    MCStdErr = DF * StdErr
+
+    #Hagan approximation for the same ladder:
+    HaganVols = SABRtoBlack76(F0, Strikes, tex, Alpha, Beta, Rho, Nu)
+    HaganPrices = Black76OptionPrice(F0, Strikes, HaganVols, tex, rfr, CallOrPut)
+
+    ResultsList = {'MC_Prices': MCPrices,
+                   'MC_StdErr': MCStdErr,
+                   'MC_Forward': sum(c[2] for c in chunks) / n,
+                   'Hagan_Vols': HaganVols,
+                   'Hagan_Prices': HaganPrices,
+                   'Difference': MCPrices - HaganPrices,
+                   'Difference_StdErrs': (MCPrices - HaganPrices) / np.where(MCStdErr > 0, MCStdErr, np.nan)}
+
+    return ResultsList
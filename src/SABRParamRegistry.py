@@ -0,0 +1,244 @@
+"""
+#' Shared-Memory Registry of Calibrated SABR Parameters for Multi-Process Pricing
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import sys
+import threading
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+#Columns published for every Point, in segment order:
+RegistryColumns = ['F0', 'tex', 'Alpha', 'Beta', 'Rho', 'Nu']
+
+#Header words: magic number, version, number of Points, bytes per Point name
+RegistryMagic = 0x53414252
+HeaderWords = 4
+
+#Serialises the resource tracker swap in _ATTACHSEGMENT with every segment this module creates, so one
+#thread's attach can neither restore the wrong register function nor swallow another's registration:
+TrackerLock = threading.Lock()
+
+
+def _AttachSegment(SegmentName):
+    """
+    #' Attaches to an existing shared-memory segment WITHOUT handing it to this process's resource tracker,
+    #' which would otherwise unlink the publisher's segment when a worker exits.
+    """
+
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=SegmentName, track=False)
+
+    #Older Pythons always register - suspend registration just for this attach. Unregistering after a normal
+    #attach is no alternative: a forked worker shares the publisher's tracker, and would drop its registration:
+    with TrackerLock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=SegmentName)
+        finally:
+            resource_tracker.register = register
+
+
+def _SegmentViews(shm):
+    """
+    #' Builds read-only, zero-copy numpy views of the Points and parameter columns of a data segment.
+    """
+
+    header = np.ndarray((HeaderWords,), dtype=np.int64, buffer=shm.buf)
+    n, width = int(header[2]), int(header[3])
+    offset = HeaderWords * 8 + -(-n * width // 8) * 8
+
+    Views = {'Points': np.ndarray((n,), dtype='S' + str(max(width, 1)), buffer=shm.buf, offset=HeaderWords * 8)}
+    for i, col in enumerate(RegistryColumns):
+        Views[col] = np.ndarray((n,), dtype=np.float64, buffer=shm.buf, offset=offset + i * n * 8)
+
+    for v in Views.values():
+        v.flags.writeable = False
+
+    return Views
+
+
+def SABRParamRegistryPublish(Name, Points, F0, tex, Alpha, Beta, Rho, Nu, Handle = None):
+    """
+    #' Publishes a new snapshot of calibrated SABR parameters into shared memory. Each snapshot is written
+    #' to its own immutable segment (Name_v<version>) with a versioned header, and only then made current
+    #' by flipping the version held in the small control segment Name under a sequence lock, so attached
+    #' workers swap from one complete surface to the next atomically. The previous snapshot is unlinked;
+    #' workers still mapping it keep a valid view until they refresh.
+    #'
+    #' @param Name Name of the registry, shared by the publisher and all workers
+    #' @param Points VECTOR of names of the forward rates, e.g. '3M10Y'
+    #' @param F0 VECTOR of current forward rates
+    #' @param tex VECTOR of times to expiry, measured in years
+    #' @param Alpha VECTOR of calibrated SABR Alpha, e.g. SABR_Alpha from SABRVOLSFROMFULLCALIB
+    #' @param Beta VECTOR (or single value) of SABR Beta
+    #' @param Rho VECTOR of calibrated SABR Rho
+    #' @param Nu VECTOR of calibrated SABR Nu
+    #' @param Handle Publisher handle returned by the previous call, or None to create the registry
+    #'
+    #' @return Publisher handle, to be passed to the next publish and finally to SABRPARAMREGISTRYCLOSE
+    #' @export
+    #'
+    #' @examples
+    #' pub = SABRParamRegistryPublish('sabr', ['3M10Y', '5Y10Y'], [0.0266, 0.0310], [0.25, 5], [0.0654, 0.0535], 0.5,
+    #' [-0.0341, -0.3287], [1.0451, 0.3951])
+    """
+
+    Points = np.atleast_1d(np.asarray(Points, dtype='S'))
+    n = len(Points)
+    Columns = [np.broadcast_to(np.asarray(x, dtype=np.float64), (n,)) for x in (F0, tex, Alpha, Beta, Rho, Nu)]
+    width = Points.dtype.itemsize
+
+    if Handle is None:
+        with TrackerLock:
+            Control = shared_memory.SharedMemory(name=Name, create=True, size=HeaderWords * 8)
+        ctrl = np.ndarray((HeaderWords,), dtype=np.int64, buffer=Control.buf)
+        ctrl[:] = [RegistryMagic, 0, 0, 0]
+        Handle = {'Name': Name, 'Control': Control, 'Segment': None, 'Version': 0}
+
+    #Write the new snapshot to its own segment:
+    Version = Handle['Version'] + 1
+    offset = HeaderWords * 8 + -(-n * width // 8) * 8
+    with TrackerLock:
+        Segment = shared_memory.SharedMemory(name=Name + '_v' + str(Version), create=True, size=offset + len(RegistryColumns) * max(n, 1) * 8)
+    header = np.ndarray((HeaderWords,), dtype=np.int64, buffer=Segment.buf)
+    header[:] = [RegistryMagic, Version, n, width]
+    np.ndarray((n,), dtype=Points.dtype, buffer=Segment.buf, offset=HeaderWords * 8)[:] = Points
+    for i, col in enumerate(Columns):
+        np.ndarray((n,), dtype=np.float64, buffer=Segment.buf, offset=offset + i * n * 8)[:] = col
+    del header
+
+    #Flip the current version under the sequence lock (odd while the flip is in progress):
+    ctrl = np.ndarray((HeaderWords,), dtype=np.int64, buffer=Handle['Control'].buf)
+    ctrl[1] += 1
+    ctrl[2] = Version
+    ctrl[1] += 1
+    del ctrl
+
+    #Retire the previous snapshot:
+    if Handle['Segment'] is not None:
+        Handle['Segment'].close()
+        Handle['Segment'].unlink()
+
+    Handle['Segment'] = Segment
+    Handle['Version'] = Version
+
+    return Handle
+
+
+def SABRParamRegistryAttach(Name):
+    """
+    #' Attaches a worker to a published registry. The returned handle holds read-only numpy views of the
+    #' Points and of every parameter column (see RegistryColumns) directly onto the shared segment, so
+    #' nothing is unpickled or copied and every worker shares the same physical memory.
+    #'
+    #' @param Name Name of the registry, as given to SABRPARAMREGISTRYPUBLISH
+    #'
+    #' @return Worker handle with the current Version and the column views, e.g. handle['Alpha']
+    #' @export
+    #'
+    #' @examples
+    #' reg = SABRParamRegistryAttach('sabr')
+    #' SABRtoBlack76(reg['F0'], 0.0250, reg['tex'], reg['Alpha'], reg['Beta'], reg['Rho'], reg['Nu'])
+    """
+
+    Handle = {'Name': Name, 'Control': _AttachSegment(Name), 'Segment': None, 'Version': 0, 'Stale': []}
+    SABRParamRegistryRefresh(Handle)
+
+    return Handle
+
+
+def SABRParamRegistryRefresh(Handle):
+    """
+    #' Checks whether a newer snapshot has been published and, if so, swaps the worker handle over to it.
+    #' The version is read under the sequence lock, so a worker never sees a half-published surface.
+    #' Views taken from the handle before the swap stay valid and keep showing the old snapshot.
+    #'
+    #' @param Handle Worker handle from SABRPARAMREGISTRYATTACH
+    #'
+    #' @return True if the handle moved to a new snapshot, False if it was already current
+    #' @export
+    #'
+    #' @examples SABRParamRegistryRefresh(reg)
+    """
+
+    ctrl = np.ndarray((HeaderWords,), dtype=np.int64, buffer=Handle['Control'].buf)
+
+    while True:
+        seq1 = int(ctrl[1])
+        Version = int(ctrl[2])
+        seq2 = int(ctrl[1])
+        if seq1 != seq2 or seq1 % 2 == 1:
+            continue
+
+        if Version == Handle['Version']:
+            return False
+        if Version == 0:
+            raise ValueError('Nothing has been published to registry ' + Handle['Name'] + ' yet!')
+
+        #The publisher may have retired this version in the meantime - if so, read the version again:
+        try:
+            Segment = _AttachSegment(Handle['Name'] + '_v' + str(Version))
+        except FileNotFoundError:
+            continue
+        break
+
+    Views = _SegmentViews(Segment)
+    if int(np.ndarray((HeaderWords,), dtype=np.int64, buffer=Segment.buf)[1]) != Version:
+        raise ValueError('Registry segment header does not match the published version!')
+
+    #Old views may still be held by the caller, in which case the old segment is closed later:
+    if Handle['Segment'] is not None:
+        Handle['Stale'].append(Handle['Segment'])
+    for col in ['Points'] + RegistryColumns:
+        Handle.pop(col, None)
+    Handle['Stale'] = [s for s in Handle['Stale'] if not _TryClose(s)]
+
+    Handle.update(Views)
+    Handle['Segment'] = Segment
+    Handle['Version'] = Version
+
+    return True
+
+
+def _TryClose(shm):
+    """
+    #' Closes a segment if no numpy views onto it are still alive, returning whether it was closed.
+    """
+
+    try:
+        shm.close()
+    except BufferError:
+        return False
+    return True
+
+
+def SABRParamRegistryClose(Handle, Unlink = False):
+    """
+    #' Detaches a publisher or worker handle from the registry. The publisher passes Unlink = True to
+    #' remove the registry from shared memory once all workers are done.
+    #'
+    #' @param Handle Handle from SABRPARAMREGISTRYPUBLISH or SABRPARAMREGISTRYATTACH
+    #' @param Unlink Whether to remove the current snapshot and control segments from shared memory
+    #'
+    #' @return None
+    #' @export
+    #'
+    #' @examples SABRParamRegistryClose(pub, Unlink = True)
+    """
+
+    for col in ['Points'] + RegistryColumns:
+        Handle.pop(col, None)
+
+    for shm in Handle.get('Stale', []) + [Handle['Segment'], Handle['Control']]:
+        if shm is None:
+            continue
+        _TryClose(shm)
+        if Unlink:
+            shm.unlink()
+
+    Handle['Segment'] = None
+    Handle['Stale'] = []
@@ -0,0 +1,171 @@
+"""
+#' Memory-Mapped Store for Calibrated SABR Parameter History
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import os
+import fnmatch
+
+import numpy as np
+
+#Column layout of every (Point, Method) partition - one raw binary file per column:
+StoreColumns = {'Date': 'datetime64[D]',
+                'Alpha': 'float64',
+                'Beta': 'float64',
+                'Rho': 'float64',
+                'Nu': 'float64'}
+
+
+def SABRParamStoreRows(PartitionPath):
+    """
+    #' Returns the number of complete rows held in a single (Point, Method) partition of the store. A
+    #' row only counts once every column file has been written, so an append that was interrupted
+    #' half-way through is simply ignored (and truncated away by the next append).
+    #'
+    #' @param PartitionPath Directory of the partition, i.e. StorePath/Point/Method
+    #'
+    #' @return Number of complete rows in the partition
+    #' @export
+    #'
+    #' @examples SABRParamStoreRows('store/3M10Y/FULL')
+    """
+
+    rows = []
+    for col, dtype in StoreColumns.items():
+        colfile = os.path.join(PartitionPath, col + '.bin')
+        size = os.path.getsize(colfile) if os.path.exists(colfile) else 0
+        rows.append(size // np.dtype(dtype).itemsize)
+
+    return min(rows)
+
+
+def SABRParamStoreAppend(StorePath, Date, Point, Method, Alpha, Beta, Rho, Nu):
+    """
+    #' Appends calibrated SABR parameters to an append-only, column-oriented store on disk. The store
+    #' is partitioned by Point and Method (StorePath/Point/Method/), and each partition keeps one raw
+    #' binary file per column, sorted by Date, so that slices can later be memory-mapped without any
+    #' parsing. A partition holds at most one row per Date - rows on or before its last stored date are
+    #' rejected, as are repeated dates within a call. All inputs may be scalars or vectors of the same length; rows for several Points and
+    #' Methods can be written in a single call.
+    #'
+    #' @param StorePath Root directory of the store, created if it does not exist
+    #' @param Date Calibration date(s), anything accepted by numpy.datetime64 (e.g. '2022-05-23')
+    #' @param Point Name(s) of the forward rate, e.g. '3M10Y'
+    #' @param Method Calibration method(s), e.g. 'FULL' or 'ATM'
+    #' @param Alpha Calibrated SABR Alpha value(s)
+    #' @param Beta SABR Beta value(s) used in the calibration
+    #' @param Rho Calibrated SABR Rho value(s)
+    #' @param Nu Calibrated SABR Nu value(s)
+    #'
+    #' @return Number of rows appended
+    #' @export
+    #'
+    #' @examples
+    #' calib = SABRVolsFromFullCalib(F0 = 0.0266, Strikes = calibrun$Strike, MarketVols = calibrun$BlackVol,
+    #' tex = 0.25, Beta = 0.5, guess_Alpha = 0.06, guess_Rho = 0.05, guess_Nu = 0.7)
+    #' SABRParamStoreAppend('store', '2022-05-23', '3M10Y', 'FULL', calib['SABR_Alpha'], calib['SABR_Beta'],
+    #' calib['SABR_Rho'], calib['SABR_Nu'])
+    """
+
+    Date = np.atleast_1d(np.asarray(Date, dtype='datetime64[D]'))
+    Point, Method, Date, Alpha, Beta, Rho, Nu = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(Point, dtype=str)),
+        np.atleast_1d(np.asarray(Method, dtype=str)),
+        Date,
+        np.atleast_1d(np.asarray(Alpha, dtype='float64')),
+        np.atleast_1d(np.asarray(Beta, dtype='float64')),
+        np.atleast_1d(np.asarray(Rho, dtype='float64')),
+        np.atleast_1d(np.asarray(Nu, dtype='float64')))
+
+    if Date.ndim != 1:
+        raise ValueError('Store inputs must be scalars or vectors!')
+
+    for name in np.unique(np.concatenate([Point, Method])):
+        if name in ['', '.', '..'] or os.sep in name or (os.altsep and os.altsep in name):
+            raise ValueError('Point and Method names must be valid directory names!')
+
+    #Group the rows by partition, keeping the date order within each partition:
+    keys = np.char.add(np.char.add(Point, '\x00'), Method)
+    for key in np.unique(keys):
+        rows = np.flatnonzero(keys == key)
+        rows = rows[np.argsort(Date[rows], kind='stable')]
+
+        PartitionPath = os.path.join(StorePath, Point[rows[0]], Method[rows[0]])
+        os.makedirs(PartitionPath, exist_ok=True)
+
+        if np.any(np.diff(Date[rows]) == np.timedelta64(0, 'D')):
+            raise ValueError('Each Date may only be stored once per Point and Method!')
+
+        #Drop any partially written trailing row, then check the partition stays strictly date-sorted:
+        nrows = SABRParamStoreRows(PartitionPath)
+        if nrows > 0:
+            lastdate = np.fromfile(os.path.join(PartitionPath, 'Date.bin'), dtype='datetime64[D]',
+                                   count=1, offset=(nrows - 1) * 8)[0]
+            if Date[rows[0]] <= lastdate:
+                raise ValueError('Appends must not go back in time: ' + str(Date[rows[0]]) + ' is not after ' + str(lastdate) + '!')
+
+        columns = {'Date': Date, 'Alpha': Alpha, 'Beta': Beta, 'Rho': Rho, 'Nu': Nu}
+        for col, dtype in StoreColumns.items():
+            with open(os.path.join(PartitionPath, col + '.bin'), 'ab') as f:
+                f.truncate(nrows * np.dtype(dtype).itemsize)
+                np.ascontiguousarray(columns[col][rows], dtype=dtype).tofile(f)
+
+    return len(Date)
+
+
+def SABRParamStoreLoad(StorePath, Point='*', Method='*', DateFrom=None, DateTo=None):
+    """
+    #' Loads slices of the calibrated SABR parameter history without parsing or copying. Partitions are
+    #' selected by Point and Method (shell-style wildcards allowed, e.g. '5Y*'), and the Date range is
+    #' found by binary search on the sorted Date column, so every returned column is a read-only view
+    #' onto a numpy memmap of the underlying file.
+    #'
+    #' @param StorePath Root directory of the store
+    #' @param Point Point name, wildcard pattern, or list of either, defaults to all Points
+    #' @param Method Method name, wildcard pattern, or list of either, defaults to all Methods
+    #' @param DateFrom First date to include, defaults to the start of the history
+    #' @param DateTo Last date to include (inclusive), defaults to the end of the history
+    #'
+    #' @return Dictionary keyed by (Point, Method), each entry a dictionary of Date/Alpha/Beta/Rho/Nu
+    #' column views for the requested date range
+    #' @export
+    #'
+    #' @examples
+    #' ### All 5Y-expiry points for 2022
+    #' SABRParamStoreLoad('store', Point = '5Y*', DateFrom = '2022-01-01', DateTo = '2022-12-31')
+    """
+
+    Points = [Point] if isinstance(Point, str) else list(Point)
+    Methods = [Method] if isinstance(Method, str) else list(Method)
+
+    Results = {}
+    if not os.path.isdir(StorePath):
+        return Results
+
+    #Only directories are partitions - stray files in the store are skipped:
+    for pt in sorted(os.listdir(StorePath)):
+        if not any(fnmatch.fnmatchcase(pt, p) for p in Points) or not os.path.isdir(os.path.join(StorePath, pt)):
+            continue
+        for mt in sorted(os.listdir(os.path.join(StorePath, pt))):
+            if not any(fnmatch.fnmatchcase(mt, m) for m in Methods) or not os.path.isdir(os.path.join(StorePath, pt, mt)):
+                continue
+
+            PartitionPath = os.path.join(StorePath, pt, mt)
+            nrows = SABRParamStoreRows(PartitionPath)
+
+            #Map every column read-only (np.memmap cannot map an empty file):
+            columns = {}
+            for col, dtype in StoreColumns.items():
+                if nrows > 0:
+                    columns[col] = np.memmap(os.path.join(PartitionPath, col + '.bin'), dtype=dtype, mode='r', shape=(nrows,))
+                else:
+                    columns[col] = np.zeros(0, dtype=dtype)
+
+            #Binary search the sorted Date column for the requested range:
+            start = 0 if DateFrom is None else np.searchsorted(columns['Date'], np.datetime64(DateFrom, 'D'), side='left')
+            stop = nrows if DateTo is None else np.searchsorted(columns['Date'], np.datetime64(DateTo, 'D'), side='right')
+
+            Results[(pt, mt)] = {col: values[start:stop] for col, values in columns.items()}
+
+    return Results
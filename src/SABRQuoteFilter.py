@@ -0,0 +1,147 @@
+"""
+#' Vectorised Pre-Calibration Screening of Market Vol Quotes
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+
+from SABRtoBlack76 import SABRtoBlack76
+from SABRtoBachelier import SABRtoBachelier
+from Black76OptionPrice import Black76OptionPrice
+from BachelierOptionPrice import BachelierOptionPrice
+
+#Bit flags set on screened quotes - a quote can fail several checks at once:
+QuoteFlags = {1: 'Missing or non-positive strike or vol',
+              2: 'Wing vol falls moving away from the money',
+              4: 'Butterfly or call spread arbitrage against its neighbours',
+              8: 'Outlier against the previous fitted smile'}
+
+def SABRQuoteFilter(F0, Strikes, MarketVols, tex, Beta = None, PrevAlpha = None, PrevRho = None, PrevNu = None,
+                    WingTol = None, ButterflyTol = 1e-8, OutlierTol = 4, OutlierFloor = None, Action = 'weight', DownWeight = 0.01,
+                    Shift = 0, VolType = 'Lognormal'):
+    """
+    #' Screens every smile of a surface for bad quotes in one array pass, before calibration. Quotes are
+    #' sorted by strike within each smile, and then:
+    #' - Wings: away from the lowest vol, vols should rise moving out; a quote more than WingTol below its
+    #'   neighbour on the money side (taken from the 3-point running median of the smile) is flagged.
+    #' - Butterflies: undiscounted Black-76 (or, for normal vols, Bachelier) call prices at the quoted vols must be convex in strike, with call
+    #'   spread slopes between -1 and 0; a negative butterfly flags its middle strike, and a slope out of
+    #'   bounds flags the strike of the pair further from the money.
+    #' - Outliers: if the previous fitted parameters are given, each quote's deviation from the previous
+    #'   smile is taken net of the smile's median deviation (so a parallel move of the market is no outlier),
+    #'   and flagged beyond OutlierTol robust standard deviations (1.4826 x MAD, floored at OutlierFloor).
+    #' Flagged quotes are down-weighted (Action = 'weight') or dropped (Action = 'drop'); missing quotes
+    #' always get zero weight. The weights can be passed straight to the calibrators, e.g. SABRBATCHFULLCALIB.
+    #'
+    #' @param F0 VECTOR of N current forward rates
+    #' @param Strikes (N, m) MATRIX of strike prices, ragged smiles padded with NaN
+    #' @param MarketVols (N, m) MATRIX of LOGNORMAL (i.e. Black-76) market-quoted implied volatilities, or normal vols if VolType = 'Normal', padded with NaN
+    #' @param tex VECTOR (or single value) of times to expiry, measured in years
+    #' @param Beta VECTOR (or single value) of SABR Beta of the previous fit, MUST be given with the previous parameters
+    #' @param PrevAlpha Optional VECTOR of N previously fitted SABR Alpha, enables the outlier check
+    #' @param PrevRho Optional VECTOR of N previously fitted SABR Rho
+    #' @param PrevNu Optional VECTOR of N previously fitted SABR Nu
+    #' @param WingTol Vol drop tolerated in the wings, defaults to 0.005 for lognormal and 1bp (0.0001) for normal vols
+    #' @param ButterflyTol Tolerance on butterflies and call spread slopes
+    #' @param OutlierTol Number of robust standard deviations beyond which a quote is an outlier
+    #' @param OutlierFloor Floor on the robust standard deviation, in vol, defaults to 0.005 for lognormal and 1bp (0.0001) for normal vols
+    #' @param Action Either 'weight' (down-weight flagged quotes) or 'drop' (zero weight and NaN vol)
+    #' @param DownWeight Weight given to flagged quotes by the 'weight' action
+    #' @param Shift VECTOR (or single value) of per-smile shifts added to the forward and strikes, for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' if the market vols are Black-76 vols, or 'Normal' if they are normal (Bachelier) vols
+    #'
+    #' @return A list object containing the (N, m) weights, the (N, m) bit flags (see QuoteFlags), the
+    #' market vols with dropped quotes set to NaN, and the number of flagged quotes per smile
+    #' @export
+    #'
+    #' @examples
+    #' SABRQuoteFilter(F0 = np.array([0.0266]), Strikes = np.array([calibrun$Strike]), MarketVols = np.array([calibrun$BlackVol]),
+    #' tex = 0.25, Beta = 0.5, PrevAlpha = 0.0651, PrevRho = -0.0356, PrevNu = 1.0504)
+    """
+
+    if Action not in ['weight', 'drop']:
+        raise ValueError("Filter action MUST be 'weight' or 'drop'!")
+
+    if VolType not in ['Lognormal', 'Normal']:
+        raise ValueError("Vol type MUST be 'Lognormal' or 'Normal'!")
+
+    if PrevAlpha is not None and Beta is None:
+        raise ValueError('Beta MUST be given with the previous parameters!')
+
+    #Tolerances in the units of the market vols:
+    if WingTol is None:
+        WingTol = 0.005 if VolType == 'Lognormal' else 0.0001
+    if OutlierFloor is None:
+        OutlierFloor = 0.005 if VolType == 'Lognormal' else 0.0001
+
+    Strikes = np.atleast_2d(np.asarray(Strikes, dtype=float))
+    MarketVols = np.atleast_2d(np.asarray(MarketVols, dtype=float))
+    N, m = Strikes.shape
+
+    if Strikes.shape != MarketVols.shape:
+        raise ValueError('Strikes matrix must be same shape as market data!')
+
+    F0, tex, Shift = [np.broadcast_to(np.asarray(x, dtype=float), (N,))[:, None] for x in (F0, tex, Shift)]
+
+    #Sort each smile by strike, with the missing quotes (and shifted strikes at or below zero) at the end:
+    with np.errstate(invalid='ignore'):
+        Missing = ~(np.isfinite(Strikes) & np.isfinite(MarketVols) & (Strikes + Shift > 0) & (MarketVols > 0))
+    Order = np.argsort(np.where(Missing, np.inf, Strikes), axis=1, kind='stable')
+    K = np.take_along_axis(Strikes, Order, axis=1)
+    V = np.take_along_axis(MarketVols, Order, axis=1)
+    Miss = np.take_along_axis(Missing, Order, axis=1)
+    Flags = np.where(Miss, 1, 0)
+
+    #Pairs of neighbouring quotes (j, j + 1) that are both present:
+    Pair = ~Miss[:, :-1] & ~Miss[:, 1:]
+    j = np.arange(m)
+
+    #Wings - vols should rise moving away from the smile's lowest vol. Each quote is compared with the
+    #3-point running median on its money side, so one bad quote cannot shift the vertex or flag its neighbours:
+    Smooth = V.copy()
+    with np.errstate(invalid='ignore'):
+        Smooth[:, 1:-1] = np.nanmedian(np.stack([V[:, :-2], V[:, 1:-1], V[:, 2:]]), axis=0)
+    Smooth[Miss] = np.nan
+    Vertex = np.argmin(np.where(Miss, np.inf, Smooth), axis=1)[:, None]
+    Flags[:, :-1] |= np.where(Pair & (j[:-1] < Vertex) & (V[:, :-1] < Smooth[:, 1:] - WingTol), 2, 0)
+    Flags[:, 1:] |= np.where(Pair & (j[1:] > Vertex) & (V[:, 1:] < Smooth[:, :-1] - WingTol), 2, 0)
+
+    #Butterflies and call spreads on undiscounted Black-76 (or Bachelier) call prices at the quoted vols:
+    with np.errstate(all='ignore'):
+        if VolType == 'Lognormal':
+            C = Black76OptionPrice(F0, K, V, tex, 0, 'c', Shift)
+        else:
+            C = BachelierOptionPrice(F0, K, V, tex, 0, 'c')
+        Slope = np.diff(C, axis=1) / np.diff(K, axis=1)
+        Moneyness = np.abs(np.log((K + Shift) / (F0 + Shift)))
+        Outer = Moneyness[:, 1:] > Moneyness[:, :-1]
+    BadSpread = Pair & ((Slope > ButterflyTol) | (Slope < -1 - ButterflyTol))
+    Flags[:, 1:] |= np.where(BadSpread & Outer, 4, 0)
+    Flags[:, :-1] |= np.where(BadSpread & ~Outer, 4, 0)
+    Flags[:, 1:-1] |= np.where(Pair[:, :-1] & Pair[:, 1:] & (np.diff(Slope, axis=1) < -ButterflyTol), 4, 0)
+
+    #Outliers against the previous fit, net of any parallel move of the smile:
+    if PrevAlpha is not None:
+        Prev = [np.broadcast_to(np.asarray(x, dtype=float), (N,))[:, None] for x in (Beta, PrevAlpha, PrevRho, PrevNu)]
+        with np.errstate(all='ignore'):
+            Kernel = SABRtoBlack76 if VolType == 'Lognormal' else SABRtoBachelier
+            Dev = np.where(Miss, np.nan, V - Kernel(F0, K, tex, Prev[1], Prev[0], Prev[2], Prev[3], Shift))
+        Dev = np.abs(Dev - np.nanmedian(Dev, axis=1, keepdims=True))
+        Scale = np.maximum(1.4826 * np.nanmedian(Dev, axis=1, keepdims=True), OutlierFloor)
+        Flags |= np.where(Dev > OutlierTol * Scale, 8, 0)
+
+    #Back to the input order:
+    Unsorted = np.zeros((N, m), dtype=int)
+    np.put_along_axis(Unsorted, Order, Flags, axis=1)
+    Flags = Unsorted
+
+    Weights = np.where(Flags == 0, 1.0, 0.0 if Action == 'drop' else DownWeight)
+    Weights[(Flags & 1) != 0] = 0
+
+    ResultsList = {'SABR_Weights': Weights,
+                   'SABR_Flags': Flags,
+                   'SABR_MarketVols': np.where(Weights > 0, MarketVols, np.nan),
+                   'SABR_Flagged': ((Flags != 0) & ~Missing).sum(axis=1)}
+
+    return ResultsList
@@ -0,0 +1,115 @@
+"""
+#' Bucketed Vega to Individual Market Vol Quotes without Recalibration
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+
+from ATMVolToSABRAlpha import ATMVolToSABRAlpha
+from SABRtoBlack76 import SABRtoBlack76
+from SABRtoBachelier import SABRtoBachelier
+from SABRVolJacobian import SABRVolJacobian
+from Black76Vega import Black76Vega
+from BachelierVega import BachelierVega
+
+def SABRQuoteVega(F0, Strikes, tex, rfr, Alpha, Beta, Rho, Nu, OptionStrikes, Notionals = None, ATMVol = None, bumpsize = 1e-5,
+                  Shift = 0, VolType = 'Lognormal'):
+    """
+    #' Calculates the sensitivity of every option in a book to every individual market vol quote of its
+    #' smile, WITHOUT bumping the quotes and recalibrating. At the calibrated optimum the least-squares
+    #' first-order condition J'r = 0 holds, so by the implicit function theorem (Gauss-Newton form) the
+    #' calibrated parameters move with the quotes as d(params)/d(MarketVols) = (J'J)^-1 J', where J is
+    #' the calibration Jacobian from SABRVOLJACOBIAN. Chaining this with the option vol Jacobian and the
+    #' Black-76 Vega (or Bachelier Vega, for normal vol quotes) gives quote-level bucketed vegas for all smiles
+    #' of a book in one pass. If ATMVol is supplied the ATM calibration method is assumed and the ATM quote
+    #' becomes an extra, final bucket.
+    #'
+    #' @param F0 VECTOR of N current forward rates
+    #' @param Strikes (N, m) MATRIX of calibration strikes, ragged smiles padded with NaN
+    #' @param tex VECTOR (or single value) of times to expiry, measured in years
+    #' @param rfr Riskless rate, best taken as either the 10y or 30y government zero rate
+    #' @param Alpha VECTOR of calibrated SABR Alpha, ignored if ATMVol is supplied
+    #' @param Beta VECTOR (or single value) of SABR Beta used in the calibration
+    #' @param Rho VECTOR of calibrated SABR Rho
+    #' @param Nu VECTOR of calibrated SABR Nu
+    #' @param OptionStrikes (N, q) MATRIX of strikes of the options in the book on each smile, padded with NaN
+    #' @param Notionals Optional (N, q) MATRIX of option notionals, used to aggregate a book-level vega per quote
+    #' @param ATMVol Optional VECTOR of ATM market vols (of the given VolType), switches to the ATM calibration method
+    #' @param bumpsize Relative size of the central-difference bumps used for the Jacobians
+    #' @param Shift VECTOR (or single value) of per-smile shifts added to the forward and strikes, for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' if the calibration quotes are Black-76 vols, or 'Normal' if they are normal (Bachelier) vols
+    #'
+    #' @return A list object containing the (N, q, m) quote vegas of every option, the (N, p, m) parameter
+    #' sensitivities to the quotes, the option SABR vols and Black-76 (or Bachelier) vegas, and the (N, m) book vega per quote
+    #' @export
+    #'
+    #' @examples
+    #' SABRQuoteVega(F0 = np.array([0.0266]), Strikes = np.array([calibrun$Strike]), tex = 0.25, rfr = 0.02,
+    #' Alpha = np.array([0.0654]), Beta = 0.5, Rho = np.array([-0.0341]), Nu = np.array([1.0451]),
+    #' OptionStrikes = np.array([[0.0250, 0.0300]]))
+    """
+
+    Strikes = np.atleast_2d(np.asarray(Strikes, dtype=float))
+    OptionStrikes = np.atleast_2d(np.asarray(OptionStrikes, dtype=float))
+    N = Strikes.shape[0]
+
+    if VolType not in ['Lognormal', 'Normal']:
+        raise ValueError("Vol type MUST be 'Lognormal' or 'Normal'!")
+
+    if OptionStrikes.shape[0] != N:
+        raise ValueError('Option strikes must have one row per calibrated smile!')
+
+    F0, tex, rfr, Beta, Rho, Nu, Shift = [np.broadcast_to(np.asarray(x, dtype=float), (N,))[:, None] for x in (F0, tex, rfr, Beta, Rho, Nu, Shift)]
+    if ATMVol is None:
+        Alpha = np.broadcast_to(np.asarray(Alpha, dtype=float), (N,))[:, None]
+    else:
+        ATMVol = np.broadcast_to(np.asarray(ATMVol, dtype=float), (N,))[:, None]
+
+    #Calibration Jacobian at the quotes, with padded quotes removed from the fit:
+    Valid = np.isfinite(Strikes)
+    Calib = SABRVolJacobian(F0, np.where(Valid, Strikes, F0), tex, Alpha, Beta, Rho, Nu, ATMVol = ATMVol, bumpsize = bumpsize, Shift = Shift, VolType = VolType)
+    J = np.where(Valid[:, :, None], Calib['SABR_Jacobian'], 0)
+
+    #d(params)/d(MarketVols) = (J'J)^-1 J', one small pseudo-inverse per smile:
+    dParams = np.linalg.pinv(J)
+
+    #Jacobian of the option vols to the same parameters:
+    OptValid = np.isfinite(OptionStrikes)
+    OptStrikes = np.where(OptValid, OptionStrikes, F0)
+    Opt = SABRVolJacobian(F0, OptStrikes, tex, Alpha, Beta, Rho, Nu, ATMVol = ATMVol, bumpsize = bumpsize, Shift = Shift, VolType = VolType)
+
+    dOptVol = np.einsum('nqp,npm->nqm', Opt['SABR_Jacobian'], dParams)
+
+    if ATMVol is not None:
+        #The ATM quote moves the vols directly through Alpha as well as through the refitted Rho and Nu:
+        h = bumpsize * ATMVol
+        AlphaB = ATMVolToSABRAlpha(F0, ATMVol + h * np.array([1, -1]), tex, Beta, Rho, Nu, Shift, VolType)
+        Kernel = SABRtoBlack76 if VolType == 'Lognormal' else SABRtoBachelier
+        VolsB = Kernel(F0[:, :, None], np.concatenate([np.where(Valid, Strikes, F0), OptStrikes], axis=1)[:, :, None], tex[:, :, None],
+                       AlphaB[:, None, :], Beta[:, :, None], Rho[:, :, None], Nu[:, :, None], Shift[:, :, None])
+        dVoldATM = (VolsB[:, :, 0] - VolsB[:, :, 1]) / (2 * h)
+        m = Strikes.shape[1]
+        dParamsATM = -np.einsum('npm,nm->np', dParams, np.where(Valid, dVoldATM[:, :m], 0))
+        dOptVolATM = dVoldATM[:, m:] + np.einsum('nqp,np->nq', Opt['SABR_Jacobian'], dParamsATM)
+        dParams = np.concatenate([dParams, dParamsATM[:, :, None]], axis=2)
+        dOptVol = np.concatenate([dOptVol, dOptVolATM[:, :, None]], axis=2)
+
+    #Chain through Black-76 (or Bachelier) Vega of each option:
+    if VolType == 'Lognormal':
+        OptVega = Black76Vega(F0, OptStrikes, Opt['SABR_Vols'], tex, rfr, Shift)
+    else:
+        OptVega = BachelierVega(F0, OptStrikes, Opt['SABR_Vols'], tex, rfr)
+    QuoteVega = np.where(OptValid[:, :, None], OptVega[:, :, None] * dOptVol, np.nan)
+
+    if Notionals is None:
+        Notionals = np.ones(OptionStrikes.shape)
+    BookVega = np.nansum(np.asarray(Notionals, dtype=float)[:, :, None] * QuoteVega, axis=1)
+
+    ResultsList = {'SABR_QuoteVega': QuoteVega,
+                   'SABR_ParamSensitivity': dParams,
+                   'SABR_Vols': np.where(OptValid, Opt['SABR_Vols'], np.nan),
+                   'SABR_Vega': np.where(OptValid, OptVega, np.nan),
+                   'SABR_BookVega': BookVega}
+
+    return ResultsList
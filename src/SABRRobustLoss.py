@@ -0,0 +1,46 @@
+"""
+#' Robust Loss Functions for the SABR Calibrators
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+
+#Loss functions the calibrators can minimise:
+RobustLosses = ['linear', 'huber', 'soft_l1']
+
+def SABRRobustLoss(Resid, Loss = 'linear', LossScale = 1):
+    """
+    #' Evaluates a robust loss of calibration residuals, in the scaled form used by scipy.optimize.least_squares:
+    #' cost = LossScale^2 rho((Resid / LossScale)^2), with rho(z) = z for 'linear' (plain sum of squares),
+    #' z for z <= 1 and 2 sqrt(z) - 1 beyond for 'huber', and 2 (sqrt(1 + z) - 1) for 'soft_l1'. Residuals
+    #' much larger than LossScale (e.g. stale or crossed quotes) then only grow the cost linearly, so they
+    #' cannot drag the fit towards themselves. Also returns rho'(z), the weight of each residual in the
+    #' iteratively reweighted normal equations of SABRBATCHLM.
+    #'
+    #' @param Resid VECTOR (or array) of residuals
+    #' @param Loss One of RobustLosses
+    #' @param LossScale Residual size at which the robust losses start to down-weight, in the units of the residuals
+    #'
+    #' @return Cost of each residual, and the weight rho'(z) of each residual
+    #' @export
+    #'
+    #' @examples SABRRobustLoss(np.array([0.001, -0.002, 0.05]), Loss = 'huber', LossScale = 0.01)
+    """
+
+    if Loss not in RobustLosses:
+        raise ValueError('Loss MUST be one of ' + ', '.join(RobustLosses) + '!')
+
+    z = (np.asarray(Resid, dtype=float) / LossScale) ** 2
+
+    if Loss == 'linear':
+        rho, drho = z, np.ones(z.shape)
+    elif Loss == 'huber':
+        with np.errstate(divide='ignore'):
+            rho = np.where(z <= 1, z, 2 * np.sqrt(z) - 1)
+            drho = np.where(z <= 1, 1, 1 / np.sqrt(z))
+    else:
+        rho = 2 * (np.sqrt(1 + z) - 1)
+        drho = 1 / np.sqrt(1 + z)
+
+    return LossScale ** 2 * rho, drho
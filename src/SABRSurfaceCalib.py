@@ -0,0 +1,135 @@
+"""
+#' Batch-Safe Calibration of a Whole Surface of SABR Smiles
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import time
+
+import numpy as np
+
+from SABRFullCalib import SABRFullCalib
+from SABRATMCalib import SABRATMCalib
+from ATMVolToSABRAlpha import ATMVolToSABRAlpha
+from SABRtoBlack76Masked import SABRtoBlack76Masked
+
+#Per-smile status codes of the surface calibration:
+SurfaceStatusCodes = {0: 'OK',
+                      1: 'Calibration raised an error',
+                      2: 'Optimiser did not converge',
+                      3: 'Calibrated vols could not be evaluated at every strike',
+                      4: 'Partial - stopped by the time or evaluation budget',
+                      5: 'Stopped by the budget and fell back to the previous parameters'}
+
+def SABRSurfaceCalib(Points, F0, Strikes, MarketVols, tex, Beta, guess_Alpha, guess_Rho, guess_Nu, Method = 'FULL', ATMVol = None,
+                     time_budget = None, max_evals = None, fallback_params = None, Shift = 0, VolType = 'Lognormal', Weights = None, Loss = 'linear',
+                     LossScale = 0.01):
+    """
+    #' Calibrates every smile of a surface, one smile at a time, with either SABRFULLCALIB or SABRATMCALIB,
+    #' in batch-safe mode: each smile runs with floating-point errors suppressed, any error it still raises
+    #' is caught, and the calibrated vols are evaluated with SABRTOBLACK76MASKED. A failed smile is recorded
+    #' with NaN parameters and a status code (see SurfaceStatusCodes) and the run carries on with the next one.
+    #' All smiles share ONE time budget: every calibration is given the same deadline, so once it has passed
+    #' the remaining smiles stop straight away with their best (or previous) parameters, flagged as partial.
+    #'
+    #' @param Points VECTOR of N names of the forward rates, e.g. '3M10Y'
+    #' @param F0 VECTOR of N current forward rates
+    #' @param Strikes LIST of N VECTORS of strike prices
+    #' @param MarketVols LIST of N VECTORS of LOGNORMAL (i.e. Black-76) market-quoted implied volatilities, or normal vols if VolType = 'Normal'
+    #' @param tex VECTOR (or single value) of times to expiry, measured in years
+    #' @param Beta VECTOR (or single value) of SABR Beta, EITHER evaluated using historical data OR preset by user
+    #' @param guess_Alpha VECTOR (or single value) of initial guesses of Alpha, ignored by the ATM method
+    #' @param guess_Rho VECTOR (or single value) of initial guesses of Rho, MUST be bounded between -1 and 1
+    #' @param guess_Nu VECTOR (or single value) of initial guesses of Nu, MUST be non-zero
+    #' @param Method Either 'FULL' or 'ATM'
+    #' @param ATMVol VECTOR of N ATM market vols (of the same VolType as MarketVols), required by the ATM method
+    #' @param time_budget Optional total time, in seconds, for calibrating the whole surface
+    #' @param max_evals Optional maximum number of SSE evaluations per smile
+    #' @param fallback_params Optional (N, 3) Alpha/Rho/Nu (or (N, 2) Rho/Nu for the ATM method) previously
+    #' published parameters, used by smiles stopped by the budget if they fit better
+    #' @param Shift VECTOR (or single value) of per-Point shifts added to the forward and strikes, for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' if the market vols are Black-76 vols, or 'Normal' if they are normal (Bachelier) vols, in which case the returned vols are normal vols too
+    #' @param Weights Optional LIST of N VECTORS of quote weights, e.g. the rows of SABR_Weights from SABRQUOTEFILTER
+    #' @param Loss One of RobustLosses ('linear', 'huber' or 'soft_l1'), defaults to the plain sum of squares
+    #' @param LossScale Vol error at which the robust losses start to down-weight
+    #'
+    #' @return A list object containing the Points, the N calibrated Alpha/Beta/Rho/Nu (NaN for failed
+    #' smiles), the strikes and calibrated vols of every smile, the per-smile status codes, and the error messages
+    #' @export
+    #'
+    #' @examples
+    #' SABRSurfaceCalib(Points = ['3M10Y', '5Y10Y'], F0 = [0.0266, 0.0310], Strikes = [K3M10Y, K5Y10Y],
+    #' MarketVols = [V3M10Y, V5Y10Y], tex = [0.25, 5], Beta = 0.5, guess_Alpha = 0.05, guess_Rho = 0.1, guess_Nu = 0.7)
+    """
+
+    if Method not in ['FULL', 'ATM']:
+        raise ValueError("Calibration method MUST be 'FULL' or 'ATM'!")
+
+    if Method == 'ATM' and ATMVol is None:
+        raise ValueError('ATM calibration method needs the ATM market vols!')
+
+    if VolType not in ['Lognormal', 'Normal']:
+        raise ValueError("Vol type MUST be 'Lognormal' or 'Normal'!")
+
+    N = len(Points)
+    F0, tex, Beta, guess_Alpha, guess_Rho, guess_Nu, Shift = [np.broadcast_to(np.asarray(x, dtype=float), (N,)) for x in (F0, tex, Beta, guess_Alpha, guess_Rho, guess_Nu, Shift)]
+    if ATMVol is not None:
+        ATMVol = np.broadcast_to(np.asarray(ATMVol, dtype=float), (N,))
+
+    Alpha, Rho, Nu = np.full(N, np.nan), np.full(N, np.nan), np.full(N, np.nan)
+    Vols = [np.full(len(k), np.nan) for k in Strikes]
+    Status = np.zeros(N, dtype=int)
+    Errors = [''] * N
+
+    #One global deadline shared by all smiles:
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+
+    for i in range(N):
+        try:
+            with np.errstate(all='ignore'):
+                if Method == 'FULL':
+                    CalibSet = SABRFullCalib(F0[i], Strikes[i], MarketVols[i], tex[i], Beta[i], guess_Alpha[i], guess_Rho[i], guess_Nu[i],
+                                             deadline, max_evals, None if fallback_params is None else fallback_params[i], Shift[i], VolType,
+                                             Weights = None if Weights is None else Weights[i], Loss = Loss, LossScale = LossScale)
+                    a, r, n = CalibSet.x
+                else:
+                    CalibSet = SABRATMCalib(F0[i], ATMVol[i], Strikes[i], MarketVols[i], tex[i], Beta[i], guess_Rho[i], guess_Nu[i],
+                                            deadline, max_evals, None if fallback_params is None else fallback_params[i], Shift[i], VolType,
+                                            Weights = None if Weights is None else Weights[i], Loss = Loss, LossScale = LossScale)
+                    r, n = CalibSet.x
+                    a = ATMVolToSABRAlpha(F0[i], ATMVol[i], tex[i], Beta[i], r, n, Shift[i], VolType)
+
+                if not np.isfinite(CalibSet.fun):
+                    raise FloatingPointError('Non-finite sum of square errors at the calibrated parameters')
+        except (ArithmeticError, ValueError, np.linalg.LinAlgError) as e:
+            Status[i] = 1
+            Errors[i] = type(e).__name__ + ': ' + str(e)
+            continue
+
+        Alpha[i], Rho[i], Nu[i] = a, r, n
+        Vols[i], VolStatus = SABRtoBlack76Masked(F0[i], np.asarray(Strikes[i], dtype=float), tex[i], a, Beta[i], r, n, Shift[i], VolType)
+
+        if np.any(VolStatus != 0):
+            Status[i] = 3
+            Errors[i] = 'Vols could not be evaluated at strikes ' + ', '.join(str(Strikes[i][j]) for j in np.flatnonzero(VolStatus))
+        elif CalibSet.fallback:
+            Status[i] = 5
+            Errors[i] = str(CalibSet.message)
+        elif CalibSet.partial:
+            Status[i] = 4
+            Errors[i] = str(CalibSet.message)
+        elif not CalibSet.success:
+            Status[i] = 2
+            Errors[i] = str(CalibSet.message)
+
+    ResultsList = {'SABR_Points': list(Points),
+                   'SABR_Alpha': Alpha,
+                   'SABR_Beta': Beta,
+                   'SABR_Rho': Rho,
+                   'SABR_Nu': Nu,
+                   'SABR_Strikes': list(Strikes),
+                   'SABR_Vols': Vols,
+                   'SABR_Status': Status,
+                   'SABR_Errors': Errors}
+
+    return ResultsList
@@ -5,9 +5,11 @@
 # pylint:disable=invalid-name, line-too-long
 
 from SABRtoBlack76 import SABRtoBlack76
+from SABRtoBachelier import SABRtoBachelier
 from Black76Vega import Black76Vega
+from BachelierVega import BachelierVega
 
-def SABRVega(F0, K, tex, rfr, Alpha, Beta, Rho, Nu):
+def SABRVega(F0, K, tex, rfr, Alpha, Beta, Rho, Nu, Shift = 0, VolType = 'Lognormal'):
     """
     #' Calculates the first-order risk with respect to changes in the vol-of-vol parameter, using a
     #' mixture of analytical and numerical estimation methods. Assumes that all parameters provided are
@@ -15,7 +17,8 @@ def SABRVega(F0, K, tex, rfr, Alpha, Beta, Rho, Nu):
     #'  parameters, first calculates the Black-76-equivalent volatility, then calculates the Vega risk of the option
     #'  given the input parameters using the analytical form for Black-76 Vega, and finally calculates the adjustment
     #'  needed for the ratio of the ATM implied volatility vs the actual strike-related volatility. In the event that
-    #'  the option is ATM, this simply returns the direct Black-76 Vega.
+    #'  the option is ATM, this simply returns the direct Black-76 Vega. With VolType = 'Normal' the normal (Bachelier)
+    #'  equivalent volatilities and the Bachelier Vega are used instead.
     #'
     #' @param F0 Current forward rate
     #' @param K Strike rate of the option
@@ -25,6 +28,8 @@ def SABRVega(F0, K, tex, rfr, Alpha, Beta, Rho, Nu):
     #' @param Beta Shape parameter of SABR schema, EITHER evaluated using historical data, OR preset by user
     #' @param Rho Correlation between SABR forward and diffusion processes
     #' @param Nu Vol-of-vol parameter for SABR diffusion process
+    #' @param Shift Shift added to the forward and strike(s), for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' for the Black-76-equivalent Vega, or 'Normal' for the Bachelier-equivalent Vega
     #'
     #' @return First-order risk against changes to implied volatility
     #' @export
@@ -49,6 +54,17 @@ def SABRVega(F0, K, tex, rfr, Alpha, Beta, Rho, Nu):
     # Nu - vol-of-vol for SABR diffusion process
     """
 
+    if VolType not in ['Lognormal', 'Normal']:
+        raise ValueError("Vol type MUST be 'Lognormal' or 'Normal'!")
+
+    #Shifted model - work with the shifted forward and strike throughout:
+    F0, K = F0 + Shift, K + Shift
+
+    if VolType == 'Normal':
+        #Bachelier Vega scaled by the ratio of the strike's normal vol to the ATM normal vol:
+        SABRNormVol = SABRtoBachelier(F0, K, tex, Alpha, Beta, Rho, Nu)
+        return BachelierVega(F0, K, SABRNormVol, tex, rfr) * SABRNormVol / SABRtoBachelier(F0, F0, tex, Alpha, Beta, Rho, Nu)
+
     #Calculate Black-76-equivalent volatility for provided inputs:
     SABRImpVol = SABRtoBlack76(F0, K, tex, Alpha, Beta, Rho, Nu)
 
@@ -0,0 +1,81 @@
+"""
+#' Black-76-Equivalent SABR Vols and their Jacobian in One Stacked Evaluation
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+
+from ATMVolToSABRAlpha import ATMVolToSABRAlpha
+from SABRtoBlack76 import SABRtoBlack76
+from SABRtoBachelier import SABRtoBachelier
+
+def SABRVolJacobian(F0, K, tex, Alpha, Beta, Rho, Nu, ATMVol = None, bumpsize = 1e-5, Shift = 0, VolType = 'Lognormal'):
+    """
+    #' Calculates the Black-76-equivalent SABR vols together with their sensitivities to the calibrated
+    #' parameters, using central differences. All up and down bumps are stacked along a trailing axis,
+    #' so the whole stencil is priced by a SINGLE call to SABRTOBLACK76. If ATMVol is supplied the
+    #' Jacobian follows the ATM calibration method, i.e. Alpha is re-solved from the ATM vol for every
+    #' bumped Rho and Nu, and only Rho and Nu are treated as free parameters.
+    #'
+    #' @param F0 Current forward rate
+    #' @param K Strike rate(s) of the options
+    #' @param tex Time to expiry of the options, measured in years
+    #' @param Alpha Calibrated SABR Alpha, ignored if ATMVol is supplied
+    #' @param Beta Shape parameter of SABR schema, EITHER evaluated using historical data OR preset by user
+    #' @param Rho Correlation between SABR forward and diffusion processes
+    #' @param Nu Vol-of-vol for SABR diffusion process
+    #' @param ATMVol Optional lognormal ATM market vol, switches to the ATM calibration method
+    #' @param bumpsize Relative size of the central-difference bumps (absolute for Rho)
+    #' @param Shift Shift added to the forward and strikes, for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' for Black-76 equivalent vols, or 'Normal' for normal (Bachelier) vols from SABRTOBACHELIER
+    #'
+    #' @return A list object containing the SABR vols (broadcast shape of the inputs), the Jacobian
+    #' (same shape plus a trailing axis over Alpha/Rho/Nu, or Rho/Nu for the ATM method), and the Alpha used
+    #' @export
+    #'
+    #' @examples SABRVolJacobian(F0 = 0.0266, K = np.array([0.0200, 0.0266, 0.0300]), tex = 0.25,
+    #' Alpha = 0.0651, Beta = 0.5, Rho = -0.0356, Nu = 1.0504)
+    """
+
+    F0, K, tex, Alpha, Beta, Rho, Nu, Shift = [np.asarray(x, dtype=float)[..., None] for x in (F0, K, tex, Alpha, Beta, Rho, Nu, Shift)]
+
+    #Bump sizes - relative for Alpha and Nu so they stay positive, absolute for Rho:
+    hAlpha = bumpsize * np.abs(Alpha) + 1e-14
+    hRho = bumpsize + 0 * Rho
+    hNu = bumpsize * np.abs(Nu) + 1e-14
+
+    #Stencil of (base, up, dn) bumps for each free parameter along the trailing axis:
+    if ATMVol is None:
+        nparams = 3
+        h = [hAlpha, hRho, hNu]
+    else:
+        nparams = 2
+        h = [hRho, hNu]
+
+    steps = np.zeros((nparams, 2 * nparams + 1))
+    for j in range(nparams):
+        steps[j, 1 + 2 * j] = 1
+        steps[j, 2 + 2 * j] = -1
+
+    if ATMVol is None:
+        AlphaB = Alpha + hAlpha * steps[0]
+        RhoB = Rho + hRho * steps[1]
+        NuB = Nu + hNu * steps[2]
+    else:
+        RhoB = Rho + hRho * steps[0]
+        NuB = Nu + hNu * steps[1]
+        ATMVol = np.asarray(ATMVol, dtype=float)[..., None]
+        AlphaB = ATMVolToSABRAlpha(F0, ATMVol, tex, Beta, RhoB, NuB, Shift, VolType)
+
+    #One kernel call for the whole stencil:
+    Kernel = SABRtoBlack76 if VolType == 'Lognormal' else SABRtoBachelier
+    Vols = Kernel(F0, K, tex, AlphaB, Beta, RhoB, NuB, Shift)
+
+    Jacobian = np.stack([(Vols[..., 1 + 2 * j] - Vols[..., 2 + 2 * j]) / (2 * h[j][..., 0]) for j in range(nparams)], axis=-1)
+
+    ResultsList = {'SABR_Vols': Vols[..., 0],
+                   'SABR_Jacobian': Jacobian,
+                   'SABR_Alpha': np.broadcast_to(AlphaB, Vols.shape)[..., 0]}
+
+    return ResultsList
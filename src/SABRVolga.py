@@ -5,17 +5,20 @@
 # pylint:disable=invalid-name, line-too-long
 
 from SABRtoBlack76 import SABRtoBlack76
+from SABRtoBachelier import SABRtoBachelier
 from Black76Vega import Black76Vega
+from BachelierVega import BachelierVega
 from SABRParamLinearBump import SABRParamLinearBump
 
-def SABRVolga(F0, K, tex, rfr, Alpha, Beta, Rho, Nu):
+def SABRVolga(F0, K, tex, rfr, Alpha, Beta, Rho, Nu, Shift = 0, VolType = 'Lognormal'):
     """
     #' Calculates the first-order risk with respect to changes in the vol-of-vol parameter, using a
     #' mixture of analytical and numerical estimation methods. Assumes that all parameters provided are
     #'  ALREADY CALIBRATED, i.e. does not attempt to run any calibrations first. Using the calibrated
     #'  parameters, first calculates the Black-76-equivalent volatility, then calculates the Vega risk of the option
     #'  given the input parameters using the analytical form for Black-76 Vega, and finally calculates the adjustment
-    #'  required for the bump of SABR Nu.
+    #'  required for the bump of SABR Nu. With VolType = 'Normal' the normal (Bachelier) equivalent volatility
+    #'  and the Bachelier Vega are used instead.
     #'
     #' @param F0 Current forward rate
     #' @param K Strike rate of the option
@@ -25,6 +28,8 @@ def SABRVolga(F0, K, tex, rfr, Alpha, Beta, Rho, Nu):
     #' @param Beta Shape parameter of SABR schema, EITHER evaluated using historical data, OR preset by user
     #' @param Rho Correlation between SABR forward and diffusion processes
     #' @param Nu Vol-of-vol parameter for SABR diffusion process
+    #' @param Shift Shift added to the forward and strike(s), for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' for the Black-76-equivalent risk, or 'Normal' for the Bachelier-equivalent risk
     #'
     #' @return First-order risk against changes to vol-of-vol
     #' @export
@@ -33,6 +38,18 @@ def SABRVolga(F0, K, tex, rfr, Alpha, Beta, Rho, Nu):
     #' Rho = -0.0356, Nu = 1.0504)
 
     """
+
+    if VolType not in ['Lognormal', 'Normal']:
+        raise ValueError("Vol type MUST be 'Lognormal' or 'Normal'!")
+
+    #Shifted model - work with the shifted forward and strike throughout:
+    F0, K = F0 + Shift, K + Shift
+
+    if VolType == 'Normal':
+        #Bachelier Vega times the CENTRAL DIFFERENCE of the normal vol over a 1bp bump of Nu:
+        SABRNormVol = SABRtoBachelier(F0, K, tex, Alpha, Beta, Rho, Nu)
+        SABRCorrectionFactor = (SABRtoBachelier(F0, K, tex, Alpha, Beta, Rho, Nu + 0.00005) - SABRtoBachelier(F0, K, tex, Alpha, Beta, Rho, Nu - 0.00005)) / 0.0001
+        return BachelierVega(F0, K, SABRNormVol, tex, rfr) * SABRCorrectionFactor
     #Calculate Black-76-equivalent volatility for provided inputs:
     SABRImpVol = SABRtoBlack76(F0, K, tex, Alpha, Beta, Rho, Nu)
 
@@ -9,8 +9,10 @@ import numpy as np
 from SABRATMCalib import SABRATMCalib
 from ATMVolToSABRAlpha import ATMVolToSABRAlpha
 from SABRtoBlack76 import SABRtoBlack76
+from SABRtoBachelier import SABRtoBachelier
 
-def SABRVolsFromATMCalib(F0, ATMVol, Strikes, MarketVols, tex, Beta, guess_Rho, guess_Nu):
+def SABRVolsFromATMCalib(F0, ATMVol, Strikes, MarketVols, tex, Beta, guess_Rho, guess_Nu, deadline = None, max_evals = None, fallback_params = None,
+                     Shift = 0, VolType = 'Lognormal', Weights = None, Loss = 'linear', LossScale = 0.01):
     """
     #' Runs the complete calibration against market volatilities and strikes by calling the ATM
     #' calibration method, SABRATMCALIB.
@@ -23,9 +25,18 @@ def SABRVolsFromATMCalib(F0, ATMVol, Strikes, MarketVols, tex, Beta, guess_Rho,
     #' @param Beta Shape parameter of SABR schema, EITHER evaluated using historical data OR preset by user
     #' @param guess_Rho Initial user-defined guess of Rho value, MUST be bounded between -1 and 1
     #' @param guess_Nu Initial user-defined guess of Nu value, MUST be non-zero
+    #' @param deadline Optional absolute time.monotonic() time by which the calibration must stop
+    #' @param max_evals Optional maximum number of SSE evaluations in the calibration
+    #' @param fallback_params Optional previously published Rho/Nu to fall back to if the calibration stops early
+    #' @param Shift Shift added to the forward and strikes, for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' if the market vols are Black-76 vols, or 'Normal' if they are normal (Bachelier) vols, in which case the returned vols are normal vols too
+    #' @param Weights Optional VECTOR of non-negative quote weights, e.g. a row of SABR_Weights from SABRQUOTEFILTER
+    #' @param Loss One of RobustLosses ('linear', 'huber' or 'soft_l1'), defaults to the plain sum of squares
+    #' @param LossScale Vol error at which the robust losses start to down-weight, in the units of the market vols
     #'
     #' @return A list object containing each of the 4 calibrated parameters, plus a vector of
-    #' the input strikes, and a vector of the calibrated Black-76-equivalent volatilities.
+    #' the input strikes, a vector of the calibrated Black-76-equivalent volatilities, and flags for a partial
+    #' (budget-limited) calibration and for a fallback to the previous parameters.
     #' @export
     #'
     #' @examples
@@ -37,17 +48,20 @@ def SABRVolsFromATMCalib(F0, ATMVol, Strikes, MarketVols, tex, Beta, guess_Rho,
 
     #Step 1: Run the calibration for SABR Rho and Nu:
     #Extract Rho and Nu from the calibration process:
-    Calib_Rho,Calib_Nu = SABRATMCalib(F0, ATMVol, Strikes, MarketVols, tex, Beta, guess_Rho, guess_Nu).x
+    CalibSet = SABRATMCalib(F0, ATMVol, Strikes, MarketVols, tex, Beta, guess_Rho, guess_Nu, deadline, max_evals, fallback_params, Shift, VolType,
+                            Weights, Loss, LossScale)
+    Calib_Rho,Calib_Nu = CalibSet.x
 
     #Step 2: Calculate the calibrated SABR ATM Alpha:
-    Calib_Alpha = ATMVolToSABRAlpha(F0, ATMVol, tex, Beta, Calib_Rho, Calib_Nu)
+    Calib_Alpha = ATMVolToSABRAlpha(F0, ATMVol, tex, Beta, Calib_Rho, Calib_Nu, Shift, VolType)
 
     #Step 3: Calculate the calibrated SABR Black-76 equivalent vols:
     n = len(Strikes)
     Calib_SABRVols = np.zeros(n)
+    Kernel = SABRtoBlack76 if VolType == 'Lognormal' else SABRtoBachelier
 
     for i in range(n):
-        Calib_SABRVols[i] = SABRtoBlack76(F0, Strikes[i], tex, Calib_Alpha, Beta, Calib_Rho, Calib_Nu)
+        Calib_SABRVols[i] = Kernel(F0, Strikes[i], tex, Calib_Alpha, Beta, Calib_Rho, Calib_Nu, Shift)
 
     #Step 4: Combine the results into a list of items to return:
     ResultsList = {'SABR_Alpha': Calib_Alpha,
@@ -55,6 +69,8 @@ def SABRVolsFromATMCalib(F0, ATMVol, Strikes, MarketVols, tex, Beta, guess_Rho,
                    'SABR_Rho': Calib_Rho,
                    'SABR_Nu': Calib_Nu,
                    'SABR_Strikes': Strikes,
-                   'SABR_Vols': Calib_SABRVols}
+                   'SABR_Vols': Calib_SABRVols,
+                   'SABR_Partial': CalibSet.partial,
+                   'SABR_Fallback': CalibSet.fallback}
 
     return ResultsList
@@ -0,0 +1,55 @@
+"""
+#' Convert from SABR to Normal (Bachelier) Volatility
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+
+def SABRtoBachelier(F0, K, tex, Alpha, Beta, Rho, Nu, Shift = 0):
+    """
+    #' Returns the normal (Bachelier) EQUIVALENT volatility of the SABR model, using the formulation found in
+    #' Eqn B.69a of 'Managing Smile Risk' by Hagan et al, 2002. Unlike the Black-76 equivalent vol, the normal
+    #' vol stays meaningful for forwards and strikes at or below zero once they are shifted positive, so it
+    #' is the quoting convention of negative-rate (e.g. EUR and JPY) cubes.
+    #'
+    #' @param F0 Current forward rate
+    #' @param K Strike rate of the option, or a VECTOR of strikes (all inputs broadcast against each other)
+    #' @param tex Time ot expiry of the option, measured in years
+    #' @param Alpha Diffusion parameter in the SABR scheme, calibrated as a result of using one of two methods
+    #' @param Beta Shape parameter of SABR schema, EITHER evaluated using historical data, OR preset by user
+    #' @param Rho Correlation between SABR forward and diffusion processes
+    #' @param Nu Vol-of-vol parameter for SABR diffusion process
+    #' @param Shift Shift added to the forward and strike(s), for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #'
+    #' @return Normal (Bachelier) equivalent volatility, in absolute rate terms, one per strike
+    #' @export
+    #'
+    #' @examples
+    #' SABRtoBachelier(F0 = -0.0020, K = np.array([-0.0050, -0.0020, 0.0050]), tex = 1, Alpha = 0.0150, Beta = 0.5,
+    #'  Rho = -0.2, Nu = 0.4, Shift = 0.03)
+    """
+
+    #Allow vectors (or any broadcastable arrays) of strikes and parameters:
+    F0, K, tex, Alpha, Beta, Rho, Nu = [np.asarray(x, dtype=float) for x in (F0, K, tex, Alpha, Beta, Rho, Nu)]
+
+    #Shifted model - work with the shifted forward and strike throughout:
+    F0, K = F0 + Shift, K + Shift
+
+    #Setup a series of coefficients that will then be multiplied together:
+    L = np.log(F0 / K)
+    k1 = (F0 * K) ** (Beta / 2)
+    k2 = (1 + L ** 2 / 24 + L ** 4 / 1920) / (1 + (1 - Beta) ** 2 / 24 * L ** 2 + (1 - Beta) ** 4 / 1920 * L ** 4)
+    z = Nu / Alpha * (F0 * K) ** ((1 - Beta) / 2) * L
+    k3 = -Beta * (2 - Beta) / 24 * Alpha ** 2 / ((F0 * K) ** (1 - Beta))
+    k4 = 1 / 4 * Rho * Beta * Nu * Alpha / ((F0 * K) ** ((1 - Beta) / 2))
+    k5 = (2 - 3 * Rho ** 2) / 24 * Nu ** 2
+
+    #z / x(z) tends to 1 at the money, so only evaluate it for the options away from the money:
+    ATM = F0 == K
+    z = np.where(ATM, 1, z)
+    xz = np.log((np.sqrt(1 - 2 * Rho * z + z ** 2) + z - Rho) / (1 - Rho))
+
+    Vol = Alpha * k1 * k2 * np.where(ATM, 1, z / np.where(ATM, 1, xz)) * (1 + tex * (k3 + k4 + k5))
+
+    return Vol[()]
@@ -6,20 +6,21 @@
 
 import numpy as np
 
-def SABRtoBlack76(F0, K, tex, Alpha, Beta, Rho, Nu):
+def SABRtoBlack76(F0, K, tex, Alpha, Beta, Rho, Nu, Shift = 0):
     """
     #' Returns the Black-76 EQUIVALENT volatility after calibrating for SABR Alpha, Beta, Rho, and Nu, using the formulation found in
     #' Eqn 2.17 of 'Managing Smile Risk' by Hagan et al, 2002. Base function for all other calibrations
     #'
     #' @param F0 Current forward rate
-    #' @param K Strike rate of the option
+    #' @param K Strike rate of the option, or a VECTOR of strikes (all inputs broadcast against each other)
     #' @param tex Time ot expiry of the option, measured in years
     #' @param Alpha Diffusion parameter in the SABR scheme, calibrated as a result of using one of two methods
     #' @param Beta Shape parameter of SABR schema, EITHER evaluated using historical data, OR preset by user
     #' @param Rho Correlation between SABR forward and diffusion processes
     #' @param Nu Vol-of-vol parameter for SABR diffusion process
+    #' @param Shift Shift added to the forward and strike(s), for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
     #'
-    #' @return Black-76-equivalent volatility that can then be plugged into usual Black-76 closed-form option price
+    #' @return Black-76-equivalent volatility (one per strike) that can then be plugged into usual Black-76 closed-form option price
     #' @export
     #'
     #' @examples
@@ -33,20 +34,25 @@ def SABRtoBlack76(F0, K, tex, Alpha, Beta, Rho, Nu):
     #'  Nu = 1.0504)
     """
 
+    #Allow vectors (or any broadcastable arrays) of strikes and parameters:
+    F0, K, tex, Alpha, Beta, Rho, Nu = [np.asarray(x, dtype=float) for x in (F0, K, tex, Alpha, Beta, Rho, Nu)]
+
+    #Shifted model - work with the shifted forward and strike throughout:
+    F0, K = F0 + Shift, K + Shift
+
     #Setup a series of coefficients that will then be multiplied together:
     k1 = (F0 * K) ** ((1 - Beta) / 2)
     k2 = 1 + (1 - Beta)**2 / 24 * (np.log(F0 / K)) **2 + (1 - Beta)**4 / 1920 * np.log(F0 / K) ** 4
     z = Nu / Alpha * (F0 * K) ** ((1 - Beta) / 2) * np.log(F0 / K)
-    xz = np.log((np.sqrt(1 - 2 * Rho * z + z **2) + z - Rho) / (1 - Rho))
     k3 = (1 - Beta) **2 / 24 * Alpha **2 / ((F0 * K) ** ( 1 - Beta))
     k4 = 1 / 4 * Rho * Beta * Nu * Alpha / (((F0 * K) ** ((1 - Beta) / 2)))
     k5 = (2 - 3 * Rho ** 2) / 24 * Nu ** 2
 
-    if F0 != K:
-        try:
-            return (Alpha / (k1 * k2)) * (z / xz) * (1 + tex *(k3 + k4 + k5))
-        except:
-            breakpoint()
-            raise
+    #z / x(z) tends to 1 at the money, so only evaluate it for the options away from the money:
+    ATM = F0 == K
+    z = np.where(ATM, 1, z)
+    xz = np.log((np.sqrt(1 - 2 * Rho * z + z **2) + z - Rho) / (1 - Rho))
+
+    Vol = (Alpha / (k1 * k2)) * np.where(ATM, 1, z / np.where(ATM, 1, xz)) * (1 + tex *(k3 + k4 + k5))
 
-    return (Alpha / (k1 * k2) * 1 * (1 + tex *(k3 + k4 + k5)))
+    return Vol[()]
@@ -0,0 +1,127 @@
+"""
+#' Reverse-Mode (Adjoint) Derivatives of the SABR to Black-76 Volatility Conversion
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+
+def SABRtoBlack76Adjoint(F0, K, tex, Alpha, Beta, Rho, Nu, VolBar = 1, Shift = 0):
+    """
+    #' Evaluates the Black-76-equivalent SABR vol of SABRTOBLACK76 and then sweeps backwards through the same
+    #' formula (algorithmic differentiation in reverse mode), propagating the adjoint VolBar of each vol
+    #' to ALL of its inputs at once. The cost is a small constant multiple of one vol evaluation, whatever
+    #' the number of inputs. At the money the z / x(z) term is differentiated through its limit,
+    #' d(z / x(z))/dz = -Rho / 2 at z = 0, so the derivatives are continuous across F0 = K.
+    #'
+    #' @param F0 Current forward rate
+    #' @param K Strike rate of the option, or a VECTOR of strikes (all inputs broadcast against each other)
+    #' @param tex Time ot expiry of the option, measured in years
+    #' @param Alpha Diffusion parameter in the SABR scheme, calibrated as a result of using one of two methods
+    #' @param Beta Shape parameter of SABR schema, EITHER evaluated using historical data, OR preset by user
+    #' @param Rho Correlation between SABR forward and diffusion processes
+    #' @param Nu Vol-of-vol parameter for SABR diffusion process
+    #' @param VolBar Adjoint (sensitivity of the final output) of each vol, defaults to 1 for plain partial derivatives
+    #' @param Shift Shift added to the forward and strike(s), for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #'
+    #' @return A list object containing the SABR vols and VolBar times their partial derivatives with respect
+    #' to F0, K, tex, Alpha, Beta, Rho, and Nu
+    #' @export
+    #'
+    #' @examples SABRtoBlack76Adjoint(F0 = 0.0266, K = 0.0250, tex = 0.25, Alpha = 0.0651, Beta = 0.5,
+    #' Rho = -0.0356, Nu = 1.0504)
+    """
+
+    F0, K, tex, Alpha, Beta, Rho, Nu, VolBar = np.broadcast_arrays(*[np.asarray(x, dtype=float) for x in (F0, K, tex, Alpha, Beta, Rho, Nu, VolBar)])
+
+    #Shifted model - work with the shifted forward and strike throughout:
+    F0, K = F0 + Shift, K + Shift
+
+    #Forward sweep - same formula as SABRTOBLACK76, keeping the intermediate values:
+    L = np.log(F0 / K)
+    e = (1 - Beta) / 2
+    P = (F0 * K) ** e
+    a = (1 - Beta) ** 2 / 24
+    b = (1 - Beta) ** 4 / 1920
+    k2 = 1 + a * L ** 2 + b * L ** 4
+    z = Nu / Alpha * P * L
+    k3 = a * Alpha ** 2 / P ** 2
+    k4 = 1 / 4 * Rho * Beta * Nu * Alpha / P
+    k5 = (2 - 3 * Rho ** 2) / 24 * Nu ** 2
+    S = k3 + k4 + k5
+    C = 1 + tex * S
+    A = Alpha / (P * k2)
+
+    ATM = F0 == K
+    zz = np.where(ATM, 1, z)
+    D = np.sqrt(1 - 2 * Rho * zz + zz ** 2)
+    N = D + zz - Rho
+    xz = np.where(ATM, 1, np.log(N / (1 - Rho)))
+    R = np.where(ATM, 1, zz / xz)
+
+    Vol = A * R * C
+
+    #Reverse sweep:
+    Abar = VolBar * R * C
+    Rbar = VolBar * A * C
+    Cbar = VolBar * A * R
+
+    texbar = Cbar * S
+    Sbar = Cbar * tex
+
+    #z / x(z), with its limit slope of -Rho / 2 at the money:
+    xzbar = np.where(ATM, 0, -Rbar * zz / xz ** 2)
+    Nbar = xzbar / N
+    Dbar = Nbar
+    zbar = np.where(ATM, -Rho / 2 * Rbar, Rbar / xz + Nbar + Dbar * (zz - Rho) / D)
+    Rhobar = xzbar / (1 - Rho) - Nbar - Dbar * zz / D
+
+    #z = Nu * P * L / Alpha:
+    Nubar = zbar * P * L / Alpha
+    Pbar = zbar * Nu * L / Alpha
+    Lbar = zbar * Nu * P / Alpha
+    Alphabar = -zbar * z / Alpha
+
+    #k5 = (2 - 3 Rho^2) / 24 Nu^2:
+    Rhobar += Sbar * -6 * Rho / 24 * Nu ** 2
+    Nubar += Sbar * (2 - 3 * Rho ** 2) / 24 * 2 * Nu
+
+    #k4 = Rho Beta Nu Alpha / (4 P):
+    Rhobar += Sbar * Beta * Nu * Alpha / (4 * P)
+    Betabar = Sbar * Rho * Nu * Alpha / (4 * P)
+    Nubar += Sbar * Rho * Beta * Alpha / (4 * P)
+    Alphabar += Sbar * Rho * Beta * Nu / (4 * P)
+    Pbar -= Sbar * k4 / P
+
+    #k3 = a Alpha^2 / P^2:
+    Alphabar += Sbar * 2 * k3 / Alpha
+    Pbar -= Sbar * 2 * k3 / P
+    abar = Sbar * Alpha ** 2 / P ** 2
+
+    #A = Alpha / (P k2):
+    Alphabar += Abar / (P * k2)
+    Pbar -= Abar * A / P
+    k2bar = -Abar * A / k2
+
+    #k2 = 1 + a L^2 + b L^4:
+    Lbar += k2bar * (2 * a * L + 4 * b * L ** 3)
+    abar += k2bar * L ** 2
+    bbar = k2bar * L ** 4
+
+    #a, b and P all depend on Beta:
+    Betabar += abar * -2 * (1 - Beta) / 24 + bbar * -4 * (1 - Beta) ** 3 / 1920 - Pbar * P * np.log(F0 * K) / 2
+
+    #P = (F0 K)^e and L = log(F0 / K):
+    F0bar = Pbar * e * P / F0 + Lbar / F0
+    Kbar = Pbar * e * P / K - Lbar / K
+
+    ResultsList = {'SABR_Vols': Vol[()],
+                   'dF0': F0bar[()],
+                   'dK': Kbar[()],
+                   'dtex': texbar[()],
+                   'dAlpha': Alphabar[()],
+                   'dBeta': Betabar[()],
+                   'dRho': Rhobar[()],
+                   'dNu': Nubar[()]}
+
+    return ResultsList
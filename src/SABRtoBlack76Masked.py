@@ -0,0 +1,68 @@
+"""
+#' Batch-Safe Conversion from SABR to Black-76 Volatility with Status Codes
+"""
+
+# pylint:disable=invalid-name, line-too-long
+
+import numpy as np
+
+from SABRtoBlack76 import SABRtoBlack76
+from SABRtoBachelier import SABRtoBachelier
+
+#Per-element status codes returned alongside the vols:
+StatusCodes = {0: 'OK',
+               1: 'Invalid inputs (shifted F0, K and Alpha must be positive, tex and Nu non-negative, Rho within (-1, 1))',
+               2: 'x(z) undefined - overflow or cancellation in the sqrt/log term',
+               3: 'Non-finite or non-positive vol'}
+
+def SABRtoBlack76Masked(F0, K, tex, Alpha, Beta, Rho, Nu, Shift = 0, VolType = 'Lognormal'):
+    """
+    #' Batch-safe version of SABRTOBLACK76. Evaluates the same Hagan et al (2002) formula with all
+    #' floating-point errors suppressed, whatever np.seterr says, and instead of raising returns NaN for
+    #' every element that could not be evaluated, together with a per-element status code (see
+    #' StatusCodes). One pathological strike therefore never aborts a batch. With VolType = 'Normal' the
+    #' normal vols of SABRTOBACHELIER are returned instead, under the same masking.
+    #'
+    #' @param F0 Current forward rate
+    #' @param K Strike rate of the option, or a VECTOR of strikes (all inputs broadcast against each other)
+    #' @param tex Time ot expiry of the option, measured in years
+    #' @param Alpha Diffusion parameter in the SABR scheme, calibrated as a result of using one of two methods
+    #' @param Beta Shape parameter of SABR schema, EITHER evaluated using historical data, OR preset by user
+    #' @param Rho Correlation between SABR forward and diffusion processes
+    #' @param Nu Vol-of-vol parameter for SABR diffusion process
+    #' @param Shift Shift added to the forward and strike(s), for shifted SABR on negative rates (defaults to 0, i.e. unshifted)
+    #' @param VolType 'Lognormal' for Black-76-equivalent vols, or 'Normal' for normal (Bachelier) vols
+    #'
+    #' @return Tuple of the Black-76-equivalent (or normal) vols (NaN where evaluation failed) and the integer status codes
+    #' @export
+    #'
+    #' @examples
+    #' ### Alpha at the lower calibration bound
+    #' SABRtoBlack76Masked(F0 = 0.0266, K = np.array([0.0100, 0.0266]), tex = 0.25, Alpha = 1e-9, Beta = 0.5,
+    #'  Rho = -0.0356, Nu = 1.0504)
+    """
+
+    if VolType not in ['Lognormal', 'Normal']:
+        raise ValueError("Vol type MUST be 'Lognormal' or 'Normal'!")
+
+    F0, K, tex, Alpha, Beta, Rho, Nu = np.broadcast_arrays(*[np.asarray(x, dtype=float) for x in (F0, K, tex, Alpha, Beta, Rho, Nu)])
+
+    #Shifted model - work with the shifted forward and strike throughout:
+    F0, K = F0 + Shift, K + Shift
+
+    with np.errstate(all='ignore'):
+        Kernel = SABRtoBlack76 if VolType == 'Lognormal' else SABRtoBachelier
+        Vol = np.asarray(Kernel(F0, K, tex, Alpha, Beta, Rho, Nu))
+
+        #Re-trace the x(z) term to tell its failures apart from other non-finite results:
+        z = Nu / Alpha * (F0 * K) ** ((1 - Beta) / 2) * np.log(F0 / K)
+        xzarg = (np.sqrt(1 - 2 * Rho * z + z **2) + z - Rho) / (1 - Rho)
+        BadXZ = (F0 != K) & ~(np.isfinite(xzarg) & (xzarg > 0) & (xzarg != 1))
+
+        Invalid = ~((F0 > 0) & (K > 0) & (tex >= 0) & (Alpha > 0) & (np.abs(Rho) < 1) & (Nu >= 0) & np.isfinite(Beta))
+        BadVol = ~(np.isfinite(Vol) & (Vol > 0))
+
+    Status = np.where(Invalid, 1, np.where(BadXZ, 2, np.where(BadVol, 3, 0)))
+    Vol = np.where(Status == 0, Vol, np.nan)
+
+    return Vol[()], Status[()]
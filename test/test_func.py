@@ -4,7 +4,10 @@
 test
 """
 
+import importlib.util
+import os
 import sys
+import tempfile
 sys.path.insert(0, '../src/')
 
 import numpy as np
@@ -14,17 +17,43 @@ from Black76Vega import Black76Vega
 from Black76OptionPrice import Black76OptionPrice
 
 from SABRDelta import SABRDelta
+from SABRDeltaToStrike import SABRDeltaToStrike
+from SABRReplication import SABRCMSPrice
+from SABRQuoteFilter import SABRQuoteFilter
 from SABRGamma import SABRGamma
 from SABRVega import SABRVega
 from SABRVanna import SABRVanna
 from SABRVolga import SABRVolga
 
 from SABRtoBlack76 import SABRtoBlack76
+from SABRtoBachelier import SABRtoBachelier
 from SABRAlphaCubic import SABRAlphaCubic
 from ATMVolToSABRAlpha import ATMVolToSABRAlpha
 
 from SABRVolsFromATMCalib import SABRVolsFromATMCalib
 from SABRVolsFromFullCalib import SABRVolsFromFullCalib
+from SABRBatchFullCalib import SABRBatchFullCalib
+from SABRBatchATMCalib import SABRBatchATMCalib
+from SABRBatchLM import SABRBatchLM
+from SABRATMCalib import SABRATMCalib
+from SABRFullCalib import SABRFullCalib
+from SABRBetaProfile import SABRBetaProfile
+from SABRDataIO import SABRDataWrite, SABRDataRead
+from SABRParamRegistry import SABRParamRegistryPublish, SABRParamRegistryAttach, SABRParamRegistryRefresh, SABRParamRegistryClose
+from SABRBookAdjoint import SABRBookAdjoint
+from SABRBumpLadder import SABRBumpLadder
+from SABRMonteCarlo import SABRMonteCarlo
+from SABRQuoteVega import SABRQuoteVega
+from SABRParamStore import SABRParamStoreAppend, SABRParamStoreLoad
+from SABRSurfaceCalib import SABRSurfaceCalib
+from SABRtoBlack76Masked import SABRtoBlack76Masked
+from BachelierOptionPrice import BachelierOptionPrice
+from SABRDensityCheck import SABRDensityCheck
+from SABRJointCalib import SABRJointCalib
+from SABRGraph import SABRGraphBuild, SABRGraphInput, SABRGraphGet
+from SABRHedgeBacktest import SABRHedgeBacktest
+from SABRMicroBatch import SABRMicroBatchStart, SABRMicroBatchSubmit, SABRMicroBatchStop
+from SABRExecutionPlanner import SABRPlanRun, SABRPlanChoose
 
 def test(value, func):
     """
@@ -106,3 +135,264 @@ if __name__ == '__main__':
     )
 
     print(full_calib)
+
+    batch_calib = SABRBatchFullCalib(
+        0.0266,
+        [[0.0266, 0.0100, 0.0150, 0.0200, 0.0250, 0.0300, 0.0350, 0.0400, 0.0500, 0.0600, 0.0700, 0.0800, 0.0900, 0.1000]],
+        [[0.4084, 0.7376, 0.5685, 0.4668, 0.4154, 0.4048, 0.4161, 0.4347, 0.4734, 0.5072, 0.5358, 0.5602, 0.5813, 0.5998]],
+        0.25,
+        0.5,
+        0.05,
+        0.1,
+        0.7
+    )
+
+    test(full_calib['SABR_Alpha'], lambda: batch_calib.x[0, 0])
+    test(full_calib['SABR_Rho'], lambda: batch_calib.x[0, 1])
+    test(full_calib['SABR_Nu'], lambda: batch_calib.x[0, 2])
+
+    test(False, lambda: SABRDensityCheck(0.0266, 0.25, full_calib['SABR_Alpha'], 0.5, full_calib['SABR_Rho'], full_calib['SABR_Nu'])['SABR_ButterflyArbitrage'][0])
+    test(True, lambda: SABRDensityCheck(2.5271/100, 10, 0.02, 0.5, -0.3, 0.5)['SABR_ButterflyArbitrage'][0])
+
+    joint_calib = SABRJointCalib(
+        [0.0266, 0.0266],
+        [[0.0266, 0.0100, 0.0150, 0.0200, 0.0250, 0.0300, 0.0350, 0.0400, 0.0500, 0.0600, 0.0700, 0.0800, 0.0900, 0.1000]] * 2,
+        [[0.4084, 0.7376, 0.5685, 0.4668, 0.4154, 0.4048, 0.4161, 0.4347, 0.4734, 0.5072, 0.5358, 0.5602, 0.5813, 0.5998]] * 2,
+        [0.25, 0.5],
+        0.5,
+        0.05,
+        0.1,
+        0.7,
+        Smoothness = 0
+    )
+
+    test(full_calib['SABR_Alpha'], lambda: joint_calib['SABR_Alpha'][0])
+
+    quotes = ([0.0266, 0.0100, 0.0150, 0.0200, 0.0250, 0.0300, 0.0350, 0.0400, 0.0500, 0.0600, 0.0700, 0.0800, 0.0900, 0.1000],
+              [0.4084, 0.7376, 0.5685, 0.4668, 0.4154, 0.4048, 0.4161, 0.4347, 0.4734, 0.5072, 0.5358, 0.5602, 0.5813, 0.5998])
+
+    try:
+        SABRJointCalib([0.0266, 0.0266], [quotes[0]] * 2, [quotes[1]] * 2, [0.25, 0.5], 0.5, 0.05, 0.1, 0.7)
+        grouped = False
+    except ValueError:
+        grouped = True
+    joint_atm = SABRJointCalib([0.0266, 0.0266], [[0.0266, 0.0300]] * 2, [[0.4084, 0.4048]] * 2, [0.25, 10], 1, 0.05, -0.9, 3, ATMVol = 0.4084, Smoothness = 0)
+
+    test(True, lambda: grouped)
+    test(True, lambda: joint_atm['SABR_Fitted'][0] and not joint_atm['SABR_Fitted'][1])
+    test(True, lambda: np.isnan(joint_atm['SABR_Alpha'][1]))
+
+    graph = SABRGraphBuild(['3M10Y', '6M10Y'], 0.0266, [quotes[0]] * 2, [quotes[1]] * 2, [0.25, 0.5], 0.5, 0.05, 0.1, 0.7,
+                           ['3M10Y', '6M10Y'], [0.025, 0.025], 'c', [0, 1], [0.02, 0.02])
+
+    test(full_calib['SABR_Alpha'], lambda: SABRGraphGet(graph, ['Price/0', 'Price/1', 'Params/3M10Y'])[2][0])
+    SABRGraphInput(graph, 'Quotes/6M10Y', quotes)
+    SABRGraphGet(graph, ['Price/0', 'Price/1'])
+    test(3, lambda: len(graph['Recomputed']))
+
+    backtest = SABRHedgeBacktest(['2021-08-31', '2021-09-30'], [0.011179, 0.013013], [0.666428, 0.558672], 0.25, 0.5, 0.02668178, 0.9025896, 0.025, 0.25, rfr = 0.02)
+
+    test(SABRDelta(0.011179, 0.025, 0.25, 0.02, "c", backtest['BT_Alpha'][0], 0.5, 0.02668178, 0.9025896), lambda: backtest['BT_Deltas'][0, 0, 0])
+
+    dispatcher = SABRMicroBatchStart(SABRtoBlack76)
+    futures = [SABRMicroBatchSubmit(dispatcher, k, 0.025, 0.25, 0.06943288, 0.5, 0.02668178, 0.9025896) for k in (0.018, 0.03)]
+    SABRMicroBatchStop(dispatcher)
+
+    test(0.5165779, lambda: futures[0].result())
+    test(0.435243, lambda: futures[1].result())
+
+    planned = SABRPlanRun('Vols', {'F0': [0.018, 0.03], 'K': 0.025, 'tex': 0.25, 'Alpha': 0.06943288, 'Beta': 0.5, 'Rho': 0.02668178, 'Nu': 0.9025896}, Strategy = 'scalar')
+
+    test(0.435243, lambda: planned['Result'][1])
+
+    test(0.015, lambda: ATMVolToSABRAlpha(-0.002, SABRtoBachelier(-0.002, -0.002, 1, 0.015, 0.5, -0.2, 0.4, 0.03), 1, 0.5, -0.2, 0.4, 0.03, 'Normal'))
+
+    test(0.25, lambda: SABRDelta(0.0266, SABRDeltaToStrike(0.0266, 0.25, 0.25, 0.02, 'c', 0.0651, 0.5, -0.0356, 1.0504)['SABR_Strikes'], 0.25, 0.02, 'c', 0.0651, 0.5, -0.0356, 1.0504))
+
+    cms = SABRCMSPrice(0.0266, 0.03, 0.25, 0.0651, 0.5, -0.0356, 1.0504, Tenor = 10, Payoff = 'c', Check = True)
+
+    test(0.0, lambda: round(cms['SABR_QuadErrors'][0] / cms['SABR_Prices'][0], 6))
+
+    filter_strikes = np.array([0.0266, 0.0100, 0.0150, 0.0200, 0.0250, 0.0300, 0.0350, 0.0400, 0.0500, 0.0600, 0.0700, 0.0800, 0.0900, 0.1000])
+    filter_vols = np.array([0.4084, 0.7376, 0.5685, 0.4668, 0.4154, 0.4048, 0.4161, 0.4347, 0.6234, 0.5072, 0.5358, 0.5602, 0.5813, 0.5998])
+    quote_filter = SABRQuoteFilter(
+        0.0266,
+        [filter_strikes],
+        [filter_vols],
+        0.25,
+        0.5,
+        full_calib['SABR_Alpha'],
+        full_calib['SABR_Rho'],
+        full_calib['SABR_Nu'],
+        Action = 'drop'
+    )
+
+    test(8, lambda: quote_filter['SABR_Flags'][0, 8] & 8)
+    test(1, lambda: quote_filter['SABR_Flagged'][0])
+
+    filtered_calib = SABRFullCalib(0.0266, filter_strikes, quote_filter['SABR_MarketVols'][0], 0.25, 0.5, 0.05, 0.05, 0.7, Weights = quote_filter['SABR_Weights'][0])
+    dropped_calib = SABRFullCalib(0.0266, np.delete(filter_strikes, 8), np.delete(filter_vols, 8), 0.25, 0.5, 0.05, 0.05, 0.7)
+
+    test(True, lambda: np.isfinite(filtered_calib.fun))
+    test(0.0, lambda: round(np.abs(filtered_calib.x - dropped_calib.x).max(), 6))
+    test(True, lambda: np.isfinite(SABRATMCalib(0.0266, 0.4084, filter_strikes, quote_filter['SABR_MarketVols'][0], 0.25, 0.5, 0.05, 0.7,
+                                                Weights = quote_filter['SABR_Weights'][0]).fun))
+
+    test(ATMVolToSABRAlpha(0.0266, 0.4084, 0.25, 1, 0.1, 0.5), lambda: ATMVolToSABRAlpha(np.array([0.0266]), 0.4084, 0.25, 1, 0.1, 0.5)[0])
+    test(True, lambda: np.isnan(ATMVolToSABRAlpha(np.array([0.0266]), 0.4084, 10, 1, -0.9, 3)[0]))
+    test(True, lambda: np.isnan(ATMVolToSABRAlpha(0.0266, 0.4084, 10, 1, -0.9, 3)))
+    test(True, lambda: np.isfinite(SABRATMCalib(0.0266, 0.4084, [0.0266, 0.0300], [0.4084, 0.4048], 10, 1, -0.9, 3, max_evals = 20).x).all())
+    test(-1, lambda: SABRBatchFullCalib(0.0266, [[0.0266, 0.0300], [np.nan, np.nan]], [[0.4084, 0.4048], [np.nan, np.nan]], 0.25, 0.5, 0.05, 0.05, 0.5).status[1])
+    test(-1, lambda: SABRBatchATMCalib(0.0266, 0.4084, [[np.nan, np.nan]], [[np.nan, np.nan]], 0.25, 0.5, 0.05, 0.5).status[0])
+    test(-2, lambda: SABRBatchLM(lambda x, rows: (np.where(x > 0.5, np.nan, 1 + 0 * x), np.ones((len(x), 1, 1))), np.zeros((1, 1)), [-10], [10]).status[0])
+    test(-1, lambda: SABRBatchATMCalib(0.0266, 0.4084, [[0.0266, 0.0300]], [[0.4084, 0.4048]], 10, 1, -0.9, 3, max_iter = 0).status[0])
+
+    profile = SABRBetaProfile(0.0266, [quotes[0]], [quotes[1]], 10, [0.5, 1.0], guess_Rho = -0.9, guess_Nu = 3, ATMVol = 0.4084, max_iter = 0)
+
+    test(-1, lambda: profile['SABR_Status'][0, 1])
+    test(0.5, lambda: profile['SABR_BestBeta'][0])
+
+    gap = SABRHedgeBacktest(['2021-08-31', '2021-09-30', '2021-10-29'], [0.02, 0.021, 0.022], [0.05, 0.4, 0.05], 10, 1, -0.9, 0.5, 0.02, 0.5)
+
+    test(True, lambda: np.isnan(gap['BT_Alpha'][1]) and np.isnan(gap['BT_Deltas'][0, 1, 0]))
+    nogap = SABRHedgeBacktest(['2021-08-31', '2021-10-29'], [0.02, 0.022], [0.05, 0.05], 10, 1, -0.9, 0.5, 0.02, 0.5)
+    settle_gap = SABRHedgeBacktest(['2021-08-31', '2021-09-30', '2021-10-29'], [0.02, 0.021, 0.022], [0.05, 0.4, 0.05], 10, 1, -0.9, 0.5, 0.02, 0.1, ChunkSize = 1)
+    settle_nogap = SABRHedgeBacktest(['2021-08-31', '2021-10-29'], [0.02, 0.022], [0.05, 0.05], 10, 1, -0.9, 0.5, 0.02, 0.1)
+
+    test(0.00054862, lambda: gap['BT_PnL'][0, 2, 0])
+    test(0.0, lambda: np.abs(gap['BT_TotalPnL'] - nogap['BT_TotalPnL']).max())
+    test(0.00079498, lambda: settle_gap['BT_TotalPnL'][0, 0])
+    test(0.0, lambda: np.abs(settle_gap['BT_TotalPnL'] - settle_nogap['BT_TotalPnL']).max())
+
+    normal_strikes = np.array([-0.008, -0.005, -0.002, 0.0, 0.003, 0.008, 0.015])
+    normal_vols = SABRtoBachelier(-0.002, normal_strikes, 1, 0.015, 0.5, -0.2, 0.4, 0.03)
+    normal_surface = SABRSurfaceCalib(['1Y10Y'], -0.002, [normal_strikes], [normal_vols], 1, 0.5, 0.01, 0.0, 0.5, Shift = 0.03, VolType = 'Normal')
+
+    test(0.015, lambda: round(normal_surface['SABR_Alpha'][0], 6))
+    test(0.0, lambda: round(np.abs(normal_surface['SABR_Vols'][0] - normal_vols).max(), 6))
+    test(round((BachelierOptionPrice(-0.002 + 1e-6, 0.001, SABRtoBachelier(-0.002 + 1e-6, 0.001, 1, 0.015, 0.5, -0.2, 0.4, 0.03), 1, 0.02, 'c') -
+                BachelierOptionPrice(-0.002 - 1e-6, 0.001, SABRtoBachelier(-0.002 - 1e-6, 0.001, 1, 0.015, 0.5, -0.2, 0.4, 0.03), 1, 0.02, 'c')) / 2e-6, 5),
+         lambda: round(SABRDelta(-0.002, 0.001, 1, 0.02, 'c', 0.015, 0.5, -0.2, 0.4, 0.03, 'Normal'), 5))
+    test(81.0325, lambda: round(SABRGamma(-0.002, 0.001, 1, 0.02, 0.015, 0.5, -0.2, 0.4, 0.03, 'Normal'), 4))
+    test(0.0001271783, lambda: SABRVanna(-0.002, 0.001, 1, 0.02, 0.015, 0.5, -0.2, 0.4, 0.03, 'Normal'))
+    test(6.316761e-05, lambda: SABRVolga(-0.002, 0.001, 1, 0.02, 0.015, 0.5, -0.2, 0.4, 0.03, 'Normal'))
+
+    normal_filter = SABRQuoteFilter(-0.002, [np.append(-0.04, normal_strikes)], [np.append(0.006, normal_vols + 0.001 * (normal_strikes == 0.003))],
+                                    1, 0.5, 0.0153, -0.2, 0.4, Shift = 0.03, VolType = 'Normal')
+
+    test(1, lambda: normal_filter['SABR_Flags'][0, 0])
+    test(8, lambda: normal_filter['SABR_Flags'][0, 5])
+    test(1, lambda: normal_filter['SABR_Flagged'][0])
+
+    with np.errstate(all='raise'):
+        try:
+            SABRtoBlack76(0.0266, -0.0100, 0.25, 0.0651, 0.5, -0.0356, 1.0504)
+            raised = False
+        except FloatingPointError:
+            raised = True
+        masked = SABRtoBlack76Masked(0.0266, np.array([0.0100, 0.0266, -0.0100]), 0.25, 0.0651, 0.5, -0.0356, 1.0504)
+        surface = SABRSurfaceCalib(['Bad', '3M10Y'], 0.0266, [[0.0266, -0.0100, 0.0300], quotes[0]], [[0.4084, 0.5000, 0.4048], quotes[1]],
+                                   0.25, 0.5, 0.05, 0.1, 0.7)
+
+    test(True, lambda: raised)
+    test(1, lambda: masked[1][2])
+    test(0.0, lambda: masked[1][:2].sum())
+    test(1, lambda: surface['SABR_Status'][0])
+    test(True, lambda: np.isnan(surface['SABR_Alpha'][0]))
+    test(full_calib['SABR_Alpha'], lambda: surface['SABR_Alpha'][1])
+
+    budget_calib = SABRVolsFromFullCalib(0.0266, quotes[0], quotes[1], 0.25, 0.5, 0.05, 0.1, 0.7, max_evals = 5)
+    fallback_calib = SABRVolsFromFullCalib(0.0266, quotes[0], quotes[1], 0.25, 0.5, 0.05, 0.1, 0.7, max_evals = 5,
+                                           fallback_params = (full_calib['SABR_Alpha'], full_calib['SABR_Rho'], full_calib['SABR_Nu']))
+
+    test(True, lambda: budget_calib['SABR_Partial'] and not budget_calib['SABR_Fallback'])
+    test(True, lambda: budget_calib['SABR_Alpha'] != full_calib['SABR_Alpha'])
+    test(True, lambda: fallback_calib['SABR_Partial'] and fallback_calib['SABR_Fallback'])
+    test(full_calib['SABR_Alpha'], lambda: fallback_calib['SABR_Alpha'])
+
+    test(True, lambda: SABRPlanChoose('Calib', 10, Strategy = 'vectorised')['Estimates'] is None)
+
+    plan_calib = {'F0': 0.0266, 'Strikes': [filter_strikes, np.append(np.delete(filter_strikes, 8), np.nan)], 'MarketVols': [filter_vols, np.append(np.delete(filter_vols, 8), np.nan)],
+                  'tex': 0.25, 'Beta': 0.5, 'guess_Alpha': 0.05, 'guess_Rho': 0.05, 'guess_Nu': 0.7}
+
+    test(0.0, lambda: np.abs(SABRPlanRun('Calib', plan_calib, Strategy = 'scalar')['Result'] - SABRPlanRun('Calib', plan_calib, Strategy = 'vectorised')['Result']).max())
+
+    store = tempfile.mkdtemp()
+    SABRParamStoreAppend(store, ['2022-05-23', '2022-05-24'], '3M10Y', 'FULL', [0.0651, 0.0660], 0.5, -0.0356, 1.0504)
+
+    test(0.0660, lambda: SABRParamStoreLoad(store, '3M10Y', 'FULL', DateFrom = '2022-05-24')[('3M10Y', 'FULL')]['Alpha'][0])
+
+    try:
+        SABRParamStoreAppend(store, '2022-05-24', '3M10Y', 'FULL', 0.0670, 0.5, -0.0356, 1.0504)
+        duplicated = False
+    except ValueError:
+        duplicated = True
+    with open(os.path.join(store, 'README'), 'w') as f:
+        f.write('stray file')
+
+    test(True, lambda: duplicated)
+    test(2, lambda: len(SABRParamStoreLoad(store)[('3M10Y', 'FULL')]['Date']))
+
+    bumped = SABRBatchFullCalib(0.0266, [quotes[0]] * 2, np.array([quotes[1]] * 2) + [[0] * 5 + [1e-4] + [0] * 8, [0] * 5 + [-1e-4] + [0] * 8], 0.25, 0.5, 0.05, 0.1, 0.7)
+    bumped_prices = [Black76OptionPrice(0.0266, 0.025, SABRtoBlack76(0.0266, 0.025, 0.25, x[0], 0.5, x[1], x[2]), 0.25, 0.02, 'c') for x in bumped.x]
+
+    test(1.0, lambda: round(SABRQuoteVega(0.0266, [quotes[0]], 0.25, 0.02, batch_calib.x[0, 0], 0.5, batch_calib.x[0, 1], batch_calib.x[0, 2], [[0.025]])['SABR_QuoteVega'][0, 0, 5] /
+                            ((bumped_prices[0] - bumped_prices[1]) / 2e-4), 2))
+
+    test(True, lambda: np.all(np.abs(SABRMonteCarlo(0.0266, [0.0200, 0.0266, 0.0350], 0.25, 0.02, 0.0651, 0.5, -0.0356, 1.0504, Seed = 42)['Difference_StdErrs']) < 4))
+
+    ladder = SABRBumpLadder(0.0266, np.array([0.0200, 0.0250, 0.0300]), 0.25, 0.0651, 0.5, -0.0356, 1.0504, bump_params = ['F0'])
+
+    test(SABRDelta(0.0266, 0.0250, 0.25, 0.02, 'c', 0.0651, 0.5, -0.0356, 1.0504),
+         lambda: Black76Delta(0.0266, 0.0250, ladder['SABR_Vols'][1], 0.25, 0.02, 'c') + Black76Vega(0.0266, 0.0250, ladder['SABR_Vols'][1], 0.25, 0.02) * ladder['SABR_Sensitivity'][0, 1])
+
+    book = lambda nu: SABRBookAdjoint([0, 0, 1], [0.025, 0.030, 0.030], [0.25, 0.25, 5], ['c', 'p', 'c'], 1e6, [0.0266, 0.0310], [0.0654, 0.0535], 0.5,
+                                      [-0.0341, -0.3287], [0.3951, nu], [0.5, 1, 5, 10], [0.010, 0.012, 0.018, 0.020])
+
+    test(round((book(0.3951 + 1e-6)['PV'] - book(0.3951 - 1e-6)['PV']) / 2e-6, 2), lambda: round(book(0.3951)['dPV_dNu'][1], 2))
+
+    registry = 'sabrtest' + str(os.getpid())
+    publisher = SABRParamRegistryPublish(registry, ['3M10Y', '5Y10Y'], [0.0266, 0.0310], [0.25, 5], [0.0654, 0.0535], 0.5, [-0.0341, -0.3287], [1.0451, 0.3951])
+    worker = SABRParamRegistryAttach(registry)
+
+    test(0.0654, lambda: worker['Alpha'][0])
+    publisher = SABRParamRegistryPublish(registry, ['3M10Y', '5Y10Y'], [0.0266, 0.0310], [0.25, 5], [0.0660, 0.0535], 0.5, [-0.0341, -0.3287], [1.0451, 0.3951], publisher)
+    test(True, lambda: SABRParamRegistryRefresh(worker))
+    test(0.0660, lambda: worker['Alpha'][0])
+
+    SABRParamRegistryClose(worker)
+    SABRParamRegistryClose(publisher, Unlink = True)
+
+    #Parquet I/O needs the optional pyarrow dependency:
+    if importlib.util.find_spec('pyarrow') is not None:
+        parquet = os.path.join(tempfile.mkdtemp(), 'sabrcalibdata.parquet')
+        SABRDataWrite({'Point': ['3M10Y'] * 14 + ['6M10Y'], 'Strike': quotes[0] + [0.0266], 'BlackVol': quotes[1] + [0.4000]}, parquet, 'sabrcalibdata')
+
+        test(quotes[1][5], lambda: SABRDataRead(parquet, 'sabrcalibdata', Points = ['3M10Y'])['BlackVol'][5])
+        test(1, lambda: len(SABRDataRead(parquet, 'sabrcalibdata', Points = ['6M10Y'])['Strike']))
+    else:
+        print('pyarrow is not installed - skipping the Parquet round trip')
+
+    dispatcher = SABRMicroBatchStart(SABRtoBlack76)
+    bad = SABRMicroBatchSubmit(dispatcher, [0.018, 0.03], 0.025, 0.25, 0.06943288, 0.5, 0.02668178, 0.9025896)
+    good = SABRMicroBatchSubmit(dispatcher, 0.03, 0.025, 0.25, 0.06943288, 0.5, 0.02668178, 0.9025896)
+    SABRMicroBatchStop(dispatcher)
+    SABRMicroBatchStop(dispatcher)
+
+    test(True, lambda: isinstance(bad.exception(timeout = 5), ValueError))
+    test(True, lambda: bad.done() and good.done())
+    try:
+        SABRMicroBatchSubmit(dispatcher, 0.03, 0.025, 0.25, 0.06943288, 0.5, 0.02668178, 0.9025896)
+        refused = False
+    except ValueError:
+        refused = True
+    test(True, lambda: refused)
+
+    dispatcher = SABRMicroBatchStart(SABRtoBlack76, Window = 0.2)
+    cancelled = SABRMicroBatchSubmit(dispatcher, 0.018, 0.025, 0.25, 0.06943288, 0.5, 0.02668178, 0.9025896)
+    kept = SABRMicroBatchSubmit(dispatcher, 0.03, 0.025, 0.25, 0.06943288, 0.5, 0.02668178, 0.9025896)
+    cancelled.cancel()
+
+    test(0.435243, lambda: kept.result(timeout = 5))
+    test(0.5165779, lambda: SABRMicroBatchSubmit(dispatcher, 0.018, 0.025, 0.25, 0.06943288, 0.5, 0.02668178, 0.9025896).result(timeout = 5))
+    test(1, lambda: SABRMicroBatchStop(dispatcher)['Requests'] - 1)